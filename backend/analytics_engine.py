@@ -1,6 +1,7 @@
 from typing import List, Dict
 import random
 from collections import Counter
+import numpy as np
 from .models import (
     SyntheticSample, 
     AnalyticsMetrics, 
@@ -10,6 +11,7 @@ from .models import (
     Gender,
     Ethnicity
 )
+from .sample_batch import SampleBatch, GENDERS, ETHNICITIES
 
 class AnalyticsEngine:
     def __init__(self):
@@ -43,6 +45,27 @@ class AnalyticsEngine:
             if sample.medical_metadata:
                 self.demographic_data["condition"][sample.medical_metadata.condition] += 1
 
+    def update_from_batch(self, batch: SampleBatch):
+        """
+        Vectorized equivalent of update_metrics for a columnar SampleBatch (no per-sample objects).
+        """
+        self.total_generated += len(batch)
+        self.privacy_scores.extend(batch.privacy_scores.tolist())
+        self.demographic_data["age"].extend(batch.ages.tolist())
+
+        for key, codes, table in (
+            ("gender", batch.genders, GENDERS),
+            ("ethnicity", batch.ethnicities, ETHNICITIES),
+        ):
+            counts = np.bincount(codes, minlength=len(table))
+            for code, count in enumerate(counts.tolist()):
+                if count:
+                    self.demographic_data[key][table[code].value] += count
+
+        conditions, counts = np.unique(batch.conditions().astype(str), return_counts=True)
+        for condition, count in zip(conditions.tolist(), counts.tolist()):
+            self.demographic_data["condition"][condition] += count
+
     def _calculate_privacy(self) -> PrivacyMetrics:
         if not self.privacy_scores:
             return PrivacyMetrics(average_privacy_score=0.0, reidentification_risk_score=0.0)
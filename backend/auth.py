@@ -1,40 +1,46 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional, List
 from fastapi import Depends, HTTPException, status, Request, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from .config import settings
 from .models import TokenData, User, UserInDB, UserRole
+from .utils.lazy import LazyObject
 
 # Password handling
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login", auto_error=False)
 
 # Mock User Database
-fake_users_db = {
-    "researcher": {
-        "username": "researcher",
-        "email": "researcher@medical-ai.com",
-        "hashed_password": pwd_context.hash("securepassword123"),
-        "role": UserRole.RESEARCHER,
-        "disabled": False,
-    },
-    "admin": {
-        "username": "admin",
-        "email": "admin@medical-ai.com",
-        "hashed_password": pwd_context.hash("adminpassword123"),
-        "role": UserRole.ADMIN,
-        "disabled": False,
-    },
-    "auditor": {
-        "username": "auditor",
-        "email": "auditor@medical-ai.com",
-        "hashed_password": pwd_context.hash("auditorpassword123"),
-        "role": UserRole.AUDITOR,
-        "disabled": False,
+def _build_users_db() -> dict:
+    """bcrypt hashing is deliberately slow: the mock users are hashed off the import path, on a background thread at startup."""
+    return {
+        "researcher": {
+            "username": "researcher",
+            "email": "researcher@medical-ai.com",
+            "hashed_password": pwd_context.hash("securepassword123"),
+            "role": UserRole.RESEARCHER,
+            "disabled": False,
+        },
+        "admin": {
+            "username": "admin",
+            "email": "admin@medical-ai.com",
+            "hashed_password": pwd_context.hash("adminpassword123"),
+            "role": UserRole.ADMIN,
+            "disabled": False,
+        },
+        "auditor": {
+            "username": "auditor",
+            "email": "auditor@medical-ai.com",
+            "hashed_password": pwd_context.hash("auditorpassword123"),
+            "role": UserRole.AUDITOR,
+            "disabled": False,
+        }
     }
-}
+
+fake_users_db = LazyObject(_build_users_db, name="fake_users_db")
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -88,7 +94,11 @@ async def get_current_user(
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = get_user(fake_users_db, username=token_data.username)
+    if fake_users_db.is_initialized:
+        user = get_user(fake_users_db, username=token_data.username)
+    else:
+        # Still hashing the mock users (startup): wait for them off the event loop
+        user = await run_in_threadpool(get_user, fake_users_db, token_data.username)
     if user is None:
         raise credentials_exception
     return user
@@ -0,0 +1,134 @@
+import io
+from functools import lru_cache
+from importlib.util import find_spec
+from typing import Iterator, Optional
+
+import numpy as np
+
+from .analytics_engine import analytics_engine
+from .gan_simulator import gan_simulator
+from .models import PatientData
+from .sample_batch import SampleBatch
+from .utils.lazy import lazy_import
+
+# pandas / pyarrow are only imported when an export actually runs
+pd = lazy_import("pandas")
+# Parquet export is optional; CSV is always available
+PARQUET_AVAILABLE = find_spec("pyarrow") is not None
+pa = lazy_import("pyarrow") if PARQUET_AVAILABLE else None
+pq = lazy_import("pyarrow.parquet") if PARQUET_AVAILABLE else None
+
+EXPORT_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "csv": ("text/csv", "csv"),
+}
+# Rows generated and held in memory at once; bounds the memory of an export regardless of its size
+MAX_ROW_GROUP_SIZE = 100_000
+
+@lru_cache(maxsize=1)
+def cohort_schema() -> "pa.Schema":
+    return pa.schema([
+        ("id", pa.string()),
+        ("timestamp", pa.timestamp("us")),
+        ("modality", pa.string()),
+        ("image_url", pa.string()),
+        ("confidence_score", pa.float64()),
+        ("is_synthetic", pa.bool_()),
+        ("age", pa.int64()),
+        ("gender", pa.string()),
+        ("ethnicity", pa.string()),
+        ("condition", pa.string()),
+        ("dr_level", pa.string()),
+        ("image_quality_score", pa.float64()),
+        ("privacy_score", pa.float64()),
+    ])
+
+
+class _DrainableSink(io.RawIOBase):
+    """
+    Write-only file object that buffers written bytes until drained.
+    Lets ParquetWriter emit a row group at a time without ever holding the whole file.
+    """
+    def __init__(self):
+        super().__init__()
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer.extend(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class CohortExporter:
+    """
+    Streams synthetic cohorts as columnar files (Parquet via Arrow, CSV fallback).
+    Each row group is generated, written and flushed before the next is drawn,
+    so peak memory is bounded by `row_group_size`, not by the cohort size.
+    """
+    @staticmethod
+    def resolve_format(requested: str) -> str:
+        requested = requested.lower()
+        if requested not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format '{requested}', expected one of {list(EXPORT_FORMATS)}")
+        if requested == "parquet" and not PARQUET_AVAILABLE:
+            print("⚠️ pyarrow not installed, falling back to CSV cohort export.")
+            return "csv"
+        return requested
+
+    @staticmethod
+    def _batches(count: int, row_group_size: int, patient_request: Optional[PatientData], seed: Optional[int]) -> Iterator[SampleBatch]:
+        rng = np.random.default_rng(seed) if seed is not None else None
+        remaining = count
+        while remaining > 0:
+            batch = gan_simulator.generate_batch(min(row_group_size, remaining), patient_request, rng)
+            analytics_engine.update_from_batch(batch)
+            remaining -= len(batch)
+            yield batch
+
+    @staticmethod
+    def to_record_batch(batch: SampleBatch) -> "pa.RecordBatch":
+        arrays = batch.arrays()
+        schema = cohort_schema()
+        return pa.RecordBatch.from_arrays(
+            [pa.array(arrays[field.name], type=field.type) for field in schema],
+            schema=schema,
+        )
+
+    @classmethod
+    def stream_parquet(cls, count: int, row_group_size: int, patient_request: PatientData = None, seed: int = None) -> Iterator[bytes]:
+        sink = _DrainableSink()
+        writer = pq.ParquetWriter(sink, cohort_schema(), compression="snappy")
+        try:
+            for batch in cls._batches(count, row_group_size, patient_request, seed):
+                writer.write_batch(cls.to_record_batch(batch), row_group_size=len(batch))
+                yield sink.drain()
+        finally:
+            writer.close()
+        # Parquet footer (schema + row group index) is written on close
+        yield sink.drain()
+
+    @classmethod
+    def stream_csv(cls, count: int, row_group_size: int, patient_request: PatientData = None, seed: int = None) -> Iterator[bytes]:
+        header = True
+        for batch in cls._batches(count, row_group_size, patient_request, seed):
+            frame = pd.DataFrame(batch.arrays())
+            yield frame.to_csv(index=False, header=header).encode()
+            header = False
+
+    @classmethod
+    def stream(cls, export_format: str, count: int, row_group_size: int, patient_request: PatientData = None, seed: int = None) -> Iterator[bytes]:
+        if export_format == "parquet":
+            return cls.stream_parquet(count, row_group_size, patient_request, seed)
+        return cls.stream_csv(count, row_group_size, patient_request, seed)
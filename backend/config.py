@@ -21,7 +21,89 @@ class Settings(BaseSettings):
 
     # Resource Management
     LOW_RESOURCE_MODE: bool = os.getenv("LOW_RESOURCE_MODE", "true").lower() == "true"
-    
+
+    # Inference Scheduling (micro-batching of concurrent image requests)
+    INFERENCE_MAX_BATCH_SIZE: int = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "32"))
+    INFERENCE_MAX_WAIT_MS: float = float(os.getenv("INFERENCE_MAX_WAIT_MS", "5"))
+    # Memory-map generator weights read-only so all worker processes share one copy
+    WEIGHTS_MMAP: bool = os.getenv("WEIGHTS_MMAP", "true").lower() == "true"
+    # Per-modality generators: version used when a request doesn't pin one, and the memory
+    # ceiling (summed weight size) above which least-recently-used generators are unloaded
+    MODEL_DEFAULT_VERSION: str = os.getenv("MODEL_DEFAULT_VERSION", "v1")
+    MODEL_REGISTRY_MAX_MB: float = float(os.getenv("MODEL_REGISTRY_MAX_MB", "512"))
+    # Seconds between checks of the generator weights file for hot reload (0 disables watching)
+    WEIGHTS_WATCH_INTERVAL: float = float(os.getenv("WEIGHTS_WATCH_INTERVAL", "10"))
+    # Generator runtime: eager | torchscript | channels_last | int8 | bf16 (falls back to eager
+    # if the backend fails the fidelity check: mean abs error vs eager above the tolerance)
+    INFERENCE_BACKEND: str = os.getenv("INFERENCE_BACKEND", "eager")
+    INFERENCE_FIDELITY_TOLERANCE: float = float(os.getenv("INFERENCE_FIDELITY_TOLERANCE", "0.02"))
+    # Worker pool running generator inference + PNG encoding off the event loop: "thread" or "process"
+    INFERENCE_EXECUTOR: str = os.getenv("INFERENCE_EXECUTOR", "thread")
+    INFERENCE_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", "2"))
+    # Thread / batch-size calibration: off | load (apply generated/autotune.json if calibrated on this host)
+    # | calibrate (also calibrate at startup when there is none); target max latency of one batch
+    INFERENCE_AUTOTUNE: str = os.getenv("INFERENCE_AUTOTUNE", "load")
+    INFERENCE_LATENCY_TARGET_MS: float = float(os.getenv("INFERENCE_LATENCY_TARGET_MS", "250"))
+
+    # Pre-rendered images kept per generator, produced while the scheduler is idle (0 disables);
+    # refill starts below PRERENDER_LOW_WATERMARK (fraction of the pool) after PRERENDER_IDLE_MS without requests
+    PRERENDER_POOL_SIZE: int = int(os.getenv("PRERENDER_POOL_SIZE", "0"))
+    PRERENDER_LOW_WATERMARK: float = float(os.getenv("PRERENDER_LOW_WATERMARK", "0.5"))
+    PRERENDER_IDLE_MS: float = float(os.getenv("PRERENDER_IDLE_MS", "200"))
+
+    # Image encoding: PNG zlib level (0-9, PIL default 6), lossy WebP / JPEG quality (1-100)
+    # and WebP encoder effort (0 fastest - 6 smallest)
+    IMAGE_PNG_COMPRESS_LEVEL: int = int(os.getenv("IMAGE_PNG_COMPRESS_LEVEL", "6"))
+    IMAGE_WEBP_QUALITY: int = int(os.getenv("IMAGE_WEBP_QUALITY", "90"))
+    IMAGE_WEBP_METHOD: int = int(os.getenv("IMAGE_WEBP_METHOD", "2"))
+    IMAGE_JPEG_QUALITY: int = int(os.getenv("IMAGE_JPEG_QUALITY", "90"))
+
+    # Quality stage: score real GAN images (sharpness / contrast / entropy) instead of drawing
+    # image_quality_score at random; images below QUALITY_MIN_SCORE (0 = keep all) are regenerated
+    # with new seeds up to QUALITY_MAX_RETRIES times
+    QUALITY_SCORING: bool = os.getenv("QUALITY_SCORING", "false").lower() == "true"
+    QUALITY_MIN_SCORE: float = float(os.getenv("QUALITY_MIN_SCORE", "0"))
+    QUALITY_MAX_RETRIES: int = int(os.getenv("QUALITY_MAX_RETRIES", "3"))
+
+    # Rendered image cache (in-memory LRU + on-disk store under GENERATED_DIR)
+    GENERATED_DIR: str = os.getenv("GENERATED_DIR", "generated")
+    IMAGE_CACHE_MAX_MB: float = float(os.getenv("IMAGE_CACHE_MAX_MB", "64"))
+    IMAGE_CACHE_DISK: bool = os.getenv("IMAGE_CACHE_DISK", "true").lower() == "true"
+    # Size cap of the on-disk store; least recently used images are deleted above it (0 = unbounded)
+    IMAGE_CACHE_DISK_MAX_MB: float = float(os.getenv("IMAGE_CACHE_DISK_MAX_MB", "1024"))
+
+    # Streaming generation (NDJSON): samples generated and flushed per chunk
+    GENERATE_STREAM_CHUNK_SIZE: int = int(os.getenv("GENERATE_STREAM_CHUNK_SIZE", "1000"))
+    # Memoized seeded /generate results (total samples kept across cached requests)
+    GENERATION_CACHE_MAX_SAMPLES: int = int(os.getenv("GENERATION_CACHE_MAX_SAMPLES", "100000"))
+
+    # Uploads are streamed to disk in chunks of this size (bounds memory per upload)
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+    # Upload validation pool: "process" or "thread", workers (0 = one per CPU) and the
+    # maximum of files queued or in flight before uploads wait for the pool (back-pressure)
+    INGEST_EXECUTOR: str = os.getenv("INGEST_EXECUTOR", "process")
+    INGEST_WORKERS: int = int(os.getenv("INGEST_WORKERS", "0"))
+    INGEST_MAX_PENDING: int = int(os.getenv("INGEST_MAX_PENDING", "64"))
+
+    # Asynchronous generation jobs (worker processes, rows per chunk task)
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_CHUNK_SIZE: int = int(os.getenv("JOB_CHUNK_SIZE", "10000"))
+    # Finished jobs (and their result files) are dropped after JOB_RETENTION_SECONDS (0 = never),
+    # and beyond the newest JOB_MAX_PER_USER finished jobs of a user (0 = no limit)
+    JOB_RETENTION_SECONDS: int = int(os.getenv("JOB_RETENTION_SECONDS", str(24 * 3600)))
+    JOB_MAX_PER_USER: int = int(os.getenv("JOB_MAX_PER_USER", "50"))
+
+    # Shared training run: events kept for replay to new / reconnecting SSE subscribers
+    TRAINING_HISTORY_SIZE: int = int(os.getenv("TRAINING_HISTORY_SIZE", "200"))
+    # Training engine: "simulated" loss curves, or "real" GAN training on the uploaded images
+    # (decoded once into a uint8 tensor cache under GENERATED_DIR); checkpoint every N epochs
+    TRAINING_ENGINE: str = os.getenv("TRAINING_ENGINE", "simulated")
+    TRAINING_EPOCHS: int = int(os.getenv("TRAINING_EPOCHS", "100"))
+    TRAINING_BATCH_SIZE: int = int(os.getenv("TRAINING_BATCH_SIZE", "64"))
+    TRAINING_LOADER_WORKERS: int = int(os.getenv("TRAINING_LOADER_WORKERS", "2"))
+    TRAINING_CHECKPOINT_EVERY: int = int(os.getenv("TRAINING_CHECKPOINT_EVERY", "5"))
+    TRAINING_LEARNING_RATE: float = float(os.getenv("TRAINING_LEARNING_RATE", "0.0002"))
+
     class Config:
         case_sensitive = True
 
@@ -2,24 +2,42 @@ import random
 import time
 import math
 from datetime import datetime
-from typing import List, Generator
+from typing import Callable, List, Generator, Optional, Tuple
 import io
-from torchvision.utils import save_image
+import threading
 
-import torch
+import numpy as np
 import os
 from .models import (
     SyntheticSample,
-    Demographics,
-    MedicalMetadata,
-    Gender,
-    Ethnicity,
-    DrLevel,
     TrainingMetrics,
     PatientData,
+    ModelState,
+)
+from .sample_batch import (
+    SampleBatch,
+    SEED_BITS,
+    SEVERITY_THRESHOLDS,
+    GENDERS,
+    ETHNICITIES,
+    format_image_id,
+    parse_image_id,
+    split_image_id,
 )
-from .networks.gan_architecture import MedicalGenerator
 from .config import settings
+from .model_registry import LoadedModel, ModelRegistry, load_generator, model_name
+from .utils.lru_cache import LRUCache
+from .utils.lazy import lazy_import
+from .utils.memory_report import mapped_file_report
+from .utils.image_encoder import image_encoder, to_uint8
+from .quality_scorer import quality_scorer
+from .image_cache import image_cache, image_cache_key
+
+# torch takes seconds to import; defer until the first real GAN work
+torch = lazy_import("torch")
+
+LATENT_DIM = 100
+TRAINING_ENGINES = ("simulated", "real")
 
 class GANSimulator:
     def __init__(self):
@@ -27,33 +45,228 @@ class GANSimulator:
         self.max_epochs = 20 if settings.LOW_RESOURCE_MODE else 100
         self.weights_path = os.path.join(os.path.dirname(__file__), "weights/generator_v1.pth")
         self.model = None
-        self._load_model()
+        self.model_tag = "none"
+        self.inference_report = {}
+        self.weights_mmapped = False
+        # Seeded generate results, bounded by the total number of cached samples
+        self.result_cache = LRUCache(max_entries=1024, max_size=settings.GENERATION_CACHE_MAX_SAMPLES)
+        # Weights are not loaded at construction: call start_background_load() or ensure_loaded()
+        self.state = ModelState.PENDING
+        self.load_seconds = None
+        self._load_lock = threading.Lock()
+        # Guards the (model, model_tag) pair so readers never see one generator with another's tag
+        self._swap_lock = threading.Lock()
+        # (mtime_ns, size) of the weights file last loaded (or attempted), for hot reload
+        self._weights_stat = None
+        self._stop_watcher = threading.Event()
+        self.reloads = 0
+        self.last_reload_at = None
+        self.last_reload_error = None
+        # Generators per modality / version; the one at weights_path serves Retinal at the default version
+        self.registry = ModelRegistry()
+        self.default_model = model_name("Retinal")
+        # Set by PrerenderPool.start(): source of pre-rendered seeds for unseeded batches
+        self.prerender_pool = None
+        # Called after every successful hot reload, e.g. to recycle worker processes that hold
+        # their own copy of the generator
+        self.reload_listeners: List[Callable[[], None]] = []
+
+    @property
+    def is_loading(self) -> bool:
+        return self.state in (ModelState.PENDING, ModelState.LOADING)
+
+    def ensure_loaded(self):
+        """Load the generator synchronously if that hasn't happened yet (no-op afterwards)."""
+        with self._load_lock:
+            if self.state != ModelState.PENDING:
+                return
+            self.state = ModelState.LOADING
+            start = time.perf_counter()
+            self.state = self._load_model()
+            self.load_seconds = time.perf_counter() - start
 
-    def _load_model(self):
+    def start_background_load(self) -> threading.Thread:
+        """Load the generator on a daemon thread; readiness is reported through `state`."""
+        thread = threading.Thread(target=self.ensure_loaded, name="gan-model-loader", daemon=True)
+        thread.start()
+        return thread
+
+    def _load_model(self) -> ModelState:
         """Attempts to load real GAN weights if they exist, but skips in low resource mode for stability."""
         if settings.LOW_RESOURCE_MODE:
             print("ℹ️ Low resource mode active. Skipping real model load for stability.")
-            self.model = None
-            return
+            return ModelState.SIMULATION
 
         if os.path.exists(self.weights_path):
             try:
-                self.model = MedicalGenerator()
-                self.model.load_state_dict(torch.load(self.weights_path, map_location=torch.device('cpu')))
-                self.model.eval()
-                print(f"✅ Real GAN weights loaded from {self.weights_path}")
+                self._weights_stat = self._stat_weights()
+                # Convert to the configured CPU backend, warm up and verify against eager
+                self._swap(load_generator(self.weights_path))
+                print(f"✅ Real GAN weights loaded from {self.weights_path} (backend: {self.inference_report['backend']})")
+                return ModelState.READY
             except Exception as e:
                 print(f"❌ Error loading real GAN weights: {e}")
                 self.model = None
+                return ModelState.FAILED
         else:
             print("ℹ️ No real GAN weights found. Running in simulation mode.")
+            return ModelState.SIMULATION
+
+    def _swap(self, loaded: LoadedModel):
+        """Atomically make `loaded` the primary generator."""
+        with self._swap_lock:
+            self.model = loaded.model
+            self.model_tag = loaded.tag
+            self.inference_report = loaded.inference_report
+            self.weights_mmapped = loaded.weights_mmapped
+        # The primary generator is always resident; other modalities / versions load on demand
+        self.registry.register(self.default_model, loaded, pinned=True)
+
+    def _stat_weights(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.weights_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self) -> dict:
+        """
+        Hot reload: load the weights at `weights_path` into a new generator, warm it up and swap it in.
+        Renders already running keep the generator they resolved; requests resolving after the swap
+        use the new one. If the new weights fail to load, the old generator keeps serving.
+        Replace the weights file atomically (write elsewhere, then rename): the serving generator may
+        be memory-mapped from the old file.
+        """
+        if settings.LOW_RESOURCE_MODE:
+            return {"reloaded": False, "reason": "low resource mode"}
+        if self.state == ModelState.PENDING:
+            self.ensure_loaded()
+            return {"reloaded": self.state == ModelState.READY, "model_tag": self.model_tag}
+
+        with self._load_lock:
+            self._weights_stat = self._stat_weights()
+            try:
+                loaded = load_generator(self.weights_path)
+            except Exception as e:
+                self.last_reload_error = str(e)
+                print(f"❌ Hot reload of {self.weights_path} failed, keeping the current generator: {e}")
+                return {"reloaded": False, "reason": str(e), "model_tag": self.model_tag}
+            self._swap(loaded)
+            self.state = ModelState.READY
+            self.reloads += 1
+            self.last_reload_at = datetime.now()
+            self.last_reload_error = None
+        print(f"✅ Hot reloaded GAN weights from {self.weights_path} in {loaded.load_seconds:.2f}s (tag {loaded.tag})")
+        for listener in list(self.reload_listeners):
+            try:
+                listener()
+            except Exception as e:
+                print(f"⚠️ Reload listener {listener} failed: {e}")
+        return {"reloaded": True, "model_tag": loaded.tag, "load_seconds": loaded.load_seconds,
+                "backend": loaded.inference_report["backend"]}
+
+    def start_weights_watcher(self, interval: float = None) -> Optional[threading.Thread]:
+        """
+        Poll `weights_path` every `interval` seconds and hot reload when it changes.
+        A change is only picked up once the file has been stable for one interval,
+        so a checkpoint that is still being written is never loaded. Disabled with interval <= 0.
+        """
+        interval = settings.WEIGHTS_WATCH_INTERVAL if interval is None else interval
+        if interval <= 0 or settings.LOW_RESOURCE_MODE:
+            return None
+        self._stop_watcher.clear()
+        thread = threading.Thread(target=self._watch_weights, args=(interval,), name="gan-weights-watcher", daemon=True)
+        thread.start()
+        return thread
+
+    def stop_weights_watcher(self):
+        self._stop_watcher.set()
+
+    def _watch_weights(self, interval: float):
+        pending = None
+        while not self._stop_watcher.wait(interval):
+            current = self._stat_weights()
+            if current is None or current == self._weights_stat or self.is_loading:
+                pending = None
+                continue
+            if current != pending:
+                pending = current
+                continue
+            self.reload()
+            pending = None
+
+    def reload_stats(self) -> dict:
+        return {
+            "reloads": self.reloads,
+            "last_reload_at": self.last_reload_at.isoformat() if self.last_reload_at else None,
+            "last_reload_error": self.last_reload_error,
+        }
+
+    def weights_memory(self) -> Optional[dict]:
+        """Resident / shared memory this process maps from the weights file (Linux only)."""
+        if not self.weights_mmapped:
+            return None
+        report = mapped_file_report(self.weights_path)
+        if report is not None:
+            # Converting backends (torchscript, channels_last, int8) serve from their own private copy
+            report["serving_backend_shares_weights"] = self.inference_report.get("backend") in ("eager", "bf16")
+        return report
+
+    def image_model_for(self, patient_request: Optional[PatientData]) -> Optional[str]:
+        """
+        Model name of the generator serving `patient_request`'s scan type and version,
+        or None if no real generator is available for it (placeholder images).
+        """
+        scan_type = patient_request.scan_type if patient_request else "Retinal"
+        version = patient_request.model_version if patient_request else None
+        name = model_name(scan_type, version)
+        if name == self.default_model:
+            return name if self.model is not None else None
+        if settings.LOW_RESOURCE_MODE or self.is_loading:
+            return None
+        return name if self.registry.available(name) else None
+
+    def resolve_model(self, name: Optional[str] = None) -> Tuple["torch.nn.Module", str]:
+        """
+        (generator, model_tag) for model `name`; None (legacy image ids) means the primary generator.
+        Other models are loaded through the registry on first use. Raises KeyError for unknown models
+        and ValueError if the primary generator isn't loaded.
+        """
+        if name is None or name == self.default_model:
+            with self._swap_lock:
+                model, model_tag = self.model, self.model_tag
+            if not model:
+                raise ValueError("GAN model not loaded")
+            self.registry.touch(self.default_model)
+            return model, model_tag
+        if settings.LOW_RESOURCE_MODE:
+            raise ValueError(f"Generator '{name}' unavailable in low resource mode")
+        loaded = self.registry.get(name)
+        return loaded.model, loaded.tag
+
+    @staticmethod
+    def latent_for_seed(seed: int) -> "torch.Tensor":
+        """Deterministic latent vector (100, 1, 1) for a seed, independent of global RNG state."""
+        generator = torch.Generator().manual_seed(seed)
+        return torch.randn(LATENT_DIM, 1, 1, generator=generator)
     
     def train(self) -> Generator[TrainingMetrics, None, None]:
         """
-        Simulates the training process of a GAN.
+        Runs the training process of the GAN: simulated loss curves, or with
+        TRAINING_ENGINE=real the training engine over the uploaded images.
         Yields metrics for each epoch.
         """
+        engine = settings.TRAINING_ENGINE.lower()
+        if engine not in TRAINING_ENGINES:
+            raise ValueError(f"Unknown training engine '{engine}', expected one of {TRAINING_ENGINES}")
         self.epoch = 0
+        if engine == "real":
+            from .training_engine import training_engine
+            for metrics in training_engine.train():
+                self.epoch = metrics.epoch
+                yield metrics
+            return
+
         # Simulate loss curves: Generator loss decreases, Discriminator loss stabilizes
         gen_loss_start = 2.5
         disc_loss_start = 0.5
@@ -84,88 +297,180 @@ class GANSimulator:
             sleep_time = 0.5 if not settings.LOW_RESOURCE_MODE else 1.0
             time.sleep(sleep_time)
 
-    def generate_real_image(self) -> io.BytesIO:
+    def generate_real_image(self, seed: int = None) -> io.BytesIO:
         """
         Runs inference on the real GAN model and returns PNG bytes.
         """
-        if not self.model:
-            raise ValueError("GAN model not loaded")
-        
+        if seed is None:
+            seed = random.getrandbits(SEED_BITS)
+        return io.BytesIO(self.generate_real_images([seed])[0])
+
+    def generate_image_tensor(self, seeds: List[int], model: str = None) -> "torch.Tensor":
+        """
+        Raw generator output (len(seeds), 3, 64, 64) float32 in [-1, 1] from a single batched forward
+        pass of generator `model` (the primary one by default). The same seed always yields the same image.
+        """
+        return self.generate_tagged_image_tensor(seeds, model)[0]
+
+    def generate_tagged_image_tensor(self, seeds: List[int], model: str = None) -> Tuple["torch.Tensor", str]:
+        """
+        Like generate_image_tensor, plus the model_tag of the generator that actually rendered it.
+        A hot reload can swap the generator at any time (in this process or, with process workers,
+        in a worker only), so cache keys must use this tag rather than one resolved earlier.
+        """
+        generator, model_tag = self.resolve_model(model)
         with torch.no_grad():
-            # Create random noise vector (1, 100, 1, 1) to match DCGAN architecture
-            noise = torch.randn(1, 100, 1, 1)
+            # Stack per-seed noise into a (len(seeds), 100, 1, 1) batch to match DCGAN architecture
+            noise = torch.stack([self.latent_for_seed(seed) for seed in seeds])
             # Move to CPU as we are doing local inference
-            fake_image = self.model(noise).cpu()
-            
-            # Convert to PNG bytes
-            buf = io.BytesIO()
-            save_image(fake_image, buf, format='PNG', normalize=True)
-            buf.seek(0)
-            return buf
+            return generator(noise).cpu(), model_tag
+
+    def generate_real_images(self, seeds: List[int], model: str = None, fmt: str = "png") -> List[bytes]:
+        """
+        Runs a single batched forward pass of generator `model` (the primary one by default) over
+        the latent vectors of `seeds` and returns one encoded image (PNG, WebP or JPEG) per seed.
+        The same seed always yields the same image.
+        """
+        fake_images = self.generate_image_tensor(seeds, model)
+        # Normalized per image, as save_image(normalize=True) did, for the whole batch at once
+        return image_encoder.encode_batch(to_uint8(fake_images), fmt)
+
+    def generate_tagged_images(self, seeds: List[int], model: str = None, fmt: str = "png") -> Tuple[List[bytes], str]:
+        """
+        Like generate_real_images, plus the model_tag of the generator that rendered them.
+        """
+        fake_images, model_tag = self.generate_tagged_image_tensor(seeds, model)
+        return image_encoder.encode_batch(to_uint8(fake_images), fmt), model_tag
 
-    def generate_samples(self, count: int, patient_request: PatientData = None) -> List[SyntheticSample]:
+    def generate_batch(self, count: int, patient_request: PatientData = None, rng: np.random.Generator = None) -> SampleBatch:
+        """
+        Vectorized sample generation: draws every column for `count` samples as NumPy arrays in one shot.
+        Uses real GAN image URLs if the model is loaded, otherwise managed placeholders.
+        All randomness comes from `rng` (a fresh, independently seeded generator if omitted),
+        never from process-global RNG state.
+        """
+        seeded = rng is not None
+        rng = rng if seeded else np.random.default_rng()
+
+        # 1. Generate Metadata
+        if patient_request:
+            ages = np.full(count, patient_request.age, dtype=np.int64)
+        else:
+            ages = rng.integers(20, 81, size=count)
+        condition_severity = rng.random(count) + np.where(ages > 60, 0.3, 0.0)
+        dr_levels = np.searchsorted(SEVERITY_THRESHOLDS, condition_severity, side="right")
+
+        # Determine Condition (explicit request wins, otherwise derived from dr_level)
+        condition_override = patient_request.condition if patient_request and patient_request.condition else None
+
+        # 2. Generate Image ids (latent seeds for the real GAN, placeholder index otherwise)
+        scan_type = patient_request.scan_type if patient_request else "Retinal"
+        image_model = self.image_model_for(patient_request)
+        real_images = image_model is not None
+        image_quality_scores = None
+        if real_images:
+            image_ids = rng.integers(0, 2 ** SEED_BITS, size=count, dtype=np.int64)
+            pooled = []
+            if not seeded and self.prerender_pool is not None:
+                # Already rendered and cached: the first fetch of these image URLs skips inference
+                pooled = self.prerender_pool.take(image_model, count)
+                image_ids[:len(pooled)] = [seed for seed, _ in pooled]
+            if settings.QUALITY_SCORING:
+                image_quality_scores = self.score_images(image_ids, image_model, rng, [score for _, score in pooled])
+        else:
+            image_ids = rng.integers(1, 21, size=count)
+
+        return SampleBatch(
+            timestamp=datetime.now(),
+            modality=scan_type,
+            id_prefix=f"syn_{rng.integers(10 ** 9, 2 * 10 ** 9)}" if seeded else f"syn_{int(time.time())}",
+            id_suffixes=rng.integers(1000, 10000, size=count),
+            image_ids=image_ids,
+            real_images=real_images,
+            confidence_scores=rng.uniform(0.88, 0.99, size=count),
+            ages=ages,
+            genders=rng.integers(0, len(GENDERS), size=count),
+            ethnicities=rng.integers(0, len(ETHNICITIES), size=count),
+            dr_levels=dr_levels,
+            # Placeholder images (or scoring disabled): nothing to measure, keep the simulated range
+            image_quality_scores=image_quality_scores if image_quality_scores is not None else np.round(rng.uniform(3.5, 5.0, size=count), 2),
+            privacy_scores=np.round(rng.uniform(0.85, 0.99, size=count), 4),
+            condition_override=condition_override,
+            image_model=image_model,
+        )
+
+    def score_images(self, image_ids: np.ndarray, model: Optional[str], rng: np.random.Generator,
+                     known_scores: List[Optional[float]] = ()) -> np.ndarray:
+        """
+        Quality stage: render the images behind `image_ids` batch by batch and score them.
+        With QUALITY_MIN_SCORE, images below it get a fresh seed (replaced in `image_ids` in place)
+        and are re-scored, up to QUALITY_MAX_RETRIES times; leading ids with `known_scores`
+        (pre-rendered pool) are not rendered again.
+        The images that are kept go to the in-memory image cache as PNGs (like PrerenderPool.take),
+        so their first fetch doesn't run inference a second time. Blocking: call off the event loop.
+        """
+        scores = np.empty(len(image_ids))
+        known = len(known_scores) if all(score is not None for score in known_scores) else 0
+        scores[:known] = known_scores[:known]
+        pending = np.arange(known, len(image_ids))
+        step = settings.INFERENCE_MAX_BATCH_SIZE
+
+        for attempt in range(settings.QUALITY_MAX_RETRIES + 1):
+            if attempt:
+                image_ids[pending] = rng.integers(0, 2 ** SEED_BITS, size=pending.size, dtype=np.int64)
+            final = settings.QUALITY_MIN_SCORE <= 0 or attempt == settings.QUALITY_MAX_RETRIES
+            for start in range(0, pending.size, step):
+                chunk = pending[start:start + step]
+                started = time.perf_counter()
+                images, model_tag = self.generate_tagged_image_tensor(image_ids[chunk].tolist(), model)
+                quality_scorer.record_inference(time.perf_counter() - started)
+                scores[chunk] = quality_scorer.score(images)
+                # Rejected images are re-rendered with a new seed: only cache the ones that stay
+                keep = np.arange(chunk.size) if final else np.flatnonzero(scores[chunk] >= settings.QUALITY_MIN_SCORE)
+                pngs = image_encoder.encode_batch(to_uint8(images[torch.as_tensor(keep)]), "png") if keep.size else []
+                for seed, png in zip(image_ids[chunk[keep]].tolist(), pngs):
+                    image_cache.put_memory(image_cache_key(model_tag, format_image_id(seed)), png)
+            if settings.QUALITY_MIN_SCORE <= 0:
+                break
+            pending = np.flatnonzero(scores < settings.QUALITY_MIN_SCORE)
+            if not pending.size or attempt == settings.QUALITY_MAX_RETRIES:
+                break
+            quality_scorer.record_rejections(pending.size, 0)
+
+        if settings.QUALITY_MIN_SCORE > 0:
+            quality_scorer.record_rejections(0, int(np.count_nonzero(scores < settings.QUALITY_MIN_SCORE)))
+        return scores
+
+    def _memoized(self, kind: str, count: int, patient_request: Optional[PatientData], seed: int, build):
+        cache_key = (kind, patient_request.model_dump_json() if patient_request else None, count, seed,
+                     self.model_tag, self.image_model_for(patient_request))
+        result = self.result_cache.get(cache_key)
+        if result is None:
+            result = build()
+            self.result_cache.put(cache_key, result)
+        return result
+
+    def generate_samples(self, count: int, patient_request: PatientData = None, seed: int = None) -> List[SyntheticSample]:
         """
         Generates synthetic samples. Uses real GAN if model is loaded, otherwise simulates.
+        With a `seed` the result is reproducible and memoized by (patient_request, count, seed).
         """
-        samples = []
-        
-        for _ in range(count):
-            # 1. Generate Metadata
-            age = patient_request.age if patient_request else random.randint(20, 80)
-            condition_severity = random.random()
-            if age > 60: condition_severity += 0.3
-            
-            if condition_severity < 0.3: dr_level = DrLevel.NONE
-            elif condition_severity < 0.5: dr_level = DrLevel.MILD
-            elif condition_severity < 0.7: dr_level = DrLevel.MODERATE
-            elif condition_severity < 0.9: dr_level = DrLevel.SEVERE
-            else: dr_level = DrLevel.PROLIFERATIVE
-                
-            demo = Demographics(
-                age=age,
-                gender=random.choice(list(Gender)),
-                ethnicity=random.choice(list(Ethnicity))
-            )
-            
-            # Determine Condition
-            if patient_request and patient_request.condition:
-                condition_name = patient_request.condition
-            else:
-                condition_name = "Diabetic Retinopathy" if dr_level != DrLevel.NONE else "Healthy"
-            
-            metadata = MedicalMetadata(
-                condition=condition_name,
-                dr_level=dr_level,
-                image_quality_score=round(random.uniform(3.5, 5.0), 2),
-                privacy_score=round(random.uniform(0.85, 0.99), 4)
-            )
-            
-            # 2. Generate Image URL (Real or Managed Placeholder)
-            scan_type = patient_request.scan_type if patient_request else "Retinal"
-            
-            if self.model:
-                # REAL GAN INFERENCE
-                # In a full impl, we'd save this to a static folder and return that URL
-                # For now, we flag it as 'real-synthetic'
-                image_url = f"http://localhost:8000/api/synthetic/generate/{random.randint(1000, 9999)}.png"
-            else:
-                # Simulated Placeholder
-                image_id = random.randint(1, 20)
-                image_url = f"https://synthetic-storage.example.com/scans/{scan_type.lower()}_{image_id}.png"
-            
-            samples.append(
-                SyntheticSample(
-                    id=f"syn_{int(time.time())}_{random.randint(1000, 9999)}",
-                    timestamp=datetime.now(),
-                    modality=scan_type,
-                    image_url=image_url,
-                    confidence_score=random.uniform(0.88, 0.99),
-                    is_synthetic=True,
-                    demographics=demo,
-                    medical_metadata=metadata
-                )
-            )
-            
-        return samples
+        if seed is None:
+            return self.generate_batch(count, patient_request).to_samples()
+        return self._memoized(
+            "samples", count, patient_request, seed,
+            lambda: self.generate_batch(count, patient_request, np.random.default_rng(seed)).to_samples(),
+        )
+
+    def generate_columnar(self, count: int, patient_request: PatientData = None, seed: int = None) -> SampleBatch:
+        """
+        Columnar counterpart of generate_samples: same seeding and memoization, no Pydantic objects.
+        """
+        if seed is None:
+            return self.generate_batch(count, patient_request)
+        return self._memoized(
+            "batch", count, patient_request, seed,
+            lambda: self.generate_batch(count, patient_request, np.random.default_rng(seed)),
+        )
 
 gan_simulator = GANSimulator()
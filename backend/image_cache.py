@@ -0,0 +1,161 @@
+import asyncio
+import os
+import threading
+import uuid
+from typing import Optional
+
+import aiofiles
+
+from .config import settings
+from .utils.lru_cache import LRUCache
+
+IMAGE_CACHE_DIR = os.path.join(settings.GENERATED_DIR, "images")
+
+def image_cache_key(model_tag: str, image_id: str, fmt: str = "png") -> str:
+    """Content address of a rendered image: weights fingerprint + seed-encoding image id + format."""
+    return f"{model_tag}_{image_id}.{fmt}"
+
+class ImageCache:
+    """
+    Two-tier cache for rendered image bytes.
+    Tier 1 is a bounded in-memory LRU, tier 2 an on-disk store under `generated/images`.
+    Keys must be content addresses (model fingerprint + seed + format), so entries never go stale.
+    The disk tier is bounded by `max_disk_mb`: every tenth of that written, the store is scanned and
+    the least recently used files (by mtime, bumped on each disk hit) are deleted down to 90% of it.
+    Several processes (job workers) write the store, so between scans it can overshoot by what
+    the other writers added.
+    """
+    def __init__(self, cache_dir: str = IMAGE_CACHE_DIR, max_memory_mb: float = None, use_disk: bool = None,
+                 max_disk_mb: float = None):
+        max_memory_mb = settings.IMAGE_CACHE_MAX_MB if max_memory_mb is None else max_memory_mb
+        self.memory = LRUCache(max_entries=100_000, max_size=int(max_memory_mb * 1024 * 1024))
+        self.cache_dir = cache_dir
+        self.use_disk = settings.IMAGE_CACHE_DISK if use_disk is None else use_disk
+        max_disk_mb = settings.IMAGE_CACHE_DISK_MAX_MB if max_disk_mb is None else max_disk_mb
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self.disk_hits = 0
+        self.disk_writes = 0
+        self.disk_evictions = 0
+        self._lock = threading.Lock()
+        # Start due, so a store left over-full by a previous run is trimmed on the first write
+        self._written_since_scan = self.max_disk_bytes
+        if self.use_disk:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        # Two-level fan-out keeps directory listings small
+        return os.path.join(self.cache_dir, os.path.splitext(key)[0][-2:], key)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        data = self.memory.get(key)
+        if data is not None or not self.use_disk:
+            return data
+
+        path = self._path(key)
+        try:
+            async with aiofiles.open(path, 'rb') as in_file:
+                data = await in_file.read()
+            # Recently used: evicted last
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        self.disk_hits += 1
+        self.memory.put(key, data)
+        return data
+
+    async def put(self, key: str, data: bytes):
+        self.memory.put(key, data)
+        if not self.use_disk:
+            return
+
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a unique temp file and rename, so readers never see a partial image
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        async with aiofiles.open(tmp_path, 'wb') as out_file:
+            await out_file.write(data)
+        os.replace(tmp_path, path)
+        if self._count_disk_write(len(data)):
+            await asyncio.get_running_loop().run_in_executor(None, self.evict_disk)
+
+    def put_memory(self, key: str, data: bytes):
+        """
+        Synchronous memory-only store, for producers outside the event loop (e.g. the pre-render pool).
+        """
+        self.memory.put(key, data)
+
+    def put_disk(self, key: str, data: bytes):
+        """
+        Synchronous disk-only store, for producers outside the event loop (e.g. job workers).
+        """
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as out_file:
+            out_file.write(data)
+        os.replace(tmp_path, path)
+        if self._count_disk_write(len(data)):
+            self.evict_disk()
+
+    def _count_disk_write(self, size: int) -> bool:
+        """Record a disk write; True when enough was written since the last scan to scan again."""
+        with self._lock:
+            self.disk_writes += 1
+            self._written_since_scan += size
+            if self.max_disk_bytes <= 0 or self._written_since_scan < self.max_disk_bytes // 10:
+                return False
+            self._written_since_scan = 0
+            return True
+
+    def evict_disk(self) -> int:
+        """
+        Delete the least recently used files until the disk tier is within 90% of `max_disk_bytes`
+        (nothing if it is within the cap). Returns the number of files deleted.
+        """
+        entries, total = [], 0
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.max_disk_bytes:
+            return 0
+
+        entries.sort()
+        target, removed = self.max_disk_bytes * 0.9, 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass  # Evicted by another process
+            total -= size
+        with self._lock:
+            self.disk_evictions += removed
+        return removed
+
+    def stats(self) -> dict:
+        return {
+            "memory": self.memory.stats(),
+            "disk_enabled": self.use_disk,
+            "disk_hits": self.disk_hits,
+            "disk_writes": self.disk_writes,
+            "disk_evictions": self.disk_evictions,
+            "disk_max_mb": self.max_disk_bytes / (1024 * 1024),
+        }
+
+# Global Instance
+image_cache = ImageCache()
@@ -0,0 +1,211 @@
+import json
+import os
+import platform
+import statistics
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from .config import settings
+from .inference_scheduler import InferenceScheduler, inference_scheduler
+from .utils.lazy import lazy_import
+
+torch = lazy_import("torch")
+
+AUTOTUNE_PATH = os.path.join(settings.GENERATED_DIR, "autotune.json")
+AUTOTUNE_MODES = ("off", "load", "calibrate")
+DEFAULT_BATCH_SIZES = (1, 8, 16, 32, 64)
+
+
+def default_thread_counts() -> List[int]:
+    """1, 2, 4, ... up to the host's CPU count (always included)."""
+    cpus = os.cpu_count() or 1
+    counts, threads = [], 1
+    while threads < cpus:
+        counts.append(threads)
+        threads *= 2
+    return counts + [cpus]
+
+
+def thread_budget() -> int:
+    """
+    Intra-op threads one forward pass may use without oversubscribing the host: every uvicorn
+    worker (WEB_CONCURRENCY) runs up to INFERENCE_WORKERS forward passes at the same time.
+    """
+    workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1"))) * max(1, settings.INFERENCE_WORKERS)
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def host_fingerprint() -> dict:
+    """A persisted calibration is only reused on the same kind of host and runtime."""
+    return {
+        "cpu_count": os.cpu_count(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "torch": torch.__version__,
+        "backend": settings.INFERENCE_BACKEND,
+    }
+
+
+class InferenceAutotuner:
+    """
+    Calibrates generator inference on the current host: benchmarks a grid of intra-op thread
+    counts x batch sizes, picks the highest-throughput point whose batch latency stays within
+    `latency_target_ms` (and whose threads fit the per-worker budget), persists the report to
+    `generated/autotune.json` and applies it to torch and the micro-batching scheduler.
+    """
+    def __init__(self, path: str = AUTOTUNE_PATH, scheduler: InferenceScheduler = None, latency_target_ms: float = None):
+        self.path = path
+        self.scheduler = scheduler or inference_scheduler
+        self.latency_target_ms = settings.INFERENCE_LATENCY_TARGET_MS if latency_target_ms is None else latency_target_ms
+        self.report: Optional[dict] = None
+        self.applied: Optional[dict] = None
+        self._lock = threading.Lock()
+
+    def _measure(self, model, threads: int, batch_size: int, iterations: int) -> dict:
+        torch.set_num_threads(threads)
+        latents = torch.randn(batch_size, 100, 1, 1)
+        timings = []
+        with torch.no_grad():
+            model(latents)  # warm-up: kernel selection for this shape / thread count
+            for _ in range(iterations):
+                start = time.perf_counter()
+                model(latents)
+                timings.append(time.perf_counter() - start)
+        median = statistics.median(timings)
+        return {
+            "threads": threads,
+            "batch_size": batch_size,
+            "batch_latency_ms": round(median * 1000, 3),
+            "p95_latency_ms": round(sorted(timings)[int(0.95 * (len(timings) - 1))] * 1000, 3),
+            "per_image_ms": round(median * 1000 / batch_size, 3),
+            "images_per_sec": round(batch_size / median, 1),
+        }
+
+    def calibrate(self, model, thread_counts: List[int] = None, batch_sizes: List[int] = None,
+                  iterations: int = 5, persist: bool = True) -> dict:
+        """
+        Benchmark `model` over the grid and return the report (curves + chosen configuration).
+        Torch's thread count is restored afterwards; call apply() to use the result.
+        """
+        thread_counts = sorted(set(thread_counts or default_thread_counts()))
+        batch_sizes = sorted(set(batch_sizes or DEFAULT_BATCH_SIZES))
+        budget = thread_budget()
+        previous_threads = torch.get_num_threads()
+
+        with self._lock:
+            started = time.perf_counter()
+            try:
+                results = [
+                    self._measure(model, threads, batch_size, iterations)
+                    for threads in thread_counts
+                    for batch_size in batch_sizes
+                ]
+            finally:
+                torch.set_num_threads(previous_threads)
+
+            candidates = [r for r in results if r["threads"] <= budget] or results
+            within_target = [r for r in candidates if r["batch_latency_ms"] <= self.latency_target_ms]
+            if within_target:
+                best = max(within_target, key=lambda r: (r["images_per_sec"], -r["threads"]))
+            else:
+                best = min(candidates, key=lambda r: r["batch_latency_ms"])
+
+            report = {
+                "calibrated_at": datetime.now().isoformat(),
+                "duration_seconds": round(time.perf_counter() - started, 2),
+                "host": host_fingerprint(),
+                "thread_budget": budget,
+                "latency_target_ms": self.latency_target_ms,
+                "best": {"threads": best["threads"], "batch_size": best["batch_size"]},
+                "results": results,
+            }
+            self.report = report
+            if persist:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w") as out_file:
+                    json.dump(report, out_file, indent=2)
+                os.replace(tmp_path, self.path)
+        return report
+
+    def load(self) -> Optional[dict]:
+        """The persisted report, if there is one for this host."""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path) as in_file:
+                report = json.load(in_file)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable autotune report {self.path}: {e}")
+            return None
+        if report.get("host") != host_fingerprint():
+            print("ℹ️ Autotune report was calibrated on a different host, ignoring it.")
+            return None
+        self.report = report
+        return report
+
+    def apply(self, report: dict = None) -> Optional[dict]:
+        """Use the report's best configuration for torch's thread pools and the micro-batch size."""
+        report = report or self.report
+        if not report:
+            return None
+        best = report["best"]
+        torch.set_num_threads(best["threads"])
+        try:
+            # The generator is a plain sequential graph: inter-op parallelism only adds threads.
+            # Can only be set before the first parallel op, so this is best effort.
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass
+        settings.INFERENCE_MAX_BATCH_SIZE = best["batch_size"]
+        self.scheduler.max_batch_size = best["batch_size"]
+        self.applied = dict(best)
+        print(f"✅ Inference autotune applied: {best['threads']} threads, batch size {best['batch_size']}")
+        return self.applied
+
+    def run_at_startup(self, simulator, mode: str = None) -> Optional[dict]:
+        """
+        INFERENCE_AUTOTUNE=load applies a persisted calibration for this host;
+        =calibrate also calibrates when there is none. Needs a loaded generator.
+        """
+        mode = (mode or settings.INFERENCE_AUTOTUNE).lower()
+        if mode not in AUTOTUNE_MODES:
+            raise ValueError(f"Unknown autotune mode '{mode}', expected one of {AUTOTUNE_MODES}")
+        if mode == "off":
+            return None
+        report = self.load()
+        if report is None and mode == "calibrate":
+            simulator.ensure_loaded()
+            if simulator.model is None:
+                return None
+            report = self.calibrate(simulator.model)
+        return self.apply(report)
+
+    def start(self, simulator) -> Optional[threading.Thread]:
+        """Run `run_at_startup` on a daemon thread, after the generator has loaded."""
+        if settings.INFERENCE_AUTOTUNE.lower() == "off" or settings.LOW_RESOURCE_MODE:
+            return None
+
+        def _run():
+            simulator.ensure_loaded()
+            try:
+                self.run_at_startup(simulator)
+            except Exception as e:
+                print(f"⚠️ Inference autotune failed: {e}")
+
+        thread = threading.Thread(target=_run, name="gan-autotune", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> dict:
+        return {
+            "mode": settings.INFERENCE_AUTOTUNE,
+            "applied": self.applied,
+            "torch_threads": torch.get_num_threads() if self.applied else None,
+            "calibrated_at": self.report.get("calibrated_at") if self.report else None,
+        }
+
+# Global Instance
+inference_autotuner = InferenceAutotuner()
@@ -0,0 +1,128 @@
+import copy
+import time
+from typing import Callable, Dict, Tuple
+
+import torch
+import torch.nn as nn
+
+from .config import settings
+
+LATENT_SHAPE = (100, 1, 1)
+INFERENCE_BACKENDS = ("eager", "torchscript", "channels_last", "int8", "bf16")
+
+# Fixed latents for warm-up / fidelity checks, independent of global RNG state
+_CHECK_SEED = 1234
+
+
+class ChannelsLastGenerator(nn.Module):
+    """Runs the generator with NHWC (channels_last) activations and returns NCHW float32 as before."""
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.model = model.to(memory_format=torch.channels_last)
+
+    def forward(self, x):
+        return self.model(x.contiguous(memory_format=torch.channels_last)).contiguous()
+
+
+class BFloat16Generator(nn.Module):
+    """Runs the generator under CPU bf16 autocast and returns float32 outputs."""
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x):
+        with torch.autocast("cpu", dtype=torch.bfloat16):
+            return self.model(x).float()
+
+
+def _latents(count: int, seed: int = _CHECK_SEED) -> torch.Tensor:
+    generator = torch.Generator().manual_seed(seed)
+    return torch.randn(count, *LATENT_SHAPE, generator=generator)
+
+
+def _build_torchscript(model: nn.Module) -> nn.Module:
+    traced = torch.jit.trace(model, _latents(1))
+    return torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+
+
+def _build_int8(model: nn.Module) -> nn.Module:
+    """
+    Static post-training int8 quantization (FX graph mode), calibrated on random latents.
+    Dynamic int8 quantization only covers Linear/RNN layers, which MedicalGenerator does not have.
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    prepared = prepare_fx(copy.deepcopy(model), get_default_qconfig_mapping("x86"), (_latents(1),))
+    with torch.no_grad():
+        for seed in range(8):
+            prepared(_latents(32, seed))
+    return convert_fx(prepared)
+
+
+_BUILDERS: Dict[str, Callable[[nn.Module], nn.Module]] = {
+    "eager": lambda model: model,
+    "torchscript": _build_torchscript,
+    "channels_last": lambda model: ChannelsLastGenerator(copy.deepcopy(model)).eval(),
+    "int8": _build_int8,
+    "bf16": lambda model: BFloat16Generator(model).eval(),
+}
+
+
+def build_inference_model(model: nn.Module, backend: str) -> nn.Module:
+    """
+    Wrap / convert an eval-mode MedicalGenerator for the requested CPU inference backend.
+    """
+    if backend not in _BUILDERS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {INFERENCE_BACKENDS}")
+    with torch.no_grad():
+        return _BUILDERS[backend](model)
+
+
+def warm_up(model: nn.Module, batch_size: int = 8, iterations: int = 3) -> float:
+    """
+    Run a few forward passes so lazy kernel selection / graph optimization happens at load,
+    not on the first user request. Returns the average warm-up latency in seconds.
+    """
+    latents = _latents(batch_size)
+    start = time.perf_counter()
+    with torch.no_grad():
+        for _ in range(iterations):
+            model(latents)
+    return (time.perf_counter() - start) / iterations
+
+
+def check_fidelity(reference: nn.Module, candidate: nn.Module, samples: int = 16) -> Dict[str, float]:
+    """
+    Compare candidate outputs against the eager reference on fixed latents (outputs are tanh, in [-1, 1]).
+    """
+    latents = _latents(samples)
+    with torch.no_grad():
+        diff = (candidate(latents).float() - reference(latents).float()).abs()
+    return {"mean_abs_error": diff.mean().item(), "max_abs_error": diff.max().item()}
+
+
+def prepare_generator(model: nn.Module, backend: str = None, tolerance: float = None) -> Tuple[nn.Module, dict]:
+    """
+    Build the configured backend, warm it up and verify it against eager within `tolerance`
+    (mean absolute error). Falls back to eager if the backend fails to build or misses the quality bar.
+    Returns (model_to_serve, report).
+    """
+    backend = (backend or settings.INFERENCE_BACKEND).lower()
+    tolerance = settings.INFERENCE_FIDELITY_TOLERANCE if tolerance is None else tolerance
+    report = {"requested_backend": backend, "backend": backend, "tolerance": tolerance}
+
+    try:
+        candidate = build_inference_model(model, backend)
+        report["warmup_latency_ms"] = round(warm_up(candidate) * 1000, 3)
+        if backend != "eager":
+            report.update(check_fidelity(model, candidate))
+            if report["mean_abs_error"] > tolerance:
+                raise ValueError(f"fidelity check failed (mean abs error {report['mean_abs_error']:.4f} > {tolerance})")
+    except Exception as e:
+        print(f"⚠️ Inference backend '{backend}' unavailable, falling back to eager: {e}")
+        report.update(backend="eager", fallback_reason=str(e))
+        candidate = model
+        report["warmup_latency_ms"] = round(warm_up(candidate) * 1000, 3)
+
+    return candidate, report
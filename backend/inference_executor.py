@@ -0,0 +1,106 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from .config import settings
+from .utils.process_pool import spawn_process_pool
+
+EXECUTOR_MODES = ("thread", "process")
+
+
+def _init_process_worker():
+    """
+    Loads the generator once per worker process. Workers follow weight changes through their own
+    file watcher; an explicit reload restarts the pool (InferenceExecutor.reload).
+    """
+    from .gan_simulator import gan_simulator
+    from .inference_autotune import inference_autotuner
+    gan_simulator.ensure_loaded()
+    gan_simulator.start_weights_watcher()
+    # Calibrated thread count (never calibrates here: that is the parent's job)
+    inference_autotuner.run_at_startup(gan_simulator, mode="load")
+
+
+def _render_images_in_worker(seeds: List[int], model: Optional[str] = None, fmt: str = "png") -> Tuple[List[bytes], str]:
+    from .gan_simulator import gan_simulator
+    return gan_simulator.generate_tagged_images(seeds, model, fmt)
+
+
+class InferenceExecutor:
+    """
+    Dedicated, bounded worker pool for generator inference and PNG encoding.
+    Keeps torch forward passes and image encoding off the asyncio event loop.
+
+    mode="thread"  - shares the in-process simulator, no serialization cost.
+    mode="process" - each worker owns its own simulator, sidesteps the GIL for encoding.
+    """
+    def __init__(self, simulator=None, mode: str = None, max_workers: int = None):
+        self.mode = (mode or settings.INFERENCE_EXECUTOR).lower()
+        if self.mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown inference executor mode '{self.mode}', expected one of {EXECUTOR_MODES}")
+        self.max_workers = max(1, max_workers or settings.INFERENCE_WORKERS)
+        self._simulator = simulator
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def simulator(self):
+        if self._simulator is None:
+            from .gan_simulator import gan_simulator
+            self._simulator = gan_simulator
+        return self._simulator
+
+    def _get_pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.mode == "process":
+                    self._pool = spawn_process_pool(self.max_workers, _init_process_worker)
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="gan-inference",
+                    )
+            return self._pool
+
+    async def render_images(
+        self, seeds: List[int], model: Optional[str] = None, fmt: str = "png"
+    ) -> Tuple[List[bytes], str]:
+        """
+        Render one image per seed, encoded as `fmt`, with generator `model` (the primary one
+        by default) in a single batched forward pass on the worker pool.
+        Returns the images and the model_tag of the generator that rendered them.
+        """
+        loop = asyncio.get_running_loop()
+        if self.mode == "process":
+            return await loop.run_in_executor(self._get_pool(), _render_images_in_worker, seeds, model, fmt)
+        return await loop.run_in_executor(self._get_pool(), self.simulator.generate_tagged_images, seeds, model, fmt)
+
+    def reload(self):
+        """
+        Make the workers pick up freshly reloaded weights. Process workers each hold their own
+        generator, so the pool is replaced: renders already submitted finish on the old workers,
+        new ones start workers that load the current weights. Thread workers share the simulator.
+        """
+        if self.mode != "process":
+            return
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait, cancel_futures=True)
+                self._pool = None
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "started": self._pool is not None,
+        }
+
+# Global Instance
+inference_executor = InferenceExecutor()
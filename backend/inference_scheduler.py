@@ -0,0 +1,136 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .config import settings
+from .inference_executor import InferenceExecutor, inference_executor
+
+
+class InferenceScheduler:
+    """
+    Dynamic micro-batching in front of MedicalGenerator.
+    Concurrent image requests are queued and flushed as one batched forward pass
+    as soon as `max_batch_size` requests are waiting or `max_wait_ms` has elapsed.
+    Each caller still receives its own image. Requests for different generators (model names)
+    or output formats are never mixed in one batch.
+    Batches run on the InferenceExecutor pool, up to one batch per pool worker at a time.
+    """
+    def __init__(self, executor: InferenceExecutor = None, max_batch_size: int = None, max_wait_ms: float = None):
+        self.executor = executor or inference_executor
+        self.max_batch_size = max(1, max_batch_size or settings.INFERENCE_MAX_BATCH_SIZE)
+        wait_ms = settings.INFERENCE_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms
+        self.max_wait = max(0.0, wait_ms) / 1000.0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._inflight = set()
+
+        self.total_requests = 0
+        self.total_batches = 0
+        self.total_images = 0
+        self.largest_batch = 0
+        self.last_submit_at = 0.0
+
+    def _ensure_worker(self):
+        """Starts the batching task on the running loop (re-created if the loop changed)."""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.executor.max_workers)
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, seed: int, model: Optional[str] = None, fmt: str = "png") -> Tuple[bytes, str]:
+        """
+        Queue a single image request for `seed` on generator `model` and wait for its image bytes
+        and the model_tag of the generator that rendered it.
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self.total_requests += 1
+        self.last_submit_at = time.monotonic()
+        await self._queue.put(((model, fmt), seed, future))
+        return await future
+
+    async def _collect_batch(self) -> List[Tuple[Tuple[Optional[str], str], int, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # Drain whatever is already waiting before sleeping on the deadline
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        # Callers that disconnected while queued don't need a slot in the batch
+        return [(target, seed, future) for target, seed, future in batch if not future.done()]
+
+    async def _run(self):
+        while True:
+            batch = await self._collect_batch()
+            if not batch:
+                continue
+            # Back-pressure: never queue more batches than the pool has workers
+            await self._slots.acquire()
+            task = self._loop.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Tuple[Optional[str], str], int, asyncio.Future]]):
+        try:
+            by_target: Dict[Tuple[Optional[str], str], List[Tuple[int, asyncio.Future]]] = {}
+            for target, seed, future in batch:
+                by_target.setdefault(target, []).append((seed, future))
+            for (model, fmt), requests in by_target.items():
+                await self._render(model, fmt, requests)
+        finally:
+            self._slots.release()
+
+    async def _render(self, model: Optional[str], fmt: str, requests: List[Tuple[int, asyncio.Future]]):
+        # Identical seeds in the same batch (e.g. a reloaded gallery) are rendered once
+        seeds = list(dict.fromkeys(seed for seed, _ in requests))
+        try:
+            images, model_tag = await self.executor.render_images(seeds, model, fmt)
+        except Exception as e:
+            for _, future in requests:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.total_batches += 1
+        self.total_images += len(seeds)
+        self.largest_batch = max(self.largest_batch, len(seeds))
+        rendered = dict(zip(seeds, images))
+        for seed, future in requests:
+            if not future.done():
+                future.set_result((rendered[seed], model_tag))
+
+    def is_idle(self, quiet_seconds: float = 0.0) -> bool:
+        """No queued or running batches, and no request submitted within `quiet_seconds`."""
+        if self._inflight or (self._queue is not None and not self._queue.empty()):
+            return False
+        return time.monotonic() - self.last_submit_at >= quiet_seconds
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "total_requests": self.total_requests,
+            "total_batches": self.total_batches,
+            "total_images": self.total_images,
+            "largest_batch": self.largest_batch,
+            "avg_batch_size": round(self.total_images / self.total_batches, 2) if self.total_batches else 0.0,
+            "executor": self.executor.stats(),
+        }
+
+# Global Instance
+inference_scheduler = InferenceScheduler()
@@ -0,0 +1,133 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import BrokenExecutor, Executor, ThreadPoolExecutor
+from typing import Deque, Optional, Tuple
+
+import numpy as np
+
+from .config import settings
+from .utils.medical_validator import MedicalValidator
+from .utils.process_pool import spawn_process_pool
+
+EXECUTOR_MODES = ("thread", "process")
+# Per-file latencies kept for the percentiles in stats()
+LATENCY_WINDOW = 10000
+
+
+def _init_process_worker():
+    """Import pydicom up front so per-file latencies don't include the first (lazy) import."""
+    import pydicom  # noqa: F401
+
+
+def _inspect_file(file_path: str) -> Tuple[bool, str, Optional[str], float]:
+    """Worker task: validate one DICOM file and read its modality, timed inside the worker."""
+    start = time.perf_counter()
+    is_valid, message, modality = MedicalValidator.inspect_dicom(file_path)
+    return is_valid, message, modality, time.perf_counter() - start
+
+
+class IngestPool:
+    """
+    Bounded worker pool for upload validation (DICOM header parse), off the asyncio event loop.
+    Back-pressure: at most `max_pending` files are queued or in flight across all uploads;
+    `inspect` waits for a free slot before submitting, so a 10k-file study is consumed at the
+    pool's pace instead of piling up work (and open files) ahead of it.
+
+    mode="process" - spawned worker processes, validation scales across cores.
+    mode="thread"  - in-process threads, no start-up cost (pydicom holds the GIL while parsing).
+    """
+    def __init__(self, mode: str = None, max_workers: int = None, max_pending: int = None):
+        self.mode = (mode or settings.INGEST_EXECUTOR).lower()
+        if self.mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown ingest executor mode '{self.mode}', expected one of {EXECUTOR_MODES}")
+        self.max_workers = max(1, max_workers or settings.INGEST_WORKERS or os.cpu_count() or 1)
+        self.max_pending = max(self.max_workers, max_pending or settings.INGEST_MAX_PENDING)
+        self._pool: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop = None
+        self._lock = threading.Lock()
+
+        self.in_flight = 0
+        self.inspected = 0
+        self.invalid = 0
+        self.waited_seconds = 0.0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def _get_pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.mode == "process":
+                    self._pool = spawn_process_pool(self.max_workers, _init_process_worker)
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="ingest",
+                    )
+            return self._pool
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots, self._slots_loop = asyncio.Semaphore(self.max_pending), loop
+        return self._slots
+
+    def _discard_pool(self, pool: Executor):
+        """Drop a broken pool (a worker died), so the next file starts a fresh one."""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def inspect(self, file_path: str) -> Tuple[bool, str, Optional[str], float]:
+        """(is_valid, message, modality, seconds spent validating) for one DICOM file."""
+        slots = self._get_slots()
+        start = time.perf_counter()
+        async with slots:
+            self.waited_seconds += time.perf_counter() - start
+            self.in_flight += 1
+            pool = self._get_pool()
+            try:
+                result = await asyncio.wrap_future(pool.submit(_inspect_file, file_path))
+            except BrokenExecutor:
+                self._discard_pool(pool)
+                raise
+            finally:
+                self.in_flight -= 1
+        is_valid, _, _, seconds = result
+        with self._lock:
+            self.inspected += 1
+            self.invalid += not is_valid
+            self._latencies.append(seconds)
+        return result
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait, cancel_futures=True)
+                self._pool = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = np.asarray(self._latencies) * 1000
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (None, None, None)
+        return {
+            "mode": self.mode,
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "inspected": self.inspected,
+            "invalid": self.invalid,
+            "backpressure_wait_seconds": round(self.waited_seconds, 3),
+            "latency_ms": {
+                "mean": round(float(latencies.mean()), 3) if len(latencies) else None,
+                "p50": None if p50 is None else round(float(p50), 3),
+                "p95": None if p95 is None else round(float(p95), 3),
+                "p99": None if p99 is None else round(float(p99), 3),
+            },
+        }
+
+# Global Instance
+ingest_pool = IngestPool()
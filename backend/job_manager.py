@@ -0,0 +1,281 @@
+import os
+import shutil
+import threading
+import uuid
+import weakref
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .analytics_engine import analytics_engine
+from .config import settings
+from .models import GenerationJob, GenerationJobSpec, JobStatus, PatientData
+from .sample_batch import SampleBatch
+from .utils.process_pool import spawn_process_pool
+
+JOBS_DIR = os.path.join(settings.GENERATED_DIR, "jobs")
+
+
+def _part_path(job_dir: str, index: int) -> str:
+    return os.path.join(job_dir, f"part-{index:05d}.ndjson")
+
+
+def _generate_job_chunk(job_dir: str, index: int, count: int, patient_data: PatientData, render_images: bool,
+                        seed: Optional[int] = None) -> SampleBatch:
+    """
+    Worker-process task: generate one chunk of a job and write it as an NDJSON part file.
+    Optionally pre-renders the chunk's real GAN images into the on-disk image cache.
+    Seeded jobs derive an independent generator per chunk from (seed, chunk index).
+    """
+    from .gan_simulator import gan_simulator
+    from .image_cache import image_cache, image_cache_key
+    from .sample_batch import format_image_id
+
+    gan_simulator.ensure_loaded()
+    rng = np.random.default_rng([seed, index]) if seed is not None else None
+    batch = gan_simulator.generate_batch(count, patient_data, rng)
+
+    tmp_path = f"{_part_path(job_dir, index)}.tmp"
+    with open(tmp_path, "w") as out_file:
+        out_file.write(batch.to_ndjson())
+    os.replace(tmp_path, _part_path(job_dir, index))
+
+    if render_images and batch.real_images and image_cache.use_disk:
+        seeds = batch.image_ids.tolist()
+        step = settings.INFERENCE_MAX_BATCH_SIZE
+        for start in range(0, len(seeds), step):
+            chunk_seeds = seeds[start:start + step]
+            images, model_tag = gan_simulator.generate_tagged_images(chunk_seeds, batch.image_model)
+            for seed, image in zip(chunk_seeds, images):
+                image_cache.put_disk(image_cache_key(model_tag, format_image_id(seed)), image)
+
+    return batch
+
+
+class JobManager:
+    """
+    Runs bulk generation jobs on a pool of worker processes, off the request workers.
+    A job is split into chunks of `chunk_size` samples; at most `max_workers` chunks
+    of a job are in flight at once so concurrent jobs share the pool.
+    Results are NDJSON part files under `generated/jobs/{job_id}`. Finished jobs are kept for
+    `retention_seconds` and at most `max_per_user` of them per user, then pruned with their results.
+    """
+    def __init__(self, max_workers: int = None, chunk_size: int = None, jobs_dir: str = JOBS_DIR,
+                 retention_seconds: int = None, max_per_user: int = None):
+        self.max_workers = max(1, max_workers or settings.JOB_WORKERS)
+        self.chunk_size = max(1, chunk_size or settings.JOB_CHUNK_SIZE)
+        self.jobs_dir = jobs_dir
+        self.retention_seconds = settings.JOB_RETENTION_SECONDS if retention_seconds is None else retention_seconds
+        self.max_per_user = settings.JOB_MAX_PER_USER if max_per_user is None else max_per_user
+        self.jobs: Dict[str, GenerationJob] = {}
+        self._next_chunk: Dict[str, int] = {}
+        self._inflight: Dict[str, List[Future]] = {}
+        # Result streams still open (weakly held: dropped once the response lets go of them) -> job id
+        self._downloads: "weakref.WeakKeyDictionary[Iterator[bytes], str]" = weakref.WeakKeyDictionary()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.RLock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = spawn_process_pool(self.max_workers)
+        return self._pool
+
+    def reload(self):
+        """
+        Replace the worker pool so new chunks run on workers that load the current weights
+        (workers load the generator once and don't watch for changes). Chunks already submitted
+        finish on the old workers.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, job_id)
+
+    def _chunk_count(self, job: GenerationJob) -> int:
+        return -(-job.spec.count // self.chunk_size)
+
+    def submit(self, spec: GenerationJobSpec, user_id: str) -> GenerationJob:
+        """
+        Register a job and start its first chunks. Returns immediately.
+        """
+        job = GenerationJob(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            status=JobStatus.QUEUED,
+            spec=spec,
+            created_at=datetime.now(),
+        )
+        os.makedirs(self._job_dir(job.id), exist_ok=True)
+
+        with self._lock:
+            self.prune()
+            self.jobs[job.id] = job
+            self._next_chunk[job.id] = 0
+            self._inflight[job.id] = []
+            for _ in range(min(self.max_workers, self._chunk_count(job))):
+                self._submit_next_chunk(job)
+        return job
+
+    def _submit_next_chunk(self, job: GenerationJob):
+        index = self._next_chunk[job.id]
+        start = index * self.chunk_size
+        count = min(self.chunk_size, job.spec.count - start)
+        if count <= 0:
+            return
+
+        self._next_chunk[job.id] = index + 1
+        if job.status == JobStatus.QUEUED:
+            job.status = JobStatus.RUNNING
+            job.started_at = datetime.now()
+
+        future = self._get_pool().submit(
+            _generate_job_chunk, self._job_dir(job.id), index, count,
+            job.spec.patient_data, job.spec.render_images, job.spec.seed,
+        )
+        self._inflight[job.id].append(future)
+        future.add_done_callback(lambda done, job_id=job.id: self._on_chunk_done(job_id, done))
+
+    def _on_chunk_done(self, job_id: str, future: Future):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            self._inflight[job_id].remove(future)
+
+            if job is None:
+                # Deleted while its last chunks were still running
+                if not self._inflight[job_id]:
+                    del self._inflight[job_id]
+                    shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+                return
+            if job.status == JobStatus.CANCELLED:
+                if not self._inflight[job_id]:
+                    shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+                return
+            if job.status == JobStatus.FAILED:
+                return
+            if future.cancelled():
+                # Pool shut down underneath a running job
+                job.status = JobStatus.CANCELLED
+                job.finished_at = datetime.now()
+                return
+
+            error = future.exception()
+            if error is not None:
+                job.status = JobStatus.FAILED
+                job.error = str(error)
+                job.finished_at = datetime.now()
+                for pending in list(self._inflight[job_id]):
+                    pending.cancel()
+                print(f"Error in generation job {job_id}: {error}")
+                return
+
+            batch = future.result()
+            analytics_engine.update_from_batch(batch)
+            job.completed_count += len(batch)
+            job.progress = round(job.completed_count / job.spec.count, 4)
+
+            if job.completed_count >= job.spec.count:
+                job.status = JobStatus.COMPLETED
+                job.finished_at = datetime.now()
+            else:
+                self._submit_next_chunk(job)
+
+    def cancel(self, job_id: str) -> Optional[GenerationJob]:
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status not in (JobStatus.QUEUED, JobStatus.RUNNING):
+                return job
+            job.status = JobStatus.CANCELLED
+            job.finished_at = datetime.now()
+            for future in list(self._inflight[job_id]):
+                future.cancel()
+            if not self._inflight[job_id]:
+                shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+            return job
+
+    def delete(self, job_id: str) -> Optional[GenerationJob]:
+        """
+        Forget a finished job and delete its result files. Active jobs (cancel them first) and jobs
+        whose result is being downloaded are left alone: check `get(job_id)` to see if it is gone.
+        """
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status in (JobStatus.QUEUED, JobStatus.RUNNING) or self.is_downloading(job_id):
+                return job
+            del self.jobs[job_id]
+            del self._next_chunk[job_id]
+            if not self._inflight[job_id]:
+                # Otherwise the last chunk to finish removes the directory
+                del self._inflight[job_id]
+                shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+            return job
+
+    def prune(self) -> int:
+        """
+        Delete finished jobs past the retention time or beyond the per-user limit (oldest first).
+        Jobs whose result is being downloaded are kept until the next prune. Returns the number of jobs removed.
+        """
+        with self._lock:
+            finished = sorted(
+                (job for job in self.jobs.values() if job.status not in (JobStatus.QUEUED, JobStatus.RUNNING)),
+                key=lambda job: job.created_at, reverse=True,
+            )
+            now = datetime.now()
+            kept: Dict[str, int] = {}
+            expired = []
+            for job in finished:
+                kept[job.user_id] = kept.get(job.user_id, 0) + 1
+                if self.max_per_user and kept[job.user_id] > self.max_per_user:
+                    expired.append(job.id)
+                elif self.retention_seconds and (now - job.finished_at).total_seconds() > self.retention_seconds:
+                    expired.append(job.id)
+            removed = 0
+            for job_id in expired:
+                self.delete(job_id)
+                removed += job_id not in self.jobs
+            return removed
+
+    def get(self, job_id: str) -> Optional[GenerationJob]:
+        return self.jobs.get(job_id)
+
+    def list_jobs(self, user_id: str = None) -> List[GenerationJob]:
+        self.prune()
+        jobs = [job for job in self.jobs.values() if user_id is None or job.user_id == user_id]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def is_downloading(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._downloads.values()
+
+    def iter_result(self, job_id: str, read_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """
+        Stream a completed job's NDJSON result, part by part, without loading it into memory.
+        Raises KeyError unless the job exists and is completed. The job is not pruned or deleted
+        while the returned stream is alive.
+        """
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status != JobStatus.COMPLETED:
+                raise KeyError(job_id)
+            stream = self._read_parts(self._job_dir(job_id), self._chunk_count(job), read_size)
+            self._downloads[stream] = job_id
+        return stream
+
+    @staticmethod
+    def _read_parts(job_dir: str, chunks: int, read_size: int) -> Iterator[bytes]:
+        for index in range(chunks):
+            with open(_part_path(job_dir, index), "rb") as part:
+                while data := part.read(read_size):
+                    yield data
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+# Global Instance
+job_manager = JobManager()
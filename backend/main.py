@@ -1,16 +1,19 @@
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 import random
 import time
-from typing import List
+from typing import List, Optional
 import uuid
 
-from fastapi import FastAPI, Depends, HTTPException, status, Request, UploadFile, BackgroundTasks, Response, File
+import numpy as np
+
+from fastapi import FastAPI, Depends, HTTPException, status, Request, UploadFile, BackgroundTasks, Response, File, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -26,7 +29,11 @@ from .models import (
     UserRole,
     AuditLog,
     PrivacyImpactAssessment,
-    UploadResponse
+    UploadResponse,
+    Dataset,
+    GenerationJob,
+    GenerationJobSpec,
+    JobStatus,
 )
 from .auth import (
     authenticate_user,
@@ -36,9 +43,55 @@ from .auth import (
     RoleChecker
 )
 from .audit_logger import audit_logger
-from .gan_simulator import gan_simulator
+from .gan_simulator import gan_simulator, split_image_id, format_image_id
+from .image_cache import image_cache, image_cache_key
+from .inference_executor import inference_executor
+from .inference_scheduler import inference_scheduler
+from .inference_autotune import inference_autotuner
+from .prerender_pool import prerender_pool
+from .quality_scorer import quality_scorer
+from .sample_batch import SEED_BITS
+from .tensor_export import IMAGE_SHAPE, TENSOR_FORMATS, TensorExporter
+from .training_broadcaster import training_broadcaster
+from .training_engine import training_engine
 from .analytics_engine import analytics_engine
+from .cohort_export import CohortExporter, EXPORT_FORMATS, MAX_ROW_GROUP_SIZE
 from .upload_manager import upload_manager
+from .ingest_pool import ingest_pool
+from .job_manager import job_manager
+from .utils import fast_json
+from .utils.compression import SelectiveGZipMiddleware
+from .utils.image_encoder import IMAGE_FORMATS, image_encoder, negotiate_format
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+COLUMNAR_MEDIA_TYPE = "application/vnd.medsynth.columnar+json"
+
+# --- Lifespan ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load generator weights off the startup path; readiness is reported by /health
+    gan_simulator.start_background_load()
+    # Hash the mock users' passwords (bcrypt) before the first authenticated request needs them
+    fake_users_db.initialize_in_background()
+    # Apply (or run) the thread / batch-size calibration for this host once the generator is up
+    inference_autotuner.start(gan_simulator)
+    # Pick up replaced weights files without a restart
+    gan_simulator.start_weights_watcher()
+    # Worker processes hold their own generator: recycle them whenever the weights are hot reloaded
+    reload_listeners = [inference_executor.reload, job_manager.reload]
+    gan_simulator.reload_listeners.extend(reload_listeners)
+    # Optional: pre-render images while idle so bursts are served from memory
+    prerender_pool.start()
+    yield
+    for listener in reload_listeners:
+        gan_simulator.reload_listeners.remove(listener)
+    prerender_pool.stop()
+    training_broadcaster.stop()
+    gan_simulator.stop_weights_watcher()
+    # Release inference, job and ingest workers (threads or processes) on shutdown
+    inference_executor.shutdown(wait=False)
+    job_manager.shutdown(wait=False)
+    ingest_pool.shutdown(wait=False)
 
 # --- Rate Limiting Setup ---
 limiter = Limiter(key_func=get_remote_address)
@@ -46,12 +99,18 @@ app = FastAPI(
     title=settings.PROJECT_NAME,
     version="0.1.0",
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 app.add_middleware(SlowAPIMiddleware)
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+# Float tensors barely compress: the tensor download skips gzip
+app.add_middleware(
+    SelectiveGZipMiddleware,
+    minimum_size=1000,
+    exclude_paths=[f"{settings.API_V1_STR}/generate/tensors"],
+)
 
 # --- CORS Setup ---
 app.add_middleware(
@@ -73,7 +132,8 @@ app.mount("/api/uploads", StaticFiles(directory="uploads"), name="uploads")
 async def login_for_access_token(
     request: Request, form_data: OAuth2PasswordRequestForm = Depends()
 ):
-    user = authenticate_user(fake_users_db, form_data.username, form_data.password)
+    # bcrypt verification (and, right after startup, hashing the mock users) is slow: off the event loop
+    user = await run_in_threadpool(authenticate_user, fake_users_db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -106,6 +166,7 @@ async def health_check():
     return {
         "status": status,
         "environment": settings.ENVIRONMENT,
+        "model_state": gan_simulator.state.value,
         "disk_free_gb": round(free / (2**30), 2),
         "writeable_dirs": {
             "uploads": upload_status,
@@ -113,18 +174,55 @@ async def health_check():
         }
     }
 
+async def _run_inline(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
 @app.post(f"{settings.API_V1_STR}/generate", response_model=List[SyntheticSample], tags=["Core"])
 @limiter.limit("10/minute")
 async def generate_data(
     request: Request,
+    response: Response,
     patient_data: PatientData,
-    count: int = 1,
+    count: int = Query(default=1, ge=0),
+    stream: bool = False,
+    seed: Optional[int] = Query(default=None, ge=0),
+    format: str = Query(default="samples", pattern="^(samples|columnar)$"),
     current_user: User = Depends(get_current_active_user),
 ):
     """
     Generate synthetic samples using the GAN Simulator.
+    With `format=columnar` (or `Accept: application/vnd.medsynth.columnar+json`) the response is a
+    compact struct-of-arrays document encoded straight from the columnar batch, skipping Pydantic
+    models and response_model re-validation. The default list-of-samples schema is unchanged.
+    With `stream=true` (or `Accept: application/x-ndjson`) samples are generated in chunks
+    and streamed as newline-delimited JSON while they are produced.
+    A `seed` makes the result reproducible; repeated identical seeded requests are served from memory.
+    X-Model-State reports the generator state: image URLs are placeholders unless it is "ready",
+    so clients can tell samples generated while the model is still loading from later ones.
     """
-    samples = gan_simulator.generate_samples(count, patient_data)
+    headers = {"X-Model-State": gan_simulator.state.value}
+    if stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return StreamingResponse(
+            stream_samples(patient_data, count, current_user.username, request.client.host, seed),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers=headers,
+        )
+
+    # The quality stage renders every image: keep those forward passes off the event loop
+    run = run_in_threadpool if settings.QUALITY_SCORING else _run_inline
+
+    if format == "columnar" or COLUMNAR_MEDIA_TYPE in request.headers.get("accept", ""):
+        batch = await run(gan_simulator.generate_columnar, count, patient_data, seed=seed)
+        analytics_engine.update_from_batch(batch)
+        audit_logger.log_event(
+            user_id=current_user.username,
+            operation="GENERATE",
+            details=f"Generated {count} samples (columnar) for condition: {patient_data.condition}",
+            ip_address=request.client.host
+        )
+        return Response(content=fast_json.dumps(batch.to_columnar()), media_type=COLUMNAR_MEDIA_TYPE, headers=headers)
+
+    samples = await run(gan_simulator.generate_samples, count, patient_data, seed=seed)
     # Update analytics engine with new samples
     analytics_engine.update_metrics(samples)
     
@@ -135,31 +233,402 @@ async def generate_data(
         details=f"Generated {count} samples for condition: {patient_data.condition}",
         ip_address=request.client.host
     )
+    response.headers.update(headers)
     return samples
 
+def stream_samples(patient_data: PatientData, count: int, user_id: str, ip_address: str, seed: Optional[int] = None):
+    """
+    Generate `count` samples chunk by chunk, yielding one JSON document per line.
+    Analytics are updated per chunk; the audit trail records the start and how many samples were delivered.
+    Runs in the threadpool (sync generator), so generation never blocks the event loop.
+    """
+    audit_logger.log_event(
+        user_id=user_id,
+        operation="GENERATE_STREAM",
+        details=f"Started streaming {count} samples for condition: {patient_data.condition}",
+        ip_address=ip_address
+    )
+    # One generator for the whole stream, so a seeded stream is reproducible chunk after chunk
+    rng = np.random.default_rng(seed) if seed is not None else None
+    delivered = 0
+    try:
+        while delivered < count:
+            batch = gan_simulator.generate_batch(min(settings.GENERATE_STREAM_CHUNK_SIZE, count - delivered), patient_data, rng)
+            analytics_engine.update_from_batch(batch)
+            yield batch.to_ndjson()
+            delivered += len(batch)
+    finally:
+        audit_logger.log_event(
+            user_id=user_id,
+            operation="GENERATE_STREAM",
+            details=f"Streamed {delivered}/{count} samples for condition: {patient_data.condition}",
+            ip_address=ip_address
+        )
+
+@app.post(f"{settings.API_V1_STR}/export/cohort", tags=["Core"])
+@limiter.limit("10/minute")
+async def export_cohort(
+    request: Request,
+    patient_data: PatientData,
+    count: int = 1000,
+    format: str = "parquet",
+    row_group_size: int = Query(default=50_000, ge=1, le=MAX_ROW_GROUP_SIZE),
+    seed: Optional[int] = Query(default=None, ge=0),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Export a synthetic cohort as a columnar file (Parquet via Arrow, CSV fallback).
+    A `seed` makes the exported cohort reproducible.
+    Rows are generated and streamed one row group at a time, so multi-million-row
+    cohorts never sit fully in memory. Output reads directly into pandas/polars.
+    """
+    if count < 1:
+        raise HTTPException(status_code=400, detail="count must be positive")
+    try:
+        export_format = CohortExporter.resolve_format(format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    audit_logger.log_event(
+        user_id=current_user.username,
+        operation="EXPORT",
+        details=f"Exported {count} synthetic samples as {export_format} for condition: {patient_data.condition}",
+        ip_address=request.client.host
+    )
+    media_type, extension = EXPORT_FORMATS[export_format]
+    filename = f"cohort_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    return StreamingResponse(
+        CohortExporter.stream(export_format, count, row_group_size, patient_data, seed),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@app.get(f"{settings.API_V1_STR}/generate/tensors", tags=["Core"])
+@limiter.limit("10/minute")
+async def export_image_tensors(
+    request: Request,
+    count: int = Query(default=64, ge=1, le=100_000),
+    format: str = "npy",
+    dtype: str = "float32",
+    seed: Optional[int] = Query(default=None, ge=0),
+    model: Optional[str] = Query(default=None, description="Generator model name, e.g. xray-v1 (primary generator by default)"),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Download `count` generator outputs as one `.npy` or safetensors blob of shape (count, 3, 64, 64),
+    as raw float32 in [-1, 1] or uint8 pixels. Images are rendered batch by batch and streamed
+    straight from the output buffer, skipping per-image PNG encode / decode.
+    The response's X-Seed reproduces the same tensors.
+    """
+    try:
+        export_format, dtype = TensorExporter.resolve(format, dtype)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if gan_simulator.is_loading:
+        raise HTTPException(status_code=503, detail="Generator is still loading", headers={"Retry-After": "5"})
+    try:
+        await run_in_threadpool(gan_simulator.resolve_model, model)
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=404, detail="Real GAN not active")
+
+    seed = random.getrandbits(SEED_BITS) if seed is None else seed
+    audit_logger.log_event(
+        user_id=current_user.username,
+        operation="EXPORT",
+        details=f"Exported {count} generator outputs as {dtype} {export_format} (model: {model or gan_simulator.default_model})",
+        ip_address=request.client.host
+    )
+    media_type, extension = TENSOR_FORMATS[export_format]
+    return StreamingResponse(
+        TensorExporter.stream(export_format, count, dtype, seed, model),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="synthetic_images_{seed}.{extension}"',
+            "Content-Length": str(TensorExporter.content_length(export_format, count, dtype, seed, model)),
+            "X-Seed": str(seed),
+            "X-Tensor-Shape": ",".join(map(str, (count, *IMAGE_SHAPE))),
+            "X-Tensor-Dtype": dtype,
+        },
+    )
+
+# --- Generation Job Routes ---
+
+def get_owned_job(job_id: str, user: User) -> GenerationJob:
+    job = job_manager.get(job_id)
+    if job is None or (job.user_id != user.username and user.role != UserRole.ADMIN):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post(f"{settings.API_V1_STR}/jobs", response_model=GenerationJob, status_code=status.HTTP_202_ACCEPTED, tags=["Jobs"])
+@limiter.limit("10/minute")
+async def submit_generation_job(
+    request: Request,
+    spec: GenerationJobSpec,
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Submit a bulk generation job. Returns the job id immediately; samples are
+    generated on the job worker pool without tying up request workers.
+    """
+    job = job_manager.submit(spec, current_user.username)
+    audit_logger.log_event(
+        user_id=current_user.username,
+        operation="GENERATE_JOB",
+        details=f"Submitted job for {spec.count} samples for condition: {spec.patient_data.condition}",
+        resource_id=job.id,
+        ip_address=request.client.host
+    )
+    return job
+
+@app.get(f"{settings.API_V1_STR}/jobs", response_model=List[GenerationJob], tags=["Jobs"])
+async def list_generation_jobs(current_user: User = Depends(get_current_active_user)):
+    """
+    List the caller's generation jobs (all jobs for admins), newest first.
+    """
+    return job_manager.list_jobs(None if current_user.role == UserRole.ADMIN else current_user.username)
+
+@app.get(f"{settings.API_V1_STR}/jobs/{{job_id}}", response_model=GenerationJob, tags=["Jobs"])
+async def get_generation_job(job_id: str, current_user: User = Depends(get_current_active_user)):
+    """
+    Job status and progress.
+    """
+    return get_owned_job(job_id, current_user)
+
+@app.get(f"{settings.API_V1_STR}/jobs/{{job_id}}/result", tags=["Jobs"])
+async def download_generation_job(job_id: str, current_user: User = Depends(get_current_active_user)):
+    """
+    Download a completed job's samples as NDJSON.
+    """
+    job = get_owned_job(job_id, current_user)
+    if job.status != JobStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status.value}, result not available")
+    try:
+        # Holds the job (and its part files) until the download is done
+        result = job_manager.iter_result(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        result,
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="job_{job_id}.ndjson"'},
+    )
+
+@app.delete(f"{settings.API_V1_STR}/jobs/{{job_id}}", response_model=GenerationJob, tags=["Jobs"])
+async def cancel_generation_job(job_id: str, current_user: User = Depends(get_current_active_user)):
+    """
+    Cancel a queued or running job. Chunks already in progress finish and are discarded.
+    """
+    get_owned_job(job_id, current_user)
+    job = job_manager.cancel(job_id)
+    audit_logger.log_event(
+        user_id=current_user.username,
+        operation="GENERATE_JOB_CANCEL",
+        details=f"Cancelled generation job ({job.status.value})",
+        resource_id=job_id
+    )
+    return job
+
+@app.delete(f"{settings.API_V1_STR}/jobs/{{job_id}}/result", response_model=GenerationJob, tags=["Jobs"])
+async def delete_generation_job_result(job_id: str, current_user: User = Depends(get_current_active_user)):
+    """
+    Delete a finished job together with its result files. Active jobs must be cancelled first.
+    Finished jobs are also pruned automatically after JOB_RETENTION_SECONDS.
+    """
+    get_owned_job(job_id, current_user)
+    job = job_manager.delete(job_id)
+    if job is None:
+        # Pruned in the meantime
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status in (JobStatus.QUEUED, JobStatus.RUNNING):
+        raise HTTPException(status_code=409, detail=f"Job is {job.status.value}, cancel it first")
+    if job_manager.get(job_id) is not None:
+        raise HTTPException(status_code=409, detail="Job result is being downloaded, try again later")
+    audit_logger.log_event(
+        user_id=current_user.username,
+        operation="GENERATE_JOB_DELETE",
+        details=f"Deleted generation job result ({job.status.value})",
+        resource_id=job_id
+    )
+    return job
+
 @app.get(f"{settings.API_V1_STR}/train", tags=["Core"])
-async def train_model(current_user: User = Depends(get_current_active_user)):
+async def train_model(request: Request, current_user: User = Depends(get_current_active_user)):
     """
-    Stream training progress metrics.
+    Stream training progress metrics (SSE).
+    All clients share one training run, started by the first of them: a new client gets a replay
+    of the run's recent epochs, a reconnecting one resumes after its Last-Event-ID.
+    The stream ends with a `complete` (or `error`) event; disconnecting never stops the run.
     """
-    def event_generator():
-        for metrics in gan_simulator.train():
-            yield f"data: {metrics.model_dump_json()}\n\n"
-    
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    last_event_id = request.headers.get("last-event-id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Last-Event-ID must be an integer")
+    training_broadcaster.ensure_running()
+
+    async def event_generator():
+        async for event in training_broadcaster.subscribe(last_event_id):
+            yield event.to_sse()
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get(f"{settings.API_V1_STR}/train/status", tags=["Core"])
+async def training_status(current_user: User = Depends(get_current_active_user)):
+    """
+    The shared training run: whether it is running, its subscribers and replay history.
+    """
+    return training_broadcaster.stats()
+
+@app.get(f"{settings.API_V1_STR}/train/summary", tags=["Core"])
+async def training_summary(current_user: User = Depends(get_current_active_user)):
+    """
+    Throughput profile of the latest real training run: samples/sec, data-loader wait vs compute
+    (and whether the run is data- or compute-bound), peak RSS, step-time percentiles and per-epoch figures.
+    `profile` is null until a run with TRAINING_ENGINE=real has completed an epoch.
+    """
+    return {
+        "engine": settings.TRAINING_ENGINE,
+        "run": training_broadcaster.stats(),
+        "profile": training_engine.profiler.summary(),
+    }
 
 @app.get("/api/synthetic/generate/{image_id}.png", tags=["Core"])
-async def get_synthetic_image(image_id: str):
+async def get_synthetic_image(
+    image_id: str,
+    request: Request,
+    format: Optional[str] = Query(None, description="png, webp or jpeg; overrides the Accept header"),
+):
     """
-    Serve a real GAN-generated image on the fly.
+    Serve a real GAN-generated image. The image id encodes the generator (modality-version)
+    and the latent seed, so a URL always maps to the same image and is served immutably from
+    the image cache after the first render. Legacy ids without a model name use the primary
+    generator. The output format (PNG, WebP, JPEG) comes from `format` or the Accept header.
+    Cache misses are micro-batched into a single forward pass that runs, together with
+    encoding, on the inference worker pool instead of the event loop.
     """
     try:
-        image_bytes = gan_simulator.generate_real_image()
-        return StreamingResponse(image_bytes, media_type="image/png")
+        model, seed = split_image_id(image_id)
     except ValueError:
+        raise HTTPException(status_code=404, detail="Unknown synthetic image id")
+    try:
+        image_format = negotiate_format(format, request.headers.get("accept"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    media_type = IMAGE_FORMATS[image_format]
+    if gan_simulator.is_loading:
+        raise HTTPException(status_code=503, detail="Generator is still loading", headers={"Retry-After": "5"})
+    try:
+        if model is None or gan_simulator.registry.is_resident(model):
+            _, model_tag = gan_simulator.resolve_model(model)
+        else:
+            # Loading an evicted / not yet used generator takes seconds: keep it off the event loop
+            _, model_tag = await run_in_threadpool(gan_simulator.resolve_model, model)
+    except (KeyError, ValueError):
         # Fallback if model not loaded (shouldn't happen if URL was generated)
         raise HTTPException(status_code=404, detail="Real GAN not active")
 
+    cache_key = image_cache_key(model_tag, format_image_id(seed), image_format)
+    headers = {
+        "ETag": f'"{cache_key}"',
+        "Cache-Control": "public, max-age=31536000, immutable",
+        # The same URL serves different encodings depending on Accept
+        "Vary": "Accept",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    image_bytes = await image_cache.get(cache_key)
+    if image_bytes is None:
+        try:
+            image_bytes, rendered_tag = await inference_scheduler.submit(seed, model, image_format)
+        except (KeyError, ValueError):
+            raise HTTPException(status_code=404, detail="Real GAN not active")
+        if rendered_tag != model_tag:
+            # Rendered by another generator than the tag in the ETag (hot reload in between, or a
+            # process worker that hasn't picked up the new weights yet): never cache it under this key
+            return Response(content=image_bytes, media_type=media_type, headers={"Cache-Control": "no-store"})
+        await image_cache.put(cache_key, image_bytes)
+    return Response(content=image_bytes, media_type=media_type, headers=headers)
+
+@app.get(f"{settings.API_V1_STR}/system/inference", tags=["System"])
+async def get_inference_stats(current_user: User = Depends(get_current_active_user)):
+    """
+    Runtime statistics of the image inference pipeline.
+    """
+    return {
+        "model_loaded": gan_simulator.model is not None,
+        "model_state": gan_simulator.state.value,
+        "model_load_seconds": gan_simulator.load_seconds,
+        "weights_memory": gan_simulator.weights_memory(),
+        "reload": gan_simulator.reload_stats(),
+        "backend": gan_simulator.inference_report,
+        "models": gan_simulator.registry.stats(),
+        "scheduler": inference_scheduler.stats(),
+        "autotune": inference_autotuner.stats(),
+        "prerender": prerender_pool.stats(),
+        "image_cache": image_cache.stats(),
+        "encoder": image_encoder.stats(),
+        "quality": quality_scorer.stats(),
+    }
+
+@app.post(f"{settings.API_V1_STR}/system/inference/reload", tags=["System"])
+async def reload_generator(current_user: User = Depends(RoleChecker([UserRole.ADMIN]))):
+    """
+    Hot reload the primary generator weights without a restart. The new generator is loaded
+    and warmed up off the event loop and swapped in atomically; in-flight renders finish on the old one.
+    Inference and job worker processes are restarted so they load the new weights too.
+    Admin only.
+    """
+    result = await run_in_threadpool(gan_simulator.reload)
+    audit_logger.log_event(
+        user_id=current_user.username,
+        operation="MODEL_RELOAD",
+        details=f"Generator reload {'succeeded' if result['reloaded'] else 'failed'}: {result.get('model_tag', result.get('reason'))}",
+    )
+    return result
+
+@app.get(f"{settings.API_V1_STR}/system/ingest", tags=["System"])
+async def get_ingest_stats(current_user: User = Depends(get_current_active_user)):
+    """
+    Upload validation pool: workers, files in flight, back-pressure wait and per-file latency percentiles.
+    """
+    return ingest_pool.stats()
+
+@app.get(f"{settings.API_V1_STR}/system/inference/autotune", tags=["System"])
+async def get_autotune_report(current_user: User = Depends(get_current_active_user)):
+    """
+    The latest thread / batch-size calibration for this host: throughput and latency for every
+    grid point, the thread budget per worker and the configuration in use.
+    """
+    report = inference_autotuner.report or inference_autotuner.load()
+    if report is None:
+        raise HTTPException(status_code=404, detail="Inference has not been calibrated on this host")
+    return {**report, "applied": inference_autotuner.applied}
+
+@app.post(f"{settings.API_V1_STR}/system/inference/autotune", tags=["System"])
+async def run_autotune(
+    iterations: int = Query(default=5, ge=1, le=50),
+    current_user: User = Depends(RoleChecker([UserRole.ADMIN])),
+):
+    """
+    Recalibrate inference threads and micro-batch size on this host, persist and apply the result.
+    Benchmarking competes with live traffic for CPU while it runs. Admin only.
+    """
+    if gan_simulator.model is None:
+        raise HTTPException(status_code=409, detail="No generator loaded to calibrate")
+    report = await run_in_threadpool(inference_autotuner.calibrate, gan_simulator.model, iterations=iterations)
+    inference_autotuner.apply(report)
+    audit_logger.log_event(
+        user_id=current_user.username,
+        operation="INFERENCE_AUTOTUNE",
+        details=f"Calibrated inference: {report['best']['threads']} threads, batch size {report['best']['batch_size']}",
+    )
+    return {**report, "applied": inference_autotuner.applied}
+
 @app.get(f"{settings.API_V1_STR}/analytics", response_model=AnalyticsMetrics, tags=["Core"])
 async def get_analytics(
     response: Response,
@@ -210,6 +679,34 @@ async def upload_dataset(
         message=f"Processing {len(files)} files in background..."
     )
 
+@app.get(f"{settings.API_V1_STR}/upload/{{task_id}}", response_model=Dataset, tags=["Core"])
+async def get_upload_status(task_id: str, current_user: User = Depends(get_current_active_user)):
+    """
+    Progress of an upload task: processed files with their size and SHA-256,
+    copy throughput and the memory the copy held.
+    """
+    dataset = upload_manager.get_status(task_id)
+    if dataset is None:
+        raise HTTPException(status_code=404, detail="Upload task not found")
+    return dataset
+
+@app.delete(f"{settings.API_V1_STR}/upload/{{task_id}}", tags=["Core"])
+async def release_upload(task_id: str, current_user: User = Depends(get_current_active_user)):
+    """
+    Release an uploaded dataset. Stored files shared with other datasets are kept;
+    the rest are deleted.
+    """
+    released = upload_manager.release_dataset(task_id)
+    if released is None:
+        raise HTTPException(status_code=404, detail="Upload task not found")
+    audit_logger.log_event(
+        user_id=current_user.username,
+        operation="UPLOAD_RELEASE",
+        details=f"Released dataset ({released['files']} files, {released['bytes_freed']} bytes freed)",
+        resource_id=task_id
+    )
+    return released
+
 # --- Compliance & Security Routes ---
 
 @app.get(f"{settings.API_V1_STR}/compliance/audit", response_model=List[AuditLog], tags=["Compliance"])
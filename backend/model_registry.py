@@ -0,0 +1,252 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from .config import settings
+from .utils.lazy import lazy_import
+
+torch = lazy_import("torch")
+
+WEIGHTS_DIR = os.path.join(os.path.dirname(__file__), "weights")
+# Weights of generator <modality>-<version> live in weights/generator_<modality>_<version>.pth
+WEIGHTS_FILE = "generator_{modality}_{version}.pth"
+_VERSION_PATTERN = re.compile(r"^[A-Za-z0-9_.]+$")
+
+
+def modality_slug(scan_type: str) -> str:
+    """'X-Ray' -> 'xray', 'Retinal' -> 'retinal': the modality part of model names and image ids."""
+    return re.sub(r"[^a-z0-9]", "", scan_type.lower())
+
+
+def model_name(scan_type: str, version: str = None) -> str:
+    """Registry key of the generator for a scan type and version, e.g. 'xray-v2'."""
+    version = version or settings.MODEL_DEFAULT_VERSION
+    if not _VERSION_PATTERN.match(version):
+        raise ValueError(f"Invalid model version '{version}'")
+    return f"{modality_slug(scan_type)}-{version}"
+
+
+def split_model_name(name: str) -> Tuple[str, str]:
+    """'xray-v2' -> ('xray', 'v2'). Raises ValueError for malformed names."""
+    modality, _, version = name.partition("-")
+    if not modality.isalnum() or not _VERSION_PATTERN.match(version):
+        raise ValueError(f"Invalid model name '{name}'")
+    return modality, version
+
+
+@dataclass
+class LoadedModel:
+    """A generator converted for serving, plus what is needed to address and account for it."""
+    model: "torch.nn.Module"
+    tag: str
+    inference_report: dict
+    weights_mmapped: bool
+    size_bytes: int
+    load_seconds: float
+
+
+def read_state_dict(weights_path: str):
+    """
+    Read generator weights. With WEIGHTS_MMAP the checkpoint is memory-mapped read-only, so
+    every uvicorn / pool worker shares the same page-cache copy instead of holding private tensors.
+    Returns (state_dict, mmapped).
+    """
+    if settings.WEIGHTS_MMAP:
+        try:
+            return torch.load(weights_path, map_location=torch.device('cpu'), mmap=True, weights_only=True), True
+        except Exception as e:
+            # Legacy (non-zipfile) checkpoints can't be mapped
+            print(f"⚠️ Could not memory-map {weights_path}, loading a private copy: {e}")
+    return torch.load(weights_path, map_location=torch.device('cpu')), False
+
+
+def weights_tag(weights_path: str, backend: str) -> str:
+    """Short fingerprint of a weights file; part of every image cache key and ETag."""
+    stat = os.stat(weights_path)
+    # The serving backend is part of the fingerprint: int8/bf16 outputs differ slightly from eager
+    fingerprint = f"{weights_path}:{stat.st_mtime_ns}:{stat.st_size}:{backend}"
+    return hashlib.sha1(fingerprint.encode()).hexdigest()[:10]
+
+
+def load_generator(weights_path: str) -> LoadedModel:
+    """
+    Build a MedicalGenerator from `weights_path`, convert it to the configured CPU backend,
+    warm it up and verify it against eager.
+    """
+    from .networks.gan_architecture import MedicalGenerator
+    from .inference_backend import prepare_generator
+
+    start = time.perf_counter()
+    model = MedicalGenerator()
+    state_dict, mmapped = read_state_dict(weights_path)
+    size_bytes = sum(tensor.numel() * tensor.element_size() for tensor in state_dict.values())
+    # assign=True keeps the (mmapped) tensors instead of copying them into fresh parameters
+    model.load_state_dict(state_dict, assign=mmapped)
+    model.eval()
+    served, report = prepare_generator(model)
+    return LoadedModel(
+        model=served,
+        tag=weights_tag(weights_path, report["backend"]),
+        inference_report=report,
+        weights_mmapped=mmapped,
+        size_bytes=size_bytes,
+        load_seconds=time.perf_counter() - start,
+    )
+
+
+@dataclass
+class ModelStats:
+    loads: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    last_load_seconds: Optional[float] = None
+    total_load_seconds: float = 0.0
+
+
+class ModelRegistry:
+    """
+    Generators keyed by model name (modality + version), loaded on first use.
+    Resident models are kept in least-recently-used order and evicted once their summed
+    weight size exceeds `max_memory_mb`; pinned models (the primary generator) are never evicted.
+    """
+    def __init__(self, weights_dir: str = WEIGHTS_DIR, max_memory_mb: float = None):
+        self.weights_dir = weights_dir
+        max_memory_mb = settings.MODEL_REGISTRY_MAX_MB if max_memory_mb is None else max_memory_mb
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024)
+        self._resident: "OrderedDict[str, LoadedModel]" = OrderedDict()
+        self._pinned = set()
+        self._stats: Dict[str, ModelStats] = {}
+        self._lock = threading.RLock()
+        # Loads happen outside the registry lock; one lock per name prevents loading a model twice
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    def weights_path(self, name: str) -> str:
+        modality, version = split_model_name(name)
+        return os.path.join(self.weights_dir, WEIGHTS_FILE.format(modality=modality, version=version))
+
+    def available(self, name: str) -> bool:
+        """Whether model `name` is resident or has weights on disk."""
+        with self._lock:
+            if name in self._resident:
+                return True
+        try:
+            return os.path.exists(self.weights_path(name))
+        except ValueError:
+            return False
+
+    def is_resident(self, name: str) -> bool:
+        with self._lock:
+            return name in self._resident
+
+    def resident_names(self):
+        with self._lock:
+            return list(self._resident)
+
+    def _stats_for(self, name: str) -> ModelStats:
+        return self._stats.setdefault(name, ModelStats())
+
+    def register(self, name: str, loaded: LoadedModel, pinned: bool = False):
+        """Add an already loaded generator (e.g. the primary one), optionally exempt from eviction."""
+        with self._lock:
+            self._resident[name] = loaded
+            self._resident.move_to_end(name)
+            if pinned:
+                self._pinned.add(name)
+            stats = self._stats_for(name)
+            stats.loads += 1
+            stats.last_load_seconds = loaded.load_seconds
+            stats.total_load_seconds += loaded.load_seconds
+            self._evict(keep=name)
+
+    def touch(self, name: str):
+        """Record a lookup served by a model managed outside the registry's load path."""
+        with self._lock:
+            if name in self._resident:
+                self._resident.move_to_end(name)
+                self._stats_for(name).hits += 1
+
+    def get(self, name: str) -> LoadedModel:
+        """
+        The generator for `name`, loading it (and evicting least-recently-used models) on a miss.
+        Raises KeyError if there are no weights for `name`.
+        """
+        with self._lock:
+            loaded = self._resident.get(name)
+            if loaded is not None:
+                self._resident.move_to_end(name)
+                self._stats_for(name).hits += 1
+                return loaded
+            # Unknown names (arbitrary client input) must not leave stats or lock entries behind
+            if not self.available(name):
+                raise KeyError(f"No weights for model '{name}'")
+            self._stats_for(name).misses += 1
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                # Another caller may have finished loading while we waited
+                if name in self._resident:
+                    return self._resident[name]
+            loaded = load_generator(self.weights_path(name))
+            print(f"✅ Generator '{name}' loaded in {loaded.load_seconds:.2f}s (backend: {loaded.inference_report['backend']})")
+            self.register(name, loaded)
+            return loaded
+
+    def _evict(self, keep: str = None):
+        """Drop least-recently-used, unpinned models until resident weights fit the ceiling."""
+        for name in list(self._resident):
+            if self.resident_bytes() <= self.max_memory_bytes:
+                break
+            if name == keep or name in self._pinned:
+                continue
+            del self._resident[name]
+            self._stats_for(name).evictions += 1
+            print(f"ℹ️ Evicted generator '{name}' from memory")
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(loaded.size_bytes for loaded in self._resident.values())
+
+    def discover(self):
+        """Model names with weights on disk."""
+        if not os.path.isdir(self.weights_dir):
+            return []
+        names = []
+        for file_name in sorted(os.listdir(self.weights_dir)):
+            match = re.match(r"^generator_([a-z0-9]+)_([A-Za-z0-9_.]+)\.pth$", file_name)
+            if match:
+                names.append(f"{match.group(1)}-{match.group(2)}")
+        return names
+
+    def stats(self) -> dict:
+        with self._lock:
+            names = list(dict.fromkeys(self.discover() + list(self._stats)))
+            models = {}
+            for name in names:
+                stats = self._stats_for(name)
+                loaded = self._resident.get(name)
+                lookups = stats.hits + stats.misses
+                models[name] = {
+                    "resident": loaded is not None,
+                    "pinned": name in self._pinned,
+                    "size_mb": round(loaded.size_bytes / 2 ** 20, 3) if loaded else None,
+                    "backend": loaded.inference_report.get("backend") if loaded else None,
+                    "loads": stats.loads,
+                    "last_load_seconds": stats.last_load_seconds,
+                    "total_load_seconds": round(stats.total_load_seconds, 4),
+                    "hits": stats.hits,
+                    "misses": stats.misses,
+                    "evictions": stats.evictions,
+                    "hit_rate": round(stats.hits / lookups, 4) if lookups else 0.0,
+                }
+            return {
+                "max_memory_mb": round(self.max_memory_bytes / 2 ** 20, 3),
+                "resident_mb": round(self.resident_bytes() / 2 ** 20, 3),
+                "models": models,
+            }
@@ -62,6 +62,7 @@ class PatientData(BaseModel):
     age: int = Field(..., ge=0, le=120, description="Patient age")
     condition: str = Field(..., description="Medical condition")
     scan_type: str = Field(..., description="Type of scan (e.g., MRI, X-Ray, Retinal)")
+    model_version: Optional[str] = Field(default=None, pattern=r"^[A-Za-z0-9_.]+$", description="Generator version (defaults to the current one)")
     metadata: Optional[dict] = Field(default=None, description="Additional medical metadata")
 
 class SyntheticSample(BaseModel):
@@ -98,12 +99,35 @@ class AnalyticsMetrics(BaseModel):
     bias_metrics: Optional[BiasMetrics] = None
     fidelity_metrics: Optional[FidelityMetrics] = None
 
+class StepTimings(BaseModel):
+    """Distribution of training step times (data wait + compute) in milliseconds."""
+    steps: int
+    mean_ms: float
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    max_ms: float
+
 class TrainingMetrics(BaseModel):
     epoch: int
     loss: float
     accuracy: float
     discriminator_loss: float
     generator_loss: float
+    # Throughput telemetry (real training engine only)
+    samples_per_sec: Optional[float] = None
+    data_wait_seconds: Optional[float] = None   # time blocked on the data loader
+    compute_seconds: Optional[float] = None     # forward / backward / optimizer steps
+    data_wait_fraction: Optional[float] = None  # data_wait / (data_wait + compute); high = data-bound
+    peak_rss_mb: Optional[float] = None         # trainer process (loader workers are separate processes)
+    step_times: Optional[StepTimings] = None
+
+class ModelState(str, Enum):
+    PENDING = "pending"        # not loaded yet (load deferred until startup / first use)
+    LOADING = "loading"
+    READY = "ready"            # real GAN weights loaded
+    SIMULATION = "simulation"  # no weights or low resource mode
+    FAILED = "failed"
 
 class ProcessingStatus(str, Enum):
     UPLOADING = "uploading"
@@ -111,6 +135,15 @@ class ProcessingStatus(str, Enum):
     COMPLETED = "completed"
     ERROR = "error"
 
+class StoredFile(BaseModel):
+    """An upload as written to the upload store: byte count and SHA-256 computed during the copy."""
+    filename: str
+    size_bytes: int
+    sha256: str
+    seconds: float
+    deduplicated: bool = False  # content was already stored: no write, no re-validation of a valid DICOM
+    validation_ms: Optional[float] = None  # DICOM validation time on the ingest pool
+
 class Dataset(BaseModel):
     id: str
     name: str
@@ -120,6 +153,41 @@ class Dataset(BaseModel):
     upload_date: datetime
     status: ProcessingStatus
     processed_count: int = 0
+    files: List[StoredFile] = []
+    # Upload telemetry: copy throughput, largest chunk held in memory, process peak RSS
+    upload_seconds: float = 0.0
+    throughput_mb_s: Optional[float] = None
+    peak_buffer_bytes: int = 0
+    peak_rss_mb: Optional[float] = None
+    # Files whose content was already stored, and the bytes not written again
+    deduplicated_count: int = 0
+    bytes_saved: int = 0
+
+# --- Generation Job Models ---
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
+class GenerationJobSpec(BaseModel):
+    patient_data: PatientData
+    count: int = Field(..., ge=1, description="Number of samples to generate")
+    render_images: bool = Field(default=False, description="Pre-render real GAN images into the image cache")
+    seed: Optional[int] = Field(default=None, ge=0, description="Seed for a reproducible cohort")
+
+class GenerationJob(BaseModel):
+    id: str
+    user_id: str
+    status: JobStatus
+    spec: GenerationJobSpec
+    completed_count: int = 0
+    progress: float = 0.0
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
 
 class UploadResponse(BaseModel):
     task_id: str
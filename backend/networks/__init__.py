@@ -1 +1 @@
-from .gan_architecture import MedicalGenerator
+from .gan_architecture import MedicalGenerator, MedicalDiscriminator
@@ -36,3 +36,38 @@ class MedicalGenerator(nn.Module):
 
     def forward(self, x):
         return self.main(x)
+
+class MedicalDiscriminator(nn.Module):
+    """
+    DCGAN-style Discriminator matching MedicalGenerator's 64x64 output.
+    Returns one raw logit per image (pair with BCEWithLogitsLoss).
+    """
+    def __init__(self, img_channels=3, feature_maps=64):
+        super(MedicalDiscriminator, self).__init__()
+        self.main = nn.Sequential(
+            # Input is (img_channels) x 64 x 64
+            nn.Conv2d(img_channels, feature_maps, 4, 2, 1, bias=False),
+            nn.LeakyReLU(0.2, inplace=True),
+            # state size: (feature_maps) x 32 x 32
+
+            nn.Conv2d(feature_maps, feature_maps * 2, 4, 2, 1, bias=False),
+            nn.BatchNorm2d(feature_maps * 2),
+            nn.LeakyReLU(0.2, inplace=True),
+            # state size: (feature_maps*2) x 16 x 16
+
+            nn.Conv2d(feature_maps * 2, feature_maps * 4, 4, 2, 1, bias=False),
+            nn.BatchNorm2d(feature_maps * 4),
+            nn.LeakyReLU(0.2, inplace=True),
+            # state size: (feature_maps*4) x 8 x 8
+
+            nn.Conv2d(feature_maps * 4, feature_maps * 8, 4, 2, 1, bias=False),
+            nn.BatchNorm2d(feature_maps * 8),
+            nn.LeakyReLU(0.2, inplace=True),
+            # state size: (feature_maps*8) x 4 x 4
+
+            nn.Conv2d(feature_maps * 8, 1, 4, 1, 0, bias=False),
+            # final state size: 1 x 1 x 1
+        )
+
+    def forward(self, x):
+        return self.main(x).view(-1)
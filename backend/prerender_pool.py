@@ -0,0 +1,166 @@
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .config import settings
+from .image_cache import image_cache, image_cache_key
+from .inference_scheduler import InferenceScheduler, inference_scheduler
+from .quality_scorer import quality_scorer
+from .sample_batch import SEED_BITS, format_image_id
+from .utils.image_encoder import image_encoder, to_uint8
+
+
+class PrerenderPool:
+    """
+    Per-model ring buffers of pre-rendered (seed, PNG) pairs, filled by a background producer
+    only while the inference scheduler is idle. `generate_batch` takes real image seeds from
+    the pool in O(1) and their PNGs go to the in-memory image cache, so the first fetch of those
+    image URLs is a memory copy instead of a forward pass and encode.
+    A pool is refilled once it drops below `low_watermark` (fraction of capacity) and until it is full.
+    """
+    def __init__(self, simulator=None, scheduler: InferenceScheduler = None, capacity: int = None,
+                 low_watermark: float = None, idle_ms: float = None):
+        self._simulator = simulator
+        self.scheduler = scheduler or inference_scheduler
+        self.capacity = settings.PRERENDER_POOL_SIZE if capacity is None else capacity
+        watermark = settings.PRERENDER_LOW_WATERMARK if low_watermark is None else low_watermark
+        self.low_watermark = int(self.capacity * watermark)
+        idle_ms = settings.PRERENDER_IDLE_MS if idle_ms is None else idle_ms
+        self.idle_seconds = idle_ms / 1000.0
+
+        # model name -> deque of (seed, png, model_tag, quality score or None)
+        self._pools: Dict[str, Deque[Tuple[int, bytes, str, Optional[float]]]] = {}
+        self._refilling = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._rng = np.random.default_rng()
+
+        self.hits = 0
+        self.misses = 0
+        self.rendered = 0
+        self.discarded = 0
+
+    @property
+    def simulator(self):
+        if self._simulator is None:
+            from .gan_simulator import gan_simulator
+            self._simulator = gan_simulator
+        return self._simulator
+
+    def take(self, model: str, count: int) -> List[Tuple[int, Optional[float]]]:
+        """
+        Pop up to `count` pre-rendered (seed, quality score) pairs of `model` and publish their images
+        to the in-memory image cache. The score is None unless quality scoring is enabled.
+        Seeds beyond what the pool holds count as misses.
+        """
+        taken = []
+        with self._lock:
+            pool = self._pools.get(model)
+            while pool and len(taken) < count:
+                taken.append(pool.popleft())
+            self.hits += len(taken)
+            self.misses += count - len(taken)
+        for seed, png, model_tag, _ in taken:
+            image_cache.put_memory(image_cache_key(model_tag, format_image_id(seed)), png)
+        return [(seed, score) for seed, _, _, score in taken]
+
+    def _models(self) -> List[str]:
+        simulator = self.simulator
+        models = [simulator.default_model] if simulator.model is not None else []
+        return models + [name for name in simulator.registry.resident_names() if name not in models]
+
+    def _needs_refill(self, model: str, model_tag: str) -> bool:
+        with self._lock:
+            pool = self._pools.setdefault(model, deque())
+            if pool and pool[-1][2] != model_tag:
+                # The generator was hot reloaded or replaced: its pre-rendered images are stale
+                self.discarded += len(pool)
+                pool.clear()
+            if len(pool) < max(1, self.low_watermark):
+                self._refilling.add(model)
+            elif len(pool) >= self.capacity:
+                self._refilling.discard(model)
+            return model in self._refilling
+
+    def refill(self) -> int:
+        """
+        One producer step: render at most one batch for the first model that needs it,
+        if the scheduler is idle. Returns the number of images added.
+        """
+        if self.capacity <= 0 or not self.scheduler.is_idle(self.idle_seconds):
+            return 0
+        for model in self._models():
+            try:
+                _, model_tag = self.simulator.resolve_model(model)
+            except (KeyError, ValueError):
+                continue
+            if not self._needs_refill(model, model_tag):
+                continue
+            with self._lock:
+                missing = self.capacity - len(self._pools[model])
+            seeds = self._rng.integers(0, 2 ** SEED_BITS, size=min(missing, settings.INFERENCE_MAX_BATCH_SIZE)).tolist()
+            # The tag the images were actually rendered with: a hot reload may have landed since the check
+            images, model_tag = self.simulator.generate_tagged_image_tensor(seeds, model)
+            scores = [None] * len(seeds)
+            if settings.QUALITY_SCORING:
+                # Score while the tensors are at hand; below-threshold images never enter the pool
+                scores = quality_scorer.score(images).tolist()
+                keep = [i for i, score in enumerate(scores) if score >= settings.QUALITY_MIN_SCORE]
+                quality_scorer.record_rejections(len(seeds) - len(keep), 0)
+                seeds, scores, images = [seeds[i] for i in keep], [scores[i] for i in keep], images[keep]
+            pngs = image_encoder.encode_batch(to_uint8(images), "png")
+            # Drops images of the previous generator if it was swapped during the render
+            self._needs_refill(model, model_tag)
+            with self._lock:
+                self._pools[model].extend(
+                    (seed, png, model_tag, score) for seed, png, score in zip(seeds, pngs, scores)
+                )
+            self.rendered += len(seeds)
+            return len(seeds)
+        return 0
+
+    def _run(self, interval: float):
+        while not self._stop.is_set():
+            try:
+                added = self.refill()
+            except Exception as e:
+                print(f"⚠️ Pre-render producer step failed: {e}")
+                added = 0
+            # Keep going while there is work and the scheduler stays idle, otherwise poll
+            if not added:
+                self._stop.wait(interval)
+
+    def start(self) -> Optional[threading.Thread]:
+        """Start the background producer (no-op if the pool is disabled or in low resource mode)."""
+        if self.capacity <= 0 or settings.LOW_RESOURCE_MODE:
+            return None
+        self.simulator.prerender_pool = self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(self.idle_seconds,), name="gan-prerender", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            pools = {model: len(pool) for model, pool in self._pools.items()}
+        lookups = self.hits + self.misses
+        return {
+            "capacity": self.capacity,
+            "low_watermark": self.low_watermark,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "pools": pools,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "rendered": self.rendered,
+            "discarded": self.discarded,
+        }
+
+# Global Instance
+prerender_pool = PrerenderPool()
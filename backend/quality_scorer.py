@@ -0,0 +1,102 @@
+import threading
+import time
+
+import numpy as np
+
+from .config import settings
+from .utils.lazy import lazy_import
+
+torch = lazy_import("torch")
+
+# Relative weight of each no-reference metric in the combined score
+METRIC_WEIGHTS = {"sharpness": 0.4, "contrast": 0.3, "entropy": 0.3}
+# Laplacian variance at which sharpness counts as ~63% of its maximum (grayscale in [0, 1])
+SHARPNESS_SCALE = 0.01
+# RMS contrast (grayscale std) treated as full contrast
+CONTRAST_SCALE = 0.25
+HISTOGRAM_BINS = 256
+_LUMA = (0.299, 0.587, 0.114)
+
+
+class QualityScorer:
+    """
+    No-reference image quality for whole batches of generator output, mapped onto the
+    image_quality_score range 1.0 - 5.0:
+      sharpness - variance of the Laplacian,
+      contrast  - RMS contrast (grayscale standard deviation),
+      entropy   - Shannon entropy of the 256-bin grayscale histogram.
+    Every metric is computed for the whole (N, 3, H, W) batch in a few tensor ops, no per-image loop.
+    """
+    def __init__(self):
+        self._laplacian = None
+        self._lock = threading.Lock()
+        self.images_scored = 0
+        self.scoring_seconds = 0.0
+        # Forward passes run only to feed the quality stage, to put scoring cost in proportion
+        self.inference_seconds = 0.0
+        self.rejected = 0
+        self.below_threshold = 0
+
+    def metrics(self, images: "torch.Tensor") -> dict:
+        """Per-image metric arrays for a (N, 3, H, W) batch in [-1, 1]."""
+        if self._laplacian is None:
+            self._laplacian = torch.tensor([[0.0, 1.0, 0.0], [1.0, -4.0, 1.0], [0.0, 1.0, 0.0]]).view(1, 1, 3, 3)
+        with torch.no_grad():
+            luma = torch.tensor(_LUMA, dtype=images.dtype).view(1, 3, 1, 1)
+            gray = ((images.float() + 1) / 2).clamp(0, 1).mul(luma).sum(dim=1, keepdim=True)
+            count = gray.shape[0]
+
+            sharpness = torch.nn.functional.conv2d(gray, self._laplacian).flatten(1).var(dim=1)
+            contrast = gray.flatten(1).std(dim=1)
+
+            # One bincount for the whole batch: offset each image's bins by index * 256
+            bins = (gray.flatten(1) * (HISTOGRAM_BINS - 1)).round().long()
+            bins += torch.arange(count).view(-1, 1) * HISTOGRAM_BINS
+            histogram = torch.bincount(bins.flatten(), minlength=count * HISTOGRAM_BINS).view(count, HISTOGRAM_BINS).float()
+            probabilities = histogram / histogram.sum(dim=1, keepdim=True)
+            entropy = -(probabilities * torch.log2(probabilities.clamp(min=1e-12))).sum(dim=1)
+
+        return {
+            "sharpness": sharpness.numpy(),
+            "contrast": contrast.numpy(),
+            "entropy": entropy.numpy(),
+        }
+
+    def score(self, images: "torch.Tensor") -> np.ndarray:
+        """image_quality_score (1.0 - 5.0, two decimals) for every image of the batch."""
+        start = time.perf_counter()
+        metrics = self.metrics(images)
+        normalized = {
+            "sharpness": 1 - np.exp(-metrics["sharpness"] / SHARPNESS_SCALE),
+            "contrast": np.minimum(metrics["contrast"] / CONTRAST_SCALE, 1.0),
+            "entropy": metrics["entropy"] / np.log2(HISTOGRAM_BINS),
+        }
+        combined = sum(weight * normalized[name] for name, weight in METRIC_WEIGHTS.items())
+        scores = np.round(1.0 + 4.0 * np.clip(combined, 0.0, 1.0), 2)
+        with self._lock:
+            self.images_scored += len(scores)
+            self.scoring_seconds += time.perf_counter() - start
+        return scores
+
+    def record_inference(self, seconds: float):
+        with self._lock:
+            self.inference_seconds += seconds
+
+    def record_rejections(self, rejected: int, below_threshold: int):
+        with self._lock:
+            self.rejected += rejected
+            self.below_threshold += below_threshold
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.QUALITY_SCORING,
+            "min_score": settings.QUALITY_MIN_SCORE,
+            "images_scored": self.images_scored,
+            "avg_scoring_ms_per_image": round(self.scoring_seconds / self.images_scored * 1000, 4) if self.images_scored else None,
+            "scoring_to_inference_ratio": round(self.scoring_seconds / self.inference_seconds, 4) if self.inference_seconds else None,
+            "rejected": self.rejected,
+            "kept_below_threshold": self.below_threshold,
+        }
+
+# Global Instance
+quality_scorer = QualityScorer()
@@ -0,0 +1,196 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .models import (
+    SyntheticSample,
+    Demographics,
+    MedicalMetadata,
+    Gender,
+    Ethnicity,
+    DrLevel,
+)
+
+# Code tables for the categorical columns (array value == index into the table)
+GENDERS: List[Gender] = list(Gender)
+ETHNICITIES: List[Ethnicity] = list(Ethnicity)
+DR_LEVELS: List[DrLevel] = list(DrLevel)
+GENDER_VALUES = np.array([gender.value for gender in GENDERS], dtype=object)
+ETHNICITY_VALUES = np.array([ethnicity.value for ethnicity in ETHNICITIES], dtype=object)
+DR_LEVEL_VALUES = np.array([dr_level.value for dr_level in DR_LEVELS], dtype=object)
+
+# Severity cut-offs between consecutive DrLevels: <0.3 None, <0.5 Mild, <0.7 Moderate, <0.9 Severe, else Proliferative
+SEVERITY_THRESHOLDS = np.array([0.3, 0.5, 0.7, 0.9])
+
+SEED_BITS = 63
+
+REAL_IMAGE_URL = "http://localhost:8000/api/synthetic/generate/{image_id}.png"
+PLACEHOLDER_IMAGE_URL = "https://synthetic-storage.example.com/scans/{scan_type}_{image_id}.png"
+
+def format_image_id(seed: int, model: str = None) -> str:
+    """
+    Encodes a latent seed as the image id used in synthetic image URLs,
+    prefixed with the generator's model name ("xray-v1-00000000000004d2") when given.
+    """
+    if model:
+        return f"{model}-{seed:016x}"
+    return f"{seed:016x}"
+
+def parse_image_id(image_id: str) -> int:
+    """Decodes the latent seed from an image id. Raises ValueError for malformed ids."""
+    seed = int(image_id, 16)
+    if not 0 <= seed < 2 ** SEED_BITS:
+        raise ValueError(f"Seed out of range: {image_id}")
+    return seed
+
+def split_image_id(image_id: str) -> Tuple[Optional[str], int]:
+    """
+    (model name, seed) of an image id. Legacy bare seeds have no model name (None),
+    meaning the primary generator. Raises ValueError for malformed ids.
+    """
+    model, _, seed_hex = image_id.rpartition("-")
+    return model or None, parse_image_id(seed_hex)
+
+@dataclass
+class SampleBatch:
+    """
+    Columnar (struct-of-arrays) batch of synthetic samples.
+    Every per-sample field is a NumPy array of length `len(batch)`; categorical
+    fields are stored as integer codes into GENDERS / ETHNICITIES / DR_LEVELS.
+    Pydantic objects are only built on demand via `to_samples()`.
+    """
+    timestamp: datetime
+    modality: str
+    id_prefix: str
+    id_suffixes: np.ndarray
+    image_ids: np.ndarray
+    real_images: bool
+    confidence_scores: np.ndarray
+    ages: np.ndarray
+    genders: np.ndarray
+    ethnicities: np.ndarray
+    dr_levels: np.ndarray
+    image_quality_scores: np.ndarray
+    privacy_scores: np.ndarray
+    condition_override: Optional[str] = None
+    # Model name of the generator behind real image ids (see format_image_id)
+    image_model: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.ages)
+
+    def ids(self) -> List[str]:
+        return [f"{self.id_prefix}_{suffix}" for suffix in self.id_suffixes.tolist()]
+
+    def image_urls(self) -> List[str]:
+        if self.real_images:
+            return [REAL_IMAGE_URL.format(image_id=format_image_id(seed, self.image_model)) for seed in self.image_ids.tolist()]
+        scan_type = self.modality.lower()
+        return [PLACEHOLDER_IMAGE_URL.format(scan_type=scan_type, image_id=image_id) for image_id in self.image_ids.tolist()]
+
+    def conditions(self) -> np.ndarray:
+        if self.condition_override:
+            return np.full(len(self), self.condition_override, dtype=object)
+        return np.where(self.dr_levels == 0, "Healthy", "Diabetic Retinopathy").astype(object)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Flat column name -> NumPy array, with categorical codes decoded to their string values.
+        """
+        count = len(self)
+        return {
+            "id": np.array(self.ids(), dtype=object),
+            "timestamp": np.full(count, np.datetime64(self.timestamp, "us")),
+            "modality": np.full(count, self.modality, dtype=object),
+            "image_url": np.array(self.image_urls(), dtype=object),
+            "confidence_score": self.confidence_scores,
+            "is_synthetic": np.ones(count, dtype=bool),
+            "age": self.ages,
+            "gender": GENDER_VALUES[self.genders],
+            "ethnicity": ETHNICITY_VALUES[self.ethnicities],
+            "condition": self.conditions(),
+            "dr_level": DR_LEVEL_VALUES[self.dr_levels],
+            "image_quality_score": self.image_quality_scores,
+            "privacy_score": self.privacy_scores,
+        }
+
+    def columns(self) -> Dict[str, list]:
+        """
+        Flat column name -> list of plain JSON-compatible values, one entry per sample.
+        """
+        columns = {name: values.tolist() for name, values in self.arrays().items()}
+        columns["timestamp"] = [self.timestamp.isoformat()] * len(self)
+        return columns
+
+    def to_columnar(self) -> Dict[str, object]:
+        """
+        Compact struct-of-arrays document: every column name appears once, per-batch
+        constants are sent as scalars, and numeric columns stay NumPy arrays so a
+        numpy-aware JSON encoder can serialize them without per-value conversion.
+        """
+        arrays = self.arrays()
+        for constant in ("timestamp", "modality", "is_synthetic"):
+            del arrays[constant]
+        columns = {
+            name: values.tolist() if values.dtype == object else values
+            for name, values in arrays.items()
+        }
+        return {
+            "count": len(self),
+            "constants": {
+                "timestamp": self.timestamp.isoformat(),
+                "modality": self.modality,
+                "is_synthetic": True,
+            },
+            "columns": columns,
+        }
+
+    def to_samples(self) -> List[SyntheticSample]:
+        """
+        Materialize the batch as SyntheticSample objects.
+        Values are in range by construction, so validation is skipped (model_construct).
+        """
+        samples = []
+        rows = zip(
+            self.ids(),
+            self.image_urls(),
+            self.confidence_scores.tolist(),
+            self.ages.tolist(),
+            self.genders.tolist(),
+            self.ethnicities.tolist(),
+            self.conditions().tolist(),
+            self.dr_levels.tolist(),
+            self.image_quality_scores.tolist(),
+            self.privacy_scores.tolist(),
+        )
+        for sample_id, image_url, confidence, age, gender, ethnicity, condition, dr_level, quality, privacy in rows:
+            samples.append(
+                SyntheticSample.model_construct(
+                    id=sample_id,
+                    timestamp=self.timestamp,
+                    modality=self.modality,
+                    image_url=image_url,
+                    confidence_score=confidence,
+                    is_synthetic=True,
+                    demographics=Demographics.model_construct(
+                        age=age,
+                        gender=GENDERS[gender],
+                        ethnicity=ETHNICITIES[ethnicity],
+                    ),
+                    medical_metadata=MedicalMetadata.model_construct(
+                        condition=condition,
+                        dr_level=DR_LEVELS[dr_level],
+                        image_quality_score=quality,
+                        privacy_score=privacy,
+                    ),
+                )
+            )
+        return samples
+
+    def to_ndjson(self) -> str:
+        """
+        Newline-delimited JSON, one SyntheticSample document per line.
+        """
+        return "".join(sample.model_dump_json() + "\n" for sample in self.to_samples())
@@ -0,0 +1,97 @@
+import json
+import struct
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .config import settings
+from .gan_simulator import gan_simulator
+from .sample_batch import SEED_BITS
+from .utils.image_encoder import to_uint8
+
+IMAGE_SHAPE = (3, 64, 64)
+
+# format -> (media type, file extension)
+TENSOR_FORMATS = {
+    "npy": ("application/x-npy", "npy"),
+    "safetensors": ("application/octet-stream", "safetensors"),
+}
+TENSOR_DTYPES = {
+    "float32": np.dtype("<f4"),
+    "uint8": np.dtype("u1"),
+}
+_SAFETENSORS_DTYPES = {"float32": "F32", "uint8": "U8"}
+
+
+def npy_header(shape: Tuple[int, ...], dtype: np.dtype) -> bytes:
+    """
+    NPY v1.0 header for a C-ordered array, so the raw buffer can follow without np.save
+    holding the whole array: magic, version, little-endian header length, then a dict literal
+    padded with spaces to a multiple of 64 bytes.
+    """
+    header = repr({"descr": dtype.str, "fortran_order": False, "shape": tuple(shape)})
+    # 6 magic + 2 version + 2 length bytes, header terminated by a newline
+    padding = 64 - (10 + len(header) + 1) % 64
+    header = (header + " " * padding + "\n").encode("latin1")
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header
+
+
+def safetensors_header(name: str, shape: Tuple[int, ...], dtype: str, metadata: dict = None) -> bytes:
+    """
+    safetensors header for a single tensor: little-endian u64 length, then JSON describing
+    dtype, shape and byte offsets, space-padded to 8-byte alignment.
+    """
+    nbytes = int(np.prod(shape)) * TENSOR_DTYPES[dtype].itemsize
+    document = {name: {"dtype": _SAFETENSORS_DTYPES[dtype], "shape": list(shape), "data_offsets": [0, nbytes]}}
+    if metadata:
+        document["__metadata__"] = {key: str(value) for key, value in metadata.items()}
+    header = json.dumps(document, separators=(",", ":")).encode()
+    header += b" " * (-len(header) % 8)
+    return struct.pack("<Q", len(header)) + header
+
+
+class TensorExporter:
+    """
+    Streams N generator outputs as a single .npy or safetensors blob for ML consumers.
+    The header declares the full shape up front; the body is then written one batched
+    forward pass at a time straight from the output tensor's buffer (no per-image encode/decode,
+    no copy for float32). float32 is the raw tanh output in [-1, 1]; uint8 holds the same
+    per-image normalized pixels as the PNG images. Both are NCHW.
+    """
+    @staticmethod
+    def resolve(export_format: str, dtype: str) -> Tuple[str, str]:
+        export_format, dtype = export_format.lower(), dtype.lower()
+        if export_format not in TENSOR_FORMATS:
+            raise ValueError(f"Unsupported tensor format '{export_format}', expected one of {list(TENSOR_FORMATS)}")
+        if dtype not in TENSOR_DTYPES:
+            raise ValueError(f"Unsupported dtype '{dtype}', expected one of {list(TENSOR_DTYPES)}")
+        return export_format, dtype
+
+    @staticmethod
+    def seeds(count: int, seed: int) -> List[int]:
+        """Latent seeds of the exported images, derived from the request seed."""
+        return np.random.default_rng(seed).integers(0, 2 ** SEED_BITS, size=count).tolist()
+
+    @staticmethod
+    def header(export_format: str, count: int, dtype: str, seed: int, model: Optional[str]) -> bytes:
+        shape = (count, *IMAGE_SHAPE)
+        if export_format == "npy":
+            return npy_header(shape, TENSOR_DTYPES[dtype])
+        return safetensors_header("images", shape, dtype, {"seed": seed, "model": model or gan_simulator.default_model})
+
+    @staticmethod
+    def content_length(export_format: str, count: int, dtype: str, seed: int, model: Optional[str]) -> int:
+        body = count * int(np.prod(IMAGE_SHAPE)) * TENSOR_DTYPES[dtype].itemsize
+        return len(TensorExporter.header(export_format, count, dtype, seed, model)) + body
+
+    @classmethod
+    def stream(cls, export_format: str, count: int, dtype: str, seed: int, model: Optional[str] = None,
+               chunk_size: int = None) -> Iterator[memoryview]:
+        chunk_size = chunk_size or settings.INFERENCE_MAX_BATCH_SIZE
+        yield memoryview(cls.header(export_format, count, dtype, seed, model))
+        seeds = cls.seeds(count, seed)
+        for start in range(0, count, chunk_size):
+            images = gan_simulator.generate_image_tensor(seeds[start:start + chunk_size], model)
+            array = to_uint8(images, channels_last=False) if dtype == "uint8" else images.numpy()
+            # Generator output is contiguous little-endian float32: hand its buffer over as is
+            yield memoryview(np.ascontiguousarray(array)).cast("B")
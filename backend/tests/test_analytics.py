@@ -55,3 +55,18 @@ def test_privacy_scores_aggregation():
     metrics = engine.get_metrics()
     assert metrics.privacy_metrics.average_privacy_score == 0.8
     assert metrics.privacy_metrics.reidentification_risk_score == pytest.approx(20.0)
+
+def test_update_from_batch_matches_update_metrics():
+    """The vectorized batch ingest aggregates exactly like per-sample ingest."""
+    from backend.gan_simulator import GANSimulator
+    batch = GANSimulator().generate_batch(200)
+
+    per_sample, vectorized = AnalyticsEngine(), AnalyticsEngine()
+    per_sample.update_metrics(batch.to_samples())
+    vectorized.update_from_batch(batch)
+
+    assert vectorized.total_generated == per_sample.total_generated == 200
+    assert vectorized.demographic_data["gender"] == per_sample.demographic_data["gender"]
+    assert vectorized.demographic_data["ethnicity"] == per_sample.demographic_data["ethnicity"]
+    assert vectorized.demographic_data["condition"] == per_sample.demographic_data["condition"]
+    assert vectorized.privacy_scores == per_sample.privacy_scores
@@ -1,5 +1,9 @@
+import os
 import pytest
 from backend.config import settings
+from backend.gan_simulator import gan_simulator
+from backend.image_cache import image_cache
+from backend.networks.gan_architecture import MedicalGenerator
 
 PREFIX = settings.API_V1_STR
 
@@ -41,3 +45,325 @@ def test_upload_flow_validation(client):
     assert response.status_code == 200
     data = response.json()
     assert "task_id" in data
+
+def test_upload_is_streamed_and_hashed(client, monkeypatch, tmp_path):
+    """Uploads are copied in bounded chunks; size and SHA-256 come from the copy itself."""
+    import hashlib
+    from backend import main
+    from backend.upload_manager import UploadManager
+    monkeypatch.setattr(main, "upload_manager", UploadManager(str(tmp_path)))
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 1000)
+    file_content = bytes(range(256)) * 20
+    files = [("files", ("scan.png", file_content, "image/png"))]
+
+    task_id = client.post(f"{PREFIX}/upload", files=files).json()["task_id"]
+    response = client.get(f"{PREFIX}/upload/{task_id}")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "completed"
+    assert data["files"][0]["size_bytes"] == len(file_content) == data["total_size_bytes"]
+    assert data["files"][0]["sha256"] == hashlib.sha256(file_content).hexdigest()
+    assert data["peak_buffer_bytes"] == 1000
+    assert data["throughput_mb_s"] > 0
+
+    assert client.get(f"{PREFIX}/upload/unknown-task").status_code == 404
+
+def test_upload_deduplicates_content(client, monkeypatch, tmp_path):
+    """Known content is neither written nor validated again; blobs live until the last dataset is released."""
+    from backend import main
+    from backend.upload_manager import UploadManager
+    manager = UploadManager(str(tmp_path))
+    monkeypatch.setattr(main, "upload_manager", manager)
+    content = b"fundus image bytes" * 100
+
+    first = client.post(f"{PREFIX}/upload", files=[("files", ("a.png", content, "image/png"))]).json()["task_id"]
+    second = client.post(
+        f"{PREFIX}/upload",
+        files=[("files", ("b.png", content, "image/png")), ("files", ("c.png", content, "image/png"))],
+    ).json()["task_id"]
+
+    data = client.get(f"{PREFIX}/upload/{second}").json()
+    assert data["deduplicated_count"] == 2
+    assert data["bytes_saved"] == 2 * len(content)
+    assert all(stored["deduplicated"] for stored in data["files"])
+    assert len(manager.list_images()) == 1
+    # Duplicates are written to a temp file in the same pass as hashing, then dropped
+    assert not [name for name in os.listdir(manager.blob_dir) if name.endswith(".tmp")]
+
+    blob = manager.list_images()[0]
+    assert client.delete(f"{PREFIX}/upload/{first}").json()["bytes_freed"] == 0
+    assert os.path.exists(blob)
+    released = client.delete(f"{PREFIX}/upload/{second}").json()
+    assert released["blobs_deleted"] == 1 and released["bytes_freed"] == len(content)
+    assert not os.path.exists(blob)
+    assert client.delete(f"{PREFIX}/upload/{second}").status_code == 404
+
+def _dicom_bytes(modality: str, patient_id: str) -> bytes:
+    import io
+    from pydicom.dataset import FileDataset, FileMetaDataset
+    from pydicom.uid import ExplicitVRLittleEndian, generate_uid
+    meta = FileMetaDataset()
+    meta.MediaStorageSOPClassUID = generate_uid()
+    meta.MediaStorageSOPInstanceUID = generate_uid()
+    meta.TransferSyntaxUID = ExplicitVRLittleEndian
+    dataset = FileDataset(None, {}, file_meta=meta, preamble=b"\0" * 128)
+    dataset.Modality = modality
+    dataset.PatientID = patient_id
+    buffer = io.BytesIO()
+    dataset.save_as(buffer, enforce_file_format=True)
+    return buffer.getvalue()
+
+def test_upload_validates_dicom_on_ingest_pool(client, monkeypatch, tmp_path):
+    """DICOM files are validated on the bounded ingest pool, with per-file latency and the dataset modality."""
+    from backend import main, upload_manager as upload_module
+    from backend.ingest_pool import IngestPool
+    from backend.upload_manager import UploadManager
+    pool = IngestPool(mode="thread", max_workers=2, max_pending=2)
+    monkeypatch.setattr(main, "upload_manager", UploadManager(str(tmp_path)))
+    monkeypatch.setattr(upload_module, "ingest_pool", pool)
+
+    files = [("files", (f"scan_{index}.dcm", _dicom_bytes("OP", f"P{index}"), "application/dicom")) for index in range(5)]
+    files.append(("files", ("broken.dcm", b"not a dicom file", "application/dicom")))
+    task_id = client.post(f"{PREFIX}/upload", files=files).json()["task_id"]
+
+    data = client.get(f"{PREFIX}/upload/{task_id}").json()
+    assert data["status"] == "completed"
+    assert data["file_count"] == 5
+    assert data["type"] == "OP"
+    assert all(stored["validation_ms"] is not None for stored in data["files"])
+
+    stats = pool.stats()
+    assert stats["inspected"] == 6 and stats["invalid"] == 1 and stats["in_flight"] == 0
+    assert stats["latency_ms"]["p95"] is not None
+    pool.shutdown()
+
+def test_deduplicated_upload_is_validated_as_dicom_once(client, monkeypatch, tmp_path):
+    """Stored content skips validation only if it already passed as a DICOM, and keeps its modality."""
+    from backend import main, upload_manager as upload_module
+    from backend.ingest_pool import IngestPool
+    from backend.upload_manager import UploadManager
+    pool = IngestPool(mode="thread", max_workers=1)
+    monkeypatch.setattr(main, "upload_manager", UploadManager(str(tmp_path)))
+    monkeypatch.setattr(upload_module, "ingest_pool", pool)
+
+    def upload(name, content):
+        files = [("files", (name, content, "application/octet-stream"))]
+        task_id = client.post(f"{PREFIX}/upload", files=files).json()["task_id"]
+        return client.get(f"{PREFIX}/upload/{task_id}").json()
+
+    assert upload("img.png", b"junk bytes")["processed_count"] == 1
+    junk_as_dicom = upload("img.dcm", b"junk bytes")
+    assert junk_as_dicom["processed_count"] == 0 and junk_as_dicom["deduplicated_count"] == 0
+
+    scan = _dicom_bytes("CT", "P1")
+    assert upload("scan.dcm", scan)["type"] == "CT"
+    again = upload("scan.dcm", scan)
+    assert again["type"] == "CT" and again["deduplicated_count"] == 1
+    assert again["files"][0]["validation_ms"] is None
+    assert pool.stats()["inspected"] == 2
+    pool.shutdown()
+
+def test_upload_fails_when_a_file_cannot_be_ingested(client, monkeypatch, tmp_path):
+    """An ingest failure on any file (not only the last ones) marks the dataset as failed."""
+    from backend import main, upload_manager as upload_module
+    from backend.ingest_pool import IngestPool
+    from backend.upload_manager import UploadManager
+
+    class FailingPool(IngestPool):
+        calls = 0
+
+        async def inspect(self, file_path):
+            FailingPool.calls += 1
+            if FailingPool.calls == 1:
+                raise OSError("worker died")
+            return await super().inspect(file_path)
+
+    pool = FailingPool(mode="thread", max_workers=1, max_pending=1)
+    monkeypatch.setattr(main, "upload_manager", UploadManager(str(tmp_path)))
+    monkeypatch.setattr(upload_module, "ingest_pool", pool)
+
+    files = [("files", (f"scan_{index}.dcm", _dicom_bytes("OP", f"P{index}"), "application/dicom")) for index in range(3)]
+    task_id = client.post(f"{PREFIX}/upload", files=files).json()["task_id"]
+    assert client.get(f"{PREFIX}/upload/{task_id}").json()["status"] == "error"
+    pool.shutdown()
+
+def test_ingest_pool_replaces_a_broken_pool(tmp_path):
+    """After a worker crash breaks the pool, the next file is validated on a fresh one."""
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    from concurrent.futures.thread import BrokenThreadPool
+    from backend.ingest_pool import IngestPool
+
+    class BrokenPool(ThreadPoolExecutor):
+        def submit(self, *args, **kwargs):
+            raise BrokenThreadPool("a worker died")
+
+    path = tmp_path / "scan.dcm"
+    path.write_bytes(_dicom_bytes("CT", "P1"))
+    pool = IngestPool(mode="thread", max_workers=1)
+    pool._pool = BrokenPool()
+    with pytest.raises(BrokenThreadPool):
+        asyncio.run(pool.inspect(str(path)))
+    assert pool._pool is None
+    assert asyncio.run(pool.inspect(str(path)))[:3] == (True, "Valid DICOM", "CT")
+    pool.shutdown()
+
+def test_synthetic_image_is_cacheable(client, monkeypatch):
+    """Seed-addressed image URLs return identical, immutable, ETag-validated responses."""
+    monkeypatch.setattr(gan_simulator, "model", MedicalGenerator().eval())
+    monkeypatch.setattr(image_cache, "use_disk", False)
+
+    first = client.get("/api/synthetic/generate/00000000000004d2.png")
+    second = client.get("/api/synthetic/generate/00000000000004d2.png")
+    assert first.status_code == 200
+    assert first.content == second.content
+    assert "immutable" in first.headers["cache-control"]
+
+    revalidated = client.get(
+        "/api/synthetic/generate/00000000000004d2.png",
+        headers={"If-None-Match": first.headers["etag"]},
+    )
+    assert revalidated.status_code == 304
+
+def test_synthetic_image_from_stale_worker_is_not_cached(client, monkeypatch):
+    """An image rendered by a generator other than the current one never lands under the new tag."""
+    from backend.gan_simulator import format_image_id
+    from backend.image_cache import image_cache_key
+    monkeypatch.setattr(gan_simulator, "model", MedicalGenerator().eval())
+    monkeypatch.setattr(image_cache, "use_disk", False)
+    render = gan_simulator.generate_tagged_images
+    # A process worker still serving the weights from before a reload
+    monkeypatch.setattr(gan_simulator, "generate_tagged_images",
+                        lambda seeds, model=None, fmt="png": (render(seeds, model, fmt)[0], "stale-tag"))
+
+    response = client.get("/api/synthetic/generate/00000000000010e1.png")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-store"
+    assert image_cache_key(gan_simulator.model_tag, format_image_id(4321), "png") not in image_cache.memory
+
+def test_synthetic_image_format_negotiation(client, monkeypatch):
+    """The same image id is served as WebP / JPEG on request, each with its own ETag."""
+    monkeypatch.setattr(gan_simulator, "model", MedicalGenerator().eval())
+    monkeypatch.setattr(image_cache, "use_disk", False)
+
+    png = client.get("/api/synthetic/generate/00000000000004d2.png")
+    webp = client.get("/api/synthetic/generate/00000000000004d2.png?format=webp")
+    jpeg = client.get("/api/synthetic/generate/00000000000004d2.png", headers={"Accept": "image/jpeg"})
+    assert webp.headers["content-type"] == "image/webp" and webp.content[8:12] == b"WEBP"
+    assert jpeg.headers["content-type"] == "image/jpeg" and jpeg.content[:2] == b"\xff\xd8"
+    assert len({png.headers["etag"], webp.headers["etag"], jpeg.headers["etag"]}) == 3
+    browser = client.get(
+        "/api/synthetic/generate/00000000000004d2.png",
+        headers={"Accept": "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8"},
+    )
+    assert browser.headers["content-type"] == "image/png" and browser.content == png.content
+    assert client.get("/api/synthetic/generate/00000000000004d2.png?format=gif").status_code == 400
+
+def test_image_tensor_export(client, monkeypatch):
+    """Batches of generator outputs download as .npy / safetensors blobs matching the rendered tensors."""
+    import io
+    import json
+    import struct
+    import numpy as np
+    from backend.tensor_export import TensorExporter
+    monkeypatch.setattr(gan_simulator, "model", MedicalGenerator().eval())
+
+    response = client.get(f"{PREFIX}/generate/tensors?count=5&seed=7&format=npy")
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert int(response.headers["content-length"]) == len(response.content)
+    images = np.load(io.BytesIO(response.content))
+    assert images.shape == (5, 3, 64, 64) and images.dtype == np.float32
+    expected = gan_simulator.generate_image_tensor(TensorExporter.seeds(5, 7)).numpy()
+    assert np.allclose(images, expected, atol=1e-6)
+
+    response = client.get(f"{PREFIX}/generate/tensors?count=3&seed=7&format=safetensors&dtype=uint8")
+    header_length = struct.unpack("<Q", response.content[:8])[0]
+    header = json.loads(response.content[8:8 + header_length])
+    assert header["images"]["dtype"] == "U8" and header["images"]["shape"] == [3, 3, 64, 64]
+    assert len(response.content) == 8 + header_length + 3 * 3 * 64 * 64
+
+def test_generate_endpoint_streams_ndjson(client):
+    """stream=true returns one sample per NDJSON line."""
+    import json
+    patient_data = {"age": 70, "condition": "Glaucoma", "scan_type": "Retinal"}
+    response = client.post(f"{PREFIX}/generate?count=5&stream=true", json=patient_data)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = response.text.strip().split("\n")
+    assert len(lines) == 5
+    assert all(json.loads(line)["demographics"]["age"] == 70 for line in lines)
+
+@pytest.mark.parametrize("export_format", ["parquet", "csv"])
+def test_cohort_export_reads_into_pandas(client, export_format):
+    """Exported cohorts are directly readable as dataframes, one row per sample."""
+    import io
+    import pandas as pd
+    patient_data = {"age": 52, "condition": "Glaucoma", "scan_type": "Retinal"}
+    response = client.post(
+        f"{PREFIX}/export/cohort?count=250&row_group_size=100&format={export_format}",
+        json=patient_data,
+    )
+    assert response.status_code == 200
+    reader = pd.read_parquet if export_format == "parquet" else pd.read_csv
+    frame = reader(io.BytesIO(response.content))
+    assert len(frame) == 250
+    assert (frame["age"] == 52).all()
+    assert set(frame["condition"]) == {"Glaucoma"}
+
+def test_cohort_export_caps_row_group_size(client):
+    """A row group is the unit held in memory, so it can't be sized to the whole cohort."""
+    from backend.cohort_export import MAX_ROW_GROUP_SIZE
+    patient_data = {"age": 52, "condition": "Glaucoma", "scan_type": "Retinal"}
+    response = client.post(
+        f"{PREFIX}/export/cohort?count=10000000&row_group_size={MAX_ROW_GROUP_SIZE + 1}",
+        json=patient_data,
+    )
+    assert response.status_code == 422
+
+def test_seeded_generate_is_reproducible(client):
+    """The same seed yields the same samples; a different seed does not."""
+    patient_data = {"age": 45, "condition": "Glaucoma", "scan_type": "Retinal"}
+    first = client.post(f"{PREFIX}/generate?count=5&seed=7", json=patient_data).json()
+    again = client.post(f"{PREFIX}/generate?count=5&seed=7", json=patient_data).json()
+    other = client.post(f"{PREFIX}/generate?count=5&seed=8", json=patient_data).json()
+    assert first == again
+    assert first != other
+
+def test_generate_columnar_format(client):
+    """format=columnar returns struct-of-arrays with each column named once."""
+    patient_data = {"age": 45, "condition": "Glaucoma", "scan_type": "Retinal"}
+    response = client.post(f"{PREFIX}/generate?count=4&format=columnar", json=patient_data)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 4
+    assert data["constants"]["modality"] == "Retinal"
+    assert data["columns"]["age"] == [45, 45, 45, 45]
+    assert all(len(values) == 4 for values in data["columns"].values())
+
+def test_training_summary_endpoint(client):
+    """The run summary reports the engine and the shared run even before any real training."""
+    response = client.get(f"{PREFIX}/train/summary")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["engine"] == settings.TRAINING_ENGINE
+    assert "running" in data["run"]
+    assert "profile" in data
+
+def test_generate_reports_model_loading(client, monkeypatch):
+    """Samples generated while the generator loads have placeholder images, and the response says so."""
+    from backend import main
+    from backend.models import ModelState
+    main.limiter.reset()
+    monkeypatch.setattr(gan_simulator, "state", ModelState.LOADING)
+    patient_data = {"age": 45, "condition": "Glaucoma", "scan_type": "Retinal"}
+    response = client.post(f"{PREFIX}/generate?count=2", json=patient_data)
+    assert response.status_code == 200
+    assert response.headers["x-model-state"] == "loading"
+    assert all("/api/synthetic/generate/" not in sample["image_url"] for sample in response.json())
+
+@pytest.mark.parametrize("mode", ["", "&stream=true", "&format=columnar"])
+def test_generate_rejects_negative_count(client, mode):
+    """A negative count is a validation error on every response mode, not a server error."""
+    patient_data = {"age": 45, "condition": "Glaucoma", "scan_type": "Retinal"}
+    assert client.post(f"{PREFIX}/generate?count=-1{mode}", json=patient_data).status_code == 422
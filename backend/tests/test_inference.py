@@ -0,0 +1,315 @@
+import asyncio
+import pytest
+import torch
+from backend.gan_simulator import GANSimulator, format_image_id, parse_image_id, split_image_id
+from backend.inference_executor import InferenceExecutor
+from backend.inference_scheduler import InferenceScheduler
+from backend.networks.gan_architecture import MedicalGenerator
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+@pytest.fixture
+def real_simulator():
+    """Simulator backed by a randomly initialised generator (no weights file needed)."""
+    simulator = GANSimulator()
+    simulator.model = MedicalGenerator().eval()
+    return simulator
+
+def test_scheduler_batches_concurrent_requests(real_simulator):
+    """Concurrent submits are served by batched forward passes, one PNG per caller."""
+    scheduler = InferenceScheduler(InferenceExecutor(real_simulator, mode="thread"), max_batch_size=8, max_wait_ms=50)
+
+    async def run():
+        return await asyncio.gather(*[scheduler.submit(seed) for seed in range(10)])
+
+    results = asyncio.run(run())
+    assert len(results) == 10
+    assert all(image.startswith(PNG_SIGNATURE) for image, _ in results)
+    assert {model_tag for _, model_tag in results} == {real_simulator.model_tag}
+    assert scheduler.total_batches == 2
+    assert scheduler.largest_batch == 8
+
+def test_scheduler_propagates_model_errors():
+    """Requests fail with the simulator's error when no model is loaded."""
+    simulator = GANSimulator()
+    simulator.model = None
+    scheduler = InferenceScheduler(InferenceExecutor(simulator, mode="thread"), max_batch_size=4, max_wait_ms=1)
+
+    with pytest.raises(ValueError):
+        asyncio.run(scheduler.submit(1))
+
+def test_executor_keeps_event_loop_responsive(real_simulator):
+    """The event loop keeps ticking while a batch renders on the worker pool."""
+    executor = InferenceExecutor(real_simulator, mode="thread", max_workers=1)
+    ticks = []
+
+    async def heartbeat():
+        for _ in range(3):
+            ticks.append(1)
+            await asyncio.sleep(0)
+
+    async def run():
+        (images, _), _ = await asyncio.gather(executor.render_images(list(range(16))), heartbeat())
+        return images
+
+    images = asyncio.run(run())
+    executor.shutdown()
+    assert len(images) == 16
+    assert len(ticks) == 3
+
+def test_process_executor_reload_restarts_workers():
+    """Process workers hold their own generator: a reload replaces the pool, threads share the simulator."""
+    executor = InferenceExecutor(mode="process", max_workers=1)
+    pool = executor._get_pool()
+    executor.reload()
+    assert executor._pool is None
+    assert pool._shutdown_thread
+    assert executor._get_pool() is not pool
+    executor.shutdown()
+
+    threads = InferenceExecutor(mode="thread", max_workers=1)
+    pool = threads._get_pool()
+    threads.reload()
+    assert threads._get_pool() is pool
+    threads.shutdown()
+
+def test_executor_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        InferenceExecutor(mode="gpu")
+
+def test_same_seed_renders_same_image(real_simulator):
+    """Images are addressed by seed: batch composition does not change the result."""
+    alone = real_simulator.generate_real_images([42])[0]
+    batched = real_simulator.generate_real_images([7, 42, 99])
+    assert batched[1] == alone
+    assert batched[0] != alone
+
+def test_image_id_round_trip():
+    assert parse_image_id(format_image_id(123456789)) == 123456789
+    with pytest.raises(ValueError):
+        parse_image_id("not-a-seed")
+    assert split_image_id(format_image_id(1234, "xray-v2")) == ("xray-v2", 1234)
+    assert split_image_id("00000000000004d2") == (None, 1234)
+
+@pytest.mark.parametrize("backend", ["torchscript", "channels_last", "bf16"])
+def test_inference_backends_match_eager(backend):
+    """Every optimized backend is verified against eager and kept only within tolerance."""
+    from backend.inference_backend import prepare_generator
+    model, report = prepare_generator(MedicalGenerator().eval(), backend, tolerance=0.05)
+    assert report["backend"] == backend
+    assert report["mean_abs_error"] <= 0.05
+    assert model(torch.zeros(2, 100, 1, 1)).shape == (2, 3, 64, 64)
+
+def test_inference_backend_falls_back_to_eager():
+    from backend.inference_backend import prepare_generator
+    reference = MedicalGenerator().eval()
+    model, report = prepare_generator(reference, "bf16", tolerance=-1.0)
+    assert report["backend"] == "eager"
+    assert model is reference
+
+def test_weights_are_memory_mapped(tmp_path, monkeypatch):
+    """Weights load zero-copy from a read-only mapping of the checkpoint, shareable across workers."""
+    from backend.config import settings
+    from backend.models import ModelState
+    weights_path = tmp_path / "generator.pth"
+    torch.save(MedicalGenerator().state_dict(), weights_path)
+    monkeypatch.setattr(settings, "LOW_RESOURCE_MODE", False)
+    monkeypatch.setattr(settings, "INFERENCE_BACKEND", "eager")
+
+    simulator = GANSimulator()
+    simulator.weights_path = str(weights_path)
+    simulator.ensure_loaded()
+    assert simulator.state == ModelState.READY
+    assert simulator.weights_mmapped
+    report = simulator.weights_memory()
+    if report is not None:  # /proc only exists on Linux
+        assert report["mappings"] >= 1
+        assert report["serving_backend_shares_weights"]
+
+def test_registry_evicts_least_recently_used_generator(tmp_path):
+    """Generators load on demand per modality and the LRU one is unloaded above the memory ceiling."""
+    from backend.model_registry import ModelRegistry, model_name
+    for modality in ("xray", "mri"):
+        torch.save(MedicalGenerator().state_dict(), tmp_path / f"generator_{modality}_v1.pth")
+    weights_mb = sum(p.numel() * 4 for p in MedicalGenerator().state_dict().values()) / 2 ** 20
+    registry = ModelRegistry(str(tmp_path), max_memory_mb=weights_mb * 1.5)
+
+    xray = registry.get(model_name("X-Ray", "v1"))
+    assert registry.get("xray-v1") is xray
+    registry.get("mri-v1")
+    assert not registry.is_resident("xray-v1") and registry.is_resident("mri-v1")
+    with pytest.raises(KeyError):
+        registry.get("ct-v1")
+
+    stats = registry.stats()["models"]
+    assert stats["xray-v1"]["hits"] == 1 and stats["xray-v1"]["evictions"] == 1
+    assert stats["mri-v1"]["resident"] and stats["mri-v1"]["last_load_seconds"] > 0
+    # Unknown names leave no trace
+    assert "ct-v1" not in stats and "ct-v1" not in registry._load_locks
+
+def test_scheduler_never_mixes_generators(real_simulator, tmp_path, monkeypatch):
+    """Requests for different models in one collected batch run as separate forward passes."""
+    from backend.config import settings
+    from backend.model_registry import ModelRegistry
+    monkeypatch.setattr(settings, "LOW_RESOURCE_MODE", False)
+    torch.save(MedicalGenerator().state_dict(), tmp_path / "generator_xray_v1.pth")
+    real_simulator.registry = ModelRegistry(str(tmp_path))
+    scheduler = InferenceScheduler(InferenceExecutor(real_simulator, mode="thread"), max_batch_size=8, max_wait_ms=50)
+
+    async def render():
+        return await asyncio.gather(scheduler.submit(5), scheduler.submit(5, "xray-v1"))
+
+    (default_image, default_tag), (xray_image, xray_tag) = asyncio.run(render())
+    assert default_image != xray_image
+    assert xray_image == real_simulator.generate_real_images([5], "xray-v1")[0]
+    assert xray_tag == real_simulator.resolve_model("xray-v1")[1] != default_tag
+    assert scheduler.total_batches == 2
+
+def test_hot_reload_swaps_generator(tmp_path, monkeypatch):
+    """A replaced weights file is picked up by the watcher; renders holding the old generator still work."""
+    import os
+    import time
+    from backend.config import settings
+    monkeypatch.setattr(settings, "LOW_RESOURCE_MODE", False)
+    weights_path = tmp_path / "generator.pth"
+    torch.save(MedicalGenerator().state_dict(), weights_path)
+
+    simulator = GANSimulator()
+    simulator.weights_path = str(weights_path)
+    simulator.ensure_loaded()
+    old_model, old_tag = simulator.resolve_model()
+    old_image = simulator.generate_real_images([3])[0]
+    recycled = []
+    simulator.reload_listeners.append(lambda: recycled.append(simulator.model_tag))
+
+    # Write-then-rename, as a deployment would
+    torch.save(MedicalGenerator().state_dict(), tmp_path / "generator.pth.new")
+    os.replace(tmp_path / "generator.pth.new", weights_path)
+    simulator.start_weights_watcher(interval=0.05)
+    deadline = time.monotonic() + 30
+    while simulator.model_tag == old_tag and time.monotonic() < deadline:
+        time.sleep(0.05)
+    simulator.stop_weights_watcher()
+
+    assert simulator.model_tag != old_tag and simulator.reloads == 1
+    assert recycled == [simulator.model_tag]
+    assert simulator.generate_real_images([3])[0] != old_image
+    assert old_model(torch.zeros(1, 100, 1, 1)).shape == (1, 3, 64, 64)
+
+def test_prerender_pool_serves_batches_from_memory(real_simulator, monkeypatch):
+    """Idle-time pre-rendered seeds are handed out to batches and their images land in the cache."""
+    from backend.image_cache import image_cache, image_cache_key
+    from backend.prerender_pool import PrerenderPool
+    monkeypatch.setattr(image_cache, "use_disk", False)
+    pool = PrerenderPool(real_simulator, InferenceScheduler(InferenceExecutor(real_simulator, mode="thread")),
+                         capacity=8, low_watermark=0.5, idle_ms=0)
+    real_simulator.prerender_pool = pool
+    while pool.refill():
+        pass
+    assert pool.stats()["pools"][real_simulator.default_model] == 8
+
+    batch = real_simulator.generate_batch(10)
+    assert pool.hits == 8 and pool.misses == 2
+    cached = image_cache.memory.get(image_cache_key(real_simulator.model_tag, format_image_id(int(batch.image_ids[0]))))
+    assert cached == real_simulator.generate_real_images([int(batch.image_ids[0])])[0]
+
+    # A reload landing between the staleness check and the render: the images carry the new tag
+    render = real_simulator.generate_tagged_image_tensor
+    monkeypatch.setattr(real_simulator, "generate_tagged_image_tensor",
+                        lambda seeds, model=None: (render(seeds, model)[0], "reloaded-tag"))
+    assert pool.refill() == 8
+    seed = pool.take(real_simulator.default_model, 1)[0][0]
+    assert image_cache_key("reloaded-tag", format_image_id(seed)) in image_cache.memory
+
+def test_image_disk_cache_evicts_least_recently_used(tmp_path):
+    """The disk tier stays within its size cap, deleting the least recently used images first."""
+    import os
+    from backend.image_cache import ImageCache
+    cache = ImageCache(str(tmp_path), max_memory_mb=0, use_disk=True, max_disk_mb=10_000 / 2 ** 20)
+    keys = [f"tag_{index:016x}.png" for index in range(10)]
+    for index, key in enumerate(keys):
+        cache.put_disk(key, bytes(1000))
+        os.utime(cache._path(key), (index, index))
+    assert cache.disk_evictions == 0
+
+    # A disk hit makes the oldest image the most recently used one
+    assert asyncio.run(cache.get(keys[0])) == bytes(1000)
+    cache.put_disk("tag_00000000000000ff.png", bytes(1000))
+    assert cache.disk_evictions == 2
+    assert [os.path.exists(cache._path(key)) for key in keys[:4]] == [True, False, False, True]
+
+def test_png_encoder_matches_save_image(real_simulator):
+    """The vectorized uint8 path produces exactly the PNGs torchvision's save_image did."""
+    import io
+    from torchvision.utils import save_image
+    from backend.utils.image_encoder import ImageEncoder, to_uint8
+    images = real_simulator.model(torch.stack([GANSimulator.latent_for_seed(seed) for seed in (1, 2)])).detach()
+    encoded = ImageEncoder(png_compress_level=6).encode_batch(to_uint8(images), "png")
+    for image, png in zip(images, encoded):
+        buffer = io.BytesIO()
+        save_image(image, buffer, format="PNG", normalize=True)
+        assert png == buffer.getvalue()
+
+@pytest.mark.parametrize("requested, accept, expected", [
+    (None, None, "png"),
+    (None, "*/*", "png"),
+    # Chrome's <img> Accept header: WebP is listed, but not preferred over PNG
+    (None, "image/avif,image/webp,image/apng,image/*,*/*;q=0.8", "png"),
+    (None, "image/png;q=0, */*", "png"),
+    (None, "image/webp,image/png;q=0.9", "webp"),
+    (None, "image/webp", "webp"),
+    (None, "image/jpeg, image/png;q=0.5", "jpeg"),
+    ("jpg", "image/webp", "jpeg"),
+])
+def test_image_format_negotiation(requested, accept, expected):
+    from backend.utils.image_encoder import negotiate_format
+    assert negotiate_format(requested, accept) == expected
+
+def test_autotune_calibrates_persists_and_applies(tmp_path, monkeypatch):
+    """The calibration picks a grid point, survives a reload from disk and resizes scheduler batches."""
+    from backend.config import settings
+    from backend.inference_autotune import InferenceAutotuner
+    monkeypatch.setattr(settings, "INFERENCE_MAX_BATCH_SIZE", settings.INFERENCE_MAX_BATCH_SIZE)
+    monkeypatch.setattr(torch, "set_num_threads", lambda threads: None)
+    scheduler = InferenceScheduler(InferenceExecutor(mode="thread"), max_batch_size=32)
+    autotuner = InferenceAutotuner(str(tmp_path / "autotune.json"), scheduler, latency_target_ms=10_000)
+    report = autotuner.calibrate(MedicalGenerator().eval(), thread_counts=[1], batch_sizes=[1, 4], iterations=2)
+
+    assert len(report["results"]) == 2
+    assert report["best"] in [{"threads": r["threads"], "batch_size": r["batch_size"]} for r in report["results"]]
+    reloaded = InferenceAutotuner(str(tmp_path / "autotune.json"), scheduler).load()
+    assert reloaded["best"] == report["best"]
+    autotuner.apply(reloaded)
+    assert scheduler.max_batch_size == report["best"]["batch_size"]
+
+def test_quality_scorer_ranks_flat_images_lowest():
+    """Scores are computed for the whole batch and stay within the image_quality_score range."""
+    from backend.quality_scorer import QualityScorer
+    flat = torch.zeros(1, 3, 64, 64)
+    textured = torch.rand(3, 3, 64, 64) * 2 - 1
+    scores = QualityScorer().score(torch.cat([flat, textured]))
+    assert scores.shape == (4,)
+    assert scores[0] == 1.0
+    assert all(1.0 < score <= 5.0 for score in scores[1:])
+
+def test_quality_stage_regenerates_rejected_images(real_simulator, monkeypatch):
+    """Below-threshold images get new seeds; their measured scores replace the simulated random range."""
+    import numpy as np
+    from backend.config import settings
+    from backend.quality_scorer import quality_scorer
+    monkeypatch.setattr(settings, "QUALITY_SCORING", True)
+    monkeypatch.setattr(settings, "QUALITY_MIN_SCORE", 5.0)
+    monkeypatch.setattr(settings, "QUALITY_MAX_RETRIES", 1)
+    rejected_before = quality_scorer.rejected
+
+    batch = real_simulator.generate_batch(4, rng=np.random.default_rng(3))
+    assert quality_scorer.rejected - rejected_before == 4
+    # The kept images were rendered once, by the quality stage, and are already cached
+    from backend.image_cache import image_cache, image_cache_key
+    from backend.sample_batch import format_image_id
+    _, model_tag = real_simulator.resolve_model(None)
+    assert all(image_cache.memory.get(image_cache_key(model_tag, format_image_id(seed))) for seed in batch.image_ids.tolist())
+
+    monkeypatch.setattr(settings, "QUALITY_MIN_SCORE", 0.0)
+    rescored = real_simulator.score_images(batch.image_ids.copy(), None, np.random.default_rng(0))
+    assert np.array_equal(batch.image_quality_scores, rescored)
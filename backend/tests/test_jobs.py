@@ -0,0 +1,78 @@
+import json
+import time
+import pytest
+from backend.job_manager import JobManager
+from backend.models import GenerationJobSpec, JobStatus, PatientData
+
+def wait_for(job_manager, job_id, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = job_manager.get(job_id)
+        if job.status not in (JobStatus.QUEUED, JobStatus.RUNNING):
+            return job
+        time.sleep(0.05)
+    raise TimeoutError(f"Job {job_id} did not finish")
+
+@pytest.fixture
+def job_manager(tmp_path):
+    manager = JobManager(max_workers=1, chunk_size=40, jobs_dir=str(tmp_path))
+    yield manager
+    manager.shutdown()
+
+def test_job_runs_in_chunks_and_streams_result(job_manager):
+    """A job is generated chunk by chunk on the worker pool and its result downloads as NDJSON."""
+    spec = GenerationJobSpec(patient_data=PatientData(age=33, condition="Glaucoma", scan_type="MRI"), count=100)
+    job = job_manager.submit(spec, "testuser")
+
+    job = wait_for(job_manager, job.id)
+    assert job.status == JobStatus.COMPLETED
+    assert job.completed_count == 100
+    assert job.progress == 1.0
+
+    lines = b"".join(job_manager.iter_result(job.id)).decode().strip().split("\n")
+    assert len(lines) == 100
+    assert all(json.loads(line)["demographics"]["age"] == 33 for line in lines)
+
+def test_reload_recycles_job_workers(job_manager):
+    """Job workers load the generator once: a model reload replaces the pool for the next chunks."""
+    pool = job_manager._get_pool()
+    job_manager.reload()
+    assert job_manager._get_pool() is not pool
+
+def test_job_cancellation(job_manager):
+    spec = GenerationJobSpec(patient_data=PatientData(age=33, condition="Glaucoma", scan_type="MRI"), count=4000)
+    job = job_manager.submit(spec, "testuser")
+    job_manager.cancel(job.id)
+    assert job_manager.get(job.id).status == JobStatus.CANCELLED
+    assert job_manager.get(job.id).completed_count < 4000
+
+def test_finished_jobs_are_pruned_and_deletable(tmp_path):
+    """Finished jobs expire after the retention time or beyond the per-user limit; results can be deleted."""
+    from datetime import timedelta
+    manager = JobManager(max_workers=1, chunk_size=40, jobs_dir=str(tmp_path), retention_seconds=3600, max_per_user=2)
+    spec = GenerationJobSpec(patient_data=PatientData(age=33, condition="Glaucoma", scan_type="MRI"), count=10)
+    try:
+        jobs = [wait_for(manager, manager.submit(spec, "testuser").id) for _ in range(3)]
+        # Only the two newest finished jobs of the user are kept
+        assert [job.id for job in manager.list_jobs("testuser")] == [jobs[2].id, jobs[1].id]
+        assert not (tmp_path / jobs[0].id).exists()
+
+        jobs[1].finished_at -= timedelta(hours=2)
+        assert manager.prune() == 1
+        assert manager.get(jobs[1].id) is None and not (tmp_path / jobs[1].id).exists()
+
+        # A result being downloaded is neither pruned nor deleted until the stream is released
+        stream = manager.iter_result(jobs[2].id)
+        jobs[2].finished_at -= timedelta(hours=2)
+        assert manager.prune() == 0
+        manager.delete(jobs[2].id)
+        assert manager.get(jobs[2].id) is not None
+        assert len(b"".join(stream).splitlines()) == 10
+        del stream
+
+        assert manager.delete(jobs[2].id).status == JobStatus.COMPLETED
+        assert manager.list_jobs() == [] and not (tmp_path / jobs[2].id).exists()
+        with pytest.raises(KeyError):
+            manager.iter_result(jobs[2].id)
+    finally:
+        manager.shutdown()
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+from backend.gan_simulator import GANSimulator
+from backend.models import ModelState
+from backend.utils.lazy import LazyObject
+
+def test_lazy_object_builds_on_first_use():
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {"admin": 1}
+
+    db = LazyObject(build)
+    assert not db.is_initialized
+    assert calls == []
+    assert "admin" in db
+    assert db["admin"] == 1
+    assert len(calls) == 1
+
+def test_lazy_object_initializes_in_background():
+    db = LazyObject(lambda: {"admin": 1})
+    db.initialize_in_background().join(timeout=5)
+    assert db.is_initialized
+
+def test_generator_loads_on_demand():
+    """Constructing the simulator is free; weights load on ensure_loaded / background load."""
+    simulator = GANSimulator()
+    assert simulator.state == ModelState.PENDING
+    simulator.start_background_load().join(timeout=30)
+    assert simulator.state in (ModelState.SIMULATION, ModelState.READY)
+
+def test_importing_app_defers_heavy_modules():
+    probe = "import sys, backend.main; print(sorted(m for m in ('torch', 'torchvision', 'pandas') if m in sys.modules))"
+    root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    result = subprocess.run([sys.executable, "-c", probe], cwd=root_dir, capture_output=True, text=True, check=True)
+    assert result.stdout.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import threading
+
+import numpy as np
+
+from backend.models import TrainingMetrics
+from backend.training_broadcaster import TrainingBroadcaster
+
+
+class GatedTrainer:
+    """Yields one epoch each time the test releases it, so runs are deterministic."""
+    def __init__(self, epochs: int):
+        self.epochs = epochs
+        self.gate = threading.Semaphore(0)
+        self.runs = 0
+
+    def train(self):
+        self.runs += 1
+        for epoch in range(1, self.epochs + 1):
+            self.gate.acquire()
+            yield TrainingMetrics(epoch=epoch, loss=1.0, accuracy=0.5, discriminator_loss=0.5, generator_loss=0.5)
+
+
+def test_subscribers_share_one_run_and_resume():
+    """Late and reconnecting subscribers replay from history; neither starts nor stops the run."""
+    trainer = GatedTrainer(epochs=4)
+    broadcaster = TrainingBroadcaster(trainer, history_size=10)
+
+    async def collect(last_event_id=None, limit=None):
+        events = []
+        async for event in broadcaster.subscribe(last_event_id):
+            events.append(event)
+            if limit and len(events) == limit:
+                break
+        return events
+
+    async def run():
+        assert broadcaster.ensure_running()
+        first = asyncio.ensure_future(collect())
+        for _ in range(2):
+            trainer.gate.release()
+        # A client that sees one epoch and disconnects
+        leaver = await collect(limit=1)
+        assert not broadcaster.ensure_running()
+        late = asyncio.ensure_future(collect())
+        resumed = asyncio.ensure_future(collect(last_event_id=leaver[0].id))
+        for _ in range(2):
+            trainer.gate.release()
+        return leaver, await first, await late, await resumed
+
+    leaver, first, late, resumed = asyncio.run(run())
+
+    assert trainer.runs == 1
+    assert [event.event for event in first] == ["message"] * 4 + ["complete"]
+    assert [event.id for event in late] == [event.id for event in first]
+    assert [event.id for event in resumed] == [event.id for event in first[1:]]
+    assert '"status": "completed"' in first[-1].data
+    assert "id: 1\ndata: " in first[0].to_sse()
+
+    stats = broadcaster.stats()
+    assert stats["running"] is False
+    assert stats["subscribers"] == 0
+    assert stats["runs_started"] == 1
+
+
+def test_training_engine_caches_checkpoints_and_resumes(tmp_path):
+    """Real training decodes uploads once into the tensor cache and resumes an unfinished run."""
+    from PIL import Image
+    from backend.training_engine import TrainingEngine
+
+    rng = np.random.default_rng(0)
+    paths = []
+    for index in range(6):
+        path = tmp_path / f"scan_{index}.png"
+        Image.fromarray(rng.integers(0, 255, size=(80, 96, 3), dtype=np.uint8)).save(path)
+        paths.append(str(path))
+    (tmp_path / "broken.jpeg").write_bytes(b"not an image")
+    paths.append(str(tmp_path / "broken.jpeg"))
+
+    training_dir = str(tmp_path / "training")
+    engine = TrainingEngine(training_dir, epochs=2, batch_size=4, workers=0, checkpoint_every=1)
+    first = list(engine.train(paths))
+    assert [metrics.epoch for metrics in first] == [1, 2]
+    assert 0.0 <= first[-1].accuracy <= 1.0
+    assert first[-1].samples_per_sec > 0
+    assert first[-1].step_times.steps == 1
+    assert 0.0 <= first[-1].data_wait_fraction <= 1.0
+    assert first[-1].peak_rss_mb > 0
+
+    dataset = engine.prepare(paths)
+    assert len(dataset) == 6
+    assert tuple(dataset[[0, 5]].shape) == (2, 3, 64, 64)
+
+    # Stop after the first epoch of a longer run, then pick it up again
+    longer = TrainingEngine(training_dir, epochs=4, batch_size=4, workers=0, checkpoint_every=10)
+    run = longer.train(paths)
+    assert next(run).epoch == 3
+    run.close()
+    assert [metrics.epoch for metrics in longer.train(paths)] == [4]
+    assert os.path.exists(longer.generator_path)
+
+    profile = longer.profiler.summary()
+    assert profile["first_epoch"] == 4 and profile["epochs_completed"] == 1
+    assert profile["samples"] == 4 and profile["bound"] in ("data", "compute")
+    assert profile["finished_at"] is not None
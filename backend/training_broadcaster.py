@@ -0,0 +1,151 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, Optional, Set, Tuple
+
+from .config import settings
+
+
+@dataclass(frozen=True)
+class TrainingEvent:
+    """One published message of a training run. `event` is the SSE event type."""
+    id: int
+    run: int
+    event: str
+    data: str
+
+    def to_sse(self) -> str:
+        prefix = f"event: {self.event}\n" if self.event != "message" else ""
+        return f"{prefix}id: {self.id}\ndata: {self.data}\n\n"
+
+
+class TrainingBroadcaster:
+    """
+    Runs at most one training loop at a time on a background thread and publishes every epoch's
+    metrics to a broadcast channel: a bounded history of events with increasing ids.
+    Any number of subscribers read the channel independently - a new subscriber gets a replay of
+    the run's recent epochs, a reconnecting one (Last-Event-ID) resumes after the last id it saw.
+    Subscribers never drive or block the loop, so they can come and go without affecting the run.
+    """
+    def __init__(self, simulator=None, history_size: int = None):
+        self._simulator = simulator
+        self.history_size = settings.TRAINING_HISTORY_SIZE if history_size is None else history_size
+        self._history: Deque[TrainingEvent] = deque(maxlen=max(1, self.history_size))
+        self._lock = threading.Lock()
+        self._subscribers: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self._last_id = 0
+        self.run = 0
+        self.running = False
+        self.runs_started = 0
+        self.run_started_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def simulator(self):
+        if self._simulator is None:
+            from .gan_simulator import gan_simulator
+            self._simulator = gan_simulator
+        return self._simulator
+
+    def ensure_running(self) -> bool:
+        """Start a training run unless one is active. Returns True if this call started it."""
+        with self._lock:
+            if self.running:
+                return False
+            self.running = True
+            self.run += 1
+            self.runs_started += 1
+            self.run_started_at = time.time()
+            self.last_error = None
+            self._history.clear()
+            run = self.run
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(run,), name="gan-training", daemon=True)
+        self._thread.start()
+        return True
+
+    def _publish(self, run: int, event: str, data: str):
+        with self._lock:
+            self._last_id += 1
+            self._history.append(TrainingEvent(self._last_id, run, event, data))
+            if event != "message":
+                self.running = False
+            subscribers = list(self._subscribers)
+        for loop, wakeup in subscribers:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                # The subscriber's event loop is gone; it is removed when its generator is closed
+                pass
+
+    def _run(self, run: int):
+        epochs = 0
+        try:
+            for metrics in self.simulator.train():
+                epochs = metrics.epoch
+                self._publish(run, "message", metrics.model_dump_json())
+                if self._stop.is_set():
+                    break
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"⚠️ Training run {run} failed: {e}")
+            self._publish(run, "error", json.dumps({"run": run, "epochs": epochs, "error": str(e)}))
+            return
+        status = "stopped" if self._stop.is_set() else "completed"
+        self._publish(run, "complete", json.dumps({"run": run, "epochs": epochs, "status": status}))
+
+    def stop(self):
+        """Ask the active run to end after its current epoch."""
+        self._stop.set()
+
+    async def subscribe(self, last_event_id: Optional[int] = None) -> AsyncIterator[TrainingEvent]:
+        """
+        Events of the current run: those still in history after `last_event_id` (all of them
+        without one), then live ones. Ends after the run's final complete / error event.
+        """
+        wakeup = asyncio.Event()
+        subscriber = (asyncio.get_running_loop(), wakeup)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            run = self.run
+        cursor = last_event_id or 0
+        try:
+            while True:
+                wakeup.clear()
+                with self._lock:
+                    pending = [event for event in self._history if event.run == run and event.id > cursor]
+                for event in pending:
+                    yield event
+                    cursor = event.id
+                    if event.event != "message":
+                        return
+                if not pending:
+                    await wakeup.wait()
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+    def stats(self) -> dict:
+        with self._lock:
+            history = [event for event in self._history if event.run == self.run]
+            return {
+                "run": self.run,
+                "running": self.running,
+                "runs_started": self.runs_started,
+                "run_started_at": self.run_started_at,
+                "subscribers": len(self._subscribers),
+                "events_published": self._last_id,
+                "history": len(history),
+                "history_size": self.history_size,
+                "last_event_id": history[-1].id if history else None,
+                "last_error": self.last_error,
+            }
+
+# Global Instance
+training_broadcaster = TrainingBroadcaster()
@@ -0,0 +1,415 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Generator, List, Optional
+
+import numpy as np
+
+from .config import settings
+from .models import StepTimings, TrainingMetrics
+from .upload_manager import upload_manager
+from .utils.lazy import lazy_import
+from .utils.memory_report import peak_rss_mb
+from .utils.process_pool import spawn_context
+
+torch = lazy_import("torch")
+Image = lazy_import("PIL.Image")
+pydicom = lazy_import("pydicom")
+
+TRAINING_DIR = os.path.join(settings.GENERATED_DIR, "training")
+# MedicalGenerator's output resolution; training images are decoded straight to it
+IMAGE_SIZE = 64
+LATENT_DIM = 100
+# Images decoded per thread-pool round while building the tensor cache
+DECODE_CHUNK = 256
+
+
+def decode_image(path: str, size: int = IMAGE_SIZE) -> np.ndarray:
+    """
+    One uploaded image (JPEG / PNG / DICOM) -> (3, size, size) uint8, center-cropped to a square.
+    JPEGs are decoded at a reduced scale by libjpeg (draft mode), so multi-megapixel fundus
+    photos never get decoded at full resolution.
+    """
+    if path.lower().endswith(".dcm"):
+        pixels = pydicom.dcmread(path).pixel_array.astype(np.float32)
+        if pixels.ndim == 3 and pixels.shape[-1] not in (3, 4):
+            pixels = pixels[0]  # multi-frame: first frame
+        pixels = np.maximum(pixels, 0)
+        peak = pixels.max()
+        pixels = pixels / peak * 255.0 if peak > 0 else pixels
+        image = Image.fromarray(pixels.astype(np.uint8))
+    else:
+        image = Image.open(path)
+        image.draft("RGB", (size, size))
+    image = image.convert("RGB")
+    width, height = image.size
+    side = min(width, height)
+    left, top = (width - side) // 2, (height - side) // 2
+    image = image.resize((size, size), Image.BILINEAR, box=(left, top, left + side, top + side))
+    return np.asarray(image).transpose(2, 0, 1)
+
+
+def cache_fingerprint(paths: List[str], size: int = IMAGE_SIZE) -> str:
+    """Identifies a set of source files (path, size, mtime) at a resolution; any change rebuilds the cache."""
+    digest = hashlib.sha1(f"{size}".encode())
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"\0{path}\0{stat.st_size}\0{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+
+class CachedImageBatches:
+    """
+    Map-style dataset over the (N, 3, S, S) uint8 tensor cache, indexed by whole batches
+    (a list of indices from a BatchSampler): one memmap gather per batch, read in file order.
+    Batches stay uint8 across the worker -> trainer hop (4x less than float32) and are scaled
+    to [-1, 1] by the trainer. The memmap is opened lazily in each loader worker.
+    """
+    def __init__(self, path: str, count: int, size: int = IMAGE_SIZE):
+        self.path = path
+        self.count = count
+        self.size = size
+        self._images = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, indices) -> "torch.Tensor":
+        if self._images is None:
+            self._images = np.memmap(self.path, dtype=np.uint8, mode="r", shape=(self.count, 3, self.size, self.size))
+        return torch.from_numpy(self._images[np.sort(np.asarray(indices))])
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_images"] = None
+        return state
+
+
+class TensorCache:
+    """
+    Uploaded images decoded and resized once into a single uint8 file under
+    `generated/training/cache`, named by the fingerprint of its sources, so every epoch
+    after the first preprocessing pass reads pre-decoded pixels instead of JPEGs.
+    """
+    def __init__(self, cache_dir: str = None, size: int = IMAGE_SIZE):
+        self.cache_dir = cache_dir or os.path.join(TRAINING_DIR, "cache")
+        self.size = size
+
+    def build(self, paths: List[str], workers: int = None) -> CachedImageBatches:
+        """The cache for `paths`, decoding them first if it doesn't exist yet. Undecodable files are skipped."""
+        fingerprint = cache_fingerprint(paths, self.size)
+        data_path = os.path.join(self.cache_dir, f"{fingerprint}.u8")
+        meta_path = os.path.join(self.cache_dir, f"{fingerprint}.json")
+        if os.path.exists(meta_path) and os.path.exists(data_path):
+            with open(meta_path) as in_file:
+                meta = json.load(in_file)
+            return CachedImageBatches(data_path, meta["count"], self.size)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        start = time.perf_counter()
+        count, skipped = 0, []
+
+        def decode(path):
+            try:
+                return decode_image(path, self.size)
+            except Exception as e:
+                print(f"Skipping undecodable training image {path}: {e}")
+                return None
+
+        tmp_path = f"{data_path}.tmp"
+        # Pillow releases the GIL while decoding, so threads scale across cores
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool, open(tmp_path, "wb") as out_file:
+            for offset in range(0, len(paths), DECODE_CHUNK):
+                chunk = paths[offset:offset + DECODE_CHUNK]
+                for path, pixels in zip(chunk, pool.map(decode, chunk)):
+                    if pixels is None:
+                        skipped.append(path)
+                        continue
+                    out_file.write(np.ascontiguousarray(pixels).tobytes())
+                    count += 1
+        os.replace(tmp_path, data_path)
+        with open(meta_path, "w") as out_file:
+            json.dump({
+                "count": count,
+                "size": self.size,
+                "skipped": skipped,
+                "built_seconds": round(time.perf_counter() - start, 2),
+            }, out_file, indent=2)
+        print(f"✅ Training tensor cache: {count} images decoded in {time.perf_counter() - start:.1f}s ({len(skipped)} skipped)")
+        return CachedImageBatches(data_path, count, self.size)
+
+
+def step_timings(seconds: List[float]) -> Optional[StepTimings]:
+    if not seconds:
+        return None
+    ms = np.asarray(seconds) * 1000
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    return StepTimings(
+        steps=len(ms),
+        mean_ms=round(float(ms.mean()), 3),
+        p50_ms=round(float(p50), 3),
+        p90_ms=round(float(p90), 3),
+        p99_ms=round(float(p99), 3),
+        max_ms=round(float(ms.max()), 3),
+    )
+
+
+class TrainingProfiler:
+    """
+    Per-step timings of a training run, split into data-loader wait (blocked on the next batch)
+    and compute (forward / backward / optimizer). Summarized per epoch for TrainingMetrics
+    and for the whole run by summary(): a run is data-bound when loader wait dominates.
+    """
+    # Data wait share of step time above which a run is reported as data-bound
+    DATA_BOUND_FRACTION = 0.5
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, batch_size: int = None, workers: int = None):
+        with self._lock:
+            self.started_at = time.time()
+            self.finished_at = None
+            self.batch_size = batch_size
+            self.workers = workers
+            self.first_epoch = None
+            self._wait: List[float] = []
+            self._compute: List[float] = []
+            self._samples = 0
+            self._epoch_start = (0, 0, time.perf_counter())
+            self.epochs: List[dict] = []
+
+    def start_epoch(self, epoch: int):
+        with self._lock:
+            if self.first_epoch is None:
+                self.first_epoch = epoch
+            self._epoch_start = (len(self._wait), self._samples, time.perf_counter())
+
+    def record_step(self, wait: float, compute: float, samples: int):
+        with self._lock:
+            self._wait.append(wait)
+            self._compute.append(compute)
+            self._samples += samples
+
+    def end_epoch(self, epoch: int) -> dict:
+        """Telemetry fields of TrainingMetrics for the epoch that just ended."""
+        with self._lock:
+            first_step, first_sample, started = self._epoch_start
+            elapsed = time.perf_counter() - started
+            wait, compute = self._wait[first_step:], self._compute[first_step:]
+            samples = self._samples - first_sample
+            telemetry = self._telemetry(wait, compute, samples, elapsed)
+            self.epochs.append({"epoch": epoch, "seconds": round(elapsed, 3), **telemetry})
+        return {**telemetry, "step_times": step_timings([w + c for w, c in zip(wait, compute)])}
+
+    @staticmethod
+    def _telemetry(wait: List[float], compute: List[float], samples: int, elapsed: float) -> dict:
+        wait_total, compute_total = sum(wait), sum(compute)
+        busy = wait_total + compute_total
+        return {
+            "samples_per_sec": round(samples / elapsed, 2) if elapsed else None,
+            "data_wait_seconds": round(wait_total, 3),
+            "compute_seconds": round(compute_total, 3),
+            "data_wait_fraction": round(wait_total / busy, 4) if busy else None,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+    def finish(self):
+        with self._lock:
+            self.finished_at = time.time()
+
+    def summary(self) -> Optional[dict]:
+        """Profile of the whole run (None before the first run)."""
+        with self._lock:
+            if self.first_epoch is None:
+                return None
+            wait, compute, samples = list(self._wait), list(self._compute), self._samples
+            epochs = list(self.epochs)
+            elapsed = sum(epoch["seconds"] for epoch in epochs)
+            finished_at = self.finished_at
+        telemetry = self._telemetry(wait, compute, samples, elapsed)
+        fraction = telemetry["data_wait_fraction"]
+        return {
+            "started_at": self.started_at,
+            "finished_at": finished_at,
+            "batch_size": self.batch_size,
+            "loader_workers": self.workers,
+            "first_epoch": self.first_epoch,
+            "epochs_completed": len(epochs),
+            "samples": samples,
+            **telemetry,
+            "bound": None if fraction is None else ("data" if fraction > self.DATA_BOUND_FRACTION else "compute"),
+            "step_times": step_timings([w + c for w, c in zip(wait, compute)]),
+            "epochs": epochs,
+        }
+
+
+class TrainingEngine:
+    """
+    Adversarial training of MedicalGenerator against MedicalDiscriminator on the uploaded images.
+    Data comes from the TensorCache through a multi-worker DataLoader yielding whole uint8 batches;
+    a checkpoint (both networks + optimizers) is written every `checkpoint_every` epochs and when
+    the run is interrupted, and an unfinished run over the same images resumes from it.
+    The trained generator's state dict ends up in `generated/training/generator.pth`.
+    """
+    def __init__(self, training_dir: str = TRAINING_DIR, epochs: int = None, batch_size: int = None,
+                 workers: int = None, checkpoint_every: int = None, learning_rate: float = None):
+        self.training_dir = training_dir
+        self.epochs = epochs or settings.TRAINING_EPOCHS
+        self.batch_size = batch_size or settings.TRAINING_BATCH_SIZE
+        self.workers = settings.TRAINING_LOADER_WORKERS if workers is None else workers
+        self.checkpoint_every = max(1, checkpoint_every or settings.TRAINING_CHECKPOINT_EVERY)
+        self.learning_rate = learning_rate or settings.TRAINING_LEARNING_RATE
+        self.cache = TensorCache(os.path.join(training_dir, "cache"))
+        self.profiler = TrainingProfiler()
+
+    @property
+    def checkpoint_path(self) -> str:
+        return os.path.join(self.training_dir, "checkpoint.pth")
+
+    @property
+    def generator_path(self) -> str:
+        return os.path.join(self.training_dir, "generator.pth")
+
+    def prepare(self, paths: List[str] = None) -> CachedImageBatches:
+        paths = upload_manager.list_images() if paths is None else paths
+        if not paths:
+            raise ValueError("No uploaded images to train on")
+        dataset = self.cache.build(paths)
+        if len(dataset) == 0:
+            raise ValueError("None of the uploaded images could be decoded")
+        return dataset
+
+    def _loader(self, dataset: CachedImageBatches) -> "torch.utils.data.DataLoader":
+        batch_size = min(self.batch_size, len(dataset))
+        sampler = torch.utils.data.BatchSampler(
+            torch.utils.data.RandomSampler(dataset), batch_size=batch_size, drop_last=True
+        )
+        options = {}
+        if self.workers > 0:
+            options = {
+                "num_workers": self.workers,
+                "persistent_workers": True,
+                "prefetch_factor": 4,
+                "multiprocessing_context": spawn_context(),
+            }
+        # batch_size=None: each sampler item is already a whole batch of indices
+        return torch.utils.data.DataLoader(dataset, batch_size=None, sampler=sampler, **options)
+
+    def save_checkpoint(self, epoch: int, fingerprint: str, generator, discriminator, opt_g, opt_d):
+        os.makedirs(self.training_dir, exist_ok=True)
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        torch.save({
+            "epoch": epoch,
+            "epochs": self.epochs,
+            "fingerprint": fingerprint,
+            "generator": generator.state_dict(),
+            "discriminator": discriminator.state_dict(),
+            "opt_g": opt_g.state_dict(),
+            "opt_d": opt_d.state_dict(),
+        }, tmp_path)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def load_checkpoint(self, fingerprint: str) -> Optional[dict]:
+        """The checkpoint of an unfinished run over the same images, if there is one."""
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        try:
+            checkpoint = torch.load(self.checkpoint_path, map_location="cpu", weights_only=True)
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable training checkpoint {self.checkpoint_path}: {e}")
+            return None
+        if checkpoint.get("fingerprint") != fingerprint or checkpoint["epoch"] >= self.epochs:
+            return None
+        return checkpoint
+
+    def train(self, paths: List[str] = None) -> Generator[TrainingMetrics, None, None]:
+        """Train for `epochs` epochs (minus those already done by a resumed run), yielding metrics per epoch."""
+        from .networks.gan_architecture import MedicalDiscriminator, MedicalGenerator
+
+        dataset = self.prepare(paths)
+        fingerprint = os.path.splitext(os.path.basename(dataset.path))[0]
+        generator, discriminator = MedicalGenerator().train(), MedicalDiscriminator().train()
+        opt_g = torch.optim.Adam(generator.parameters(), lr=self.learning_rate, betas=(0.5, 0.999))
+        opt_d = torch.optim.Adam(discriminator.parameters(), lr=self.learning_rate, betas=(0.5, 0.999))
+        criterion = torch.nn.BCEWithLogitsLoss()
+
+        start_epoch = 0
+        checkpoint = self.load_checkpoint(fingerprint)
+        if checkpoint is not None:
+            generator.load_state_dict(checkpoint["generator"])
+            discriminator.load_state_dict(checkpoint["discriminator"])
+            opt_g.load_state_dict(checkpoint["opt_g"])
+            opt_d.load_state_dict(checkpoint["opt_d"])
+            start_epoch = checkpoint["epoch"]
+            print(f"✅ Resuming training from epoch {start_epoch}")
+
+        loader = self._loader(dataset)
+        completed, saved = start_epoch, start_epoch
+        self.profiler.reset(loader.sampler.batch_size, self.workers)
+        try:
+            for epoch in range(start_epoch + 1, self.epochs + 1):
+                d_total, g_total, correct, seen, batches = 0.0, 0.0, 0, 0, 0
+                self.profiler.start_epoch(epoch)
+                batches_iter = iter(loader)
+                while True:
+                    waited = time.perf_counter()
+                    real = next(batches_iter, None)
+                    if real is None:
+                        break
+                    computed = time.perf_counter()
+                    real = real.float().div_(127.5).sub_(1.0)
+                    count = real.shape[0]
+                    ones, zeros = torch.ones(count), torch.zeros(count)
+                    fake = generator(torch.randn(count, LATENT_DIM, 1, 1))
+
+                    d_real = discriminator(real)
+                    d_fake = discriminator(fake.detach())
+                    d_loss = criterion(d_real, ones) + criterion(d_fake, zeros)
+                    opt_d.zero_grad(set_to_none=True)
+                    d_loss.backward()
+                    opt_d.step()
+
+                    g_loss = criterion(discriminator(fake), ones)
+                    opt_g.zero_grad(set_to_none=True)
+                    g_loss.backward()
+                    opt_g.step()
+
+                    d_total += d_loss.item()
+                    g_total += g_loss.item()
+                    correct += int((d_real > 0).sum()) + int((d_fake < 0).sum())
+                    seen += 2 * count
+                    batches += 1
+                    self.profiler.record_step(computed - waited, time.perf_counter() - computed, count)
+
+                telemetry = self.profiler.end_epoch(epoch)
+                completed = epoch
+                if epoch % self.checkpoint_every == 0 or epoch == self.epochs:
+                    self.save_checkpoint(epoch, fingerprint, generator, discriminator, opt_g, opt_d)
+                    saved = epoch
+                discriminator_loss, generator_loss = d_total / max(1, batches), g_total / max(1, batches)
+                yield TrainingMetrics(
+                    epoch=epoch,
+                    loss=generator_loss + discriminator_loss,
+                    # Discriminator accuracy on real + fake images: drifts to 0.5 as the generator catches up
+                    accuracy=correct / max(1, seen),
+                    discriminator_loss=discriminator_loss,
+                    generator_loss=generator_loss,
+                    **telemetry,
+                )
+        finally:
+            self.profiler.finish()
+            # Interrupted (run stopped / client code closed the generator): keep the finished epochs
+            if completed > saved:
+                self.save_checkpoint(completed, fingerprint, generator, discriminator, opt_g, opt_d)
+
+        os.makedirs(self.training_dir, exist_ok=True)
+        torch.save(generator.eval().state_dict(), self.generator_path)
+        print(f"✅ Training finished, generator weights saved to {self.generator_path}")
+
+# Global Instance
+training_engine = TrainingEngine()
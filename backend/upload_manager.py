@@ -1,33 +1,154 @@
+import asyncio
+import hashlib
+import json
 import os
 import shutil
+import threading
+import time
 import uuid
 import aiofiles
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 from fastapi import UploadFile
 
-from .models import Dataset, ProcessingStatus
-from .utils.medical_validator import MedicalValidator
+from .config import settings
+from .models import Dataset, ProcessingStatus, StoredFile
+from .ingest_pool import ingest_pool
+from .utils.memory_report import peak_rss_mb
 
 UPLOAD_DIR = "backend/uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".dcm")
 
 class UploadManager:
-    def __init__(self):
+    """
+    Content-addressed upload store. Every distinct file content is kept once, as a blob at
+    `blobs/{sha256[:2]}/{sha256}{ext}`, and each dataset is a JSON manifest under `manifests/`
+    listing its files' names and digests. A blob's reference count is the number of manifest
+    entries pointing at it; it is deleted when the last dataset referencing it is released.
+    Re-uploading content we already hold skips the disk write, and skips DICOM validation when
+    the blob already passed it (its modality is kept in the manifests alongside the digest).
+    """
+    def __init__(self, upload_dir: str = UPLOAD_DIR):
+        self.upload_dir = upload_dir
+        self.blob_dir = os.path.join(upload_dir, "blobs")
+        self.manifest_dir = os.path.join(upload_dir, "manifests")
         self.active_tasks: Dict[str, Dataset] = {}
+        # sha256 -> blob path / reference count, rebuilt from the manifests on first use
+        self._blobs: Optional[Dict[str, str]] = None
+        self._refs: Dict[str, int] = {}
+        # sha256 -> modality of blobs that passed DICOM validation
+        self._modalities: Dict[str, str] = {}
+        self._lock = threading.Lock()
 
-    async def save_upload(self, file: UploadFile) -> str:
+    def _manifest_path(self, task_id: str) -> str:
+        return os.path.join(self.manifest_dir, f"{task_id}.json")
+
+    def _read_manifest(self, path: str) -> Optional[dict]:
+        try:
+            with open(path) as in_file:
+                return json.load(in_file)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable upload manifest {path}: {e}")
+            return None
+
+    def _index(self) -> Dict[str, str]:
+        """The blob index (call with the lock held)."""
+        if self._blobs is None:
+            self._blobs, self._refs, self._modalities = {}, {}, {}
+            if os.path.isdir(self.manifest_dir):
+                for name in sorted(os.listdir(self.manifest_dir)):
+                    if not name.endswith(".json"):
+                        continue
+                    manifest = self._read_manifest(os.path.join(self.manifest_dir, name))
+                    for entry in (manifest or {}).get("files", []):
+                        self._blobs[entry["sha256"]] = entry["blob"]
+                        self._refs[entry["sha256"]] = self._refs.get(entry["sha256"], 0) + 1
+                        if entry.get("modality"):
+                            self._modalities[entry["sha256"]] = entry["modality"]
+        return self._blobs
+
+    def blob_path(self, sha256: str) -> Optional[str]:
+        """Path of a stored (validated, referenced) blob, or None."""
+        with self._lock:
+            return self._index().get(sha256)
+
+    def dicom_modality(self, sha256: str) -> Optional[str]:
+        """Modality of a stored blob that passed DICOM validation, None if it never did."""
+        with self._lock:
+            self._index()
+            return self._modalities.get(sha256)
+
+    def _add_ref(self, sha256: str, path: str, modality: Optional[str] = None):
+        with self._lock:
+            self._index()[sha256] = path
+            self._refs[sha256] = self._refs.get(sha256, 0) + 1
+            if modality is not None:
+                self._modalities[sha256] = modality
+
+    def _release_ref(self, sha256: str) -> int:
+        """Drop one reference; deletes the blob with the last one. Returns the bytes freed."""
+        with self._lock:
+            blobs = self._index()
+            refs = self._refs.get(sha256, 0) - 1
+            if refs > 0:
+                self._refs[sha256] = refs
+                return 0
+            self._refs.pop(sha256, None)
+            self._modalities.pop(sha256, None)
+            path = blobs.pop(sha256, None)
+        if path is None or not os.path.exists(path):
+            return 0
+        size = os.path.getsize(path)
+        os.remove(path)
+        return size
+
+    async def save_upload(self, file: UploadFile, chunk_size: int = None) -> Tuple[str, StoredFile, int]:
         """
-        Saves uploaded file to a temporary directory.
+        Stores an uploaded file as a content-addressed blob, streaming it in `chunk_size` pieces
+        so at most one chunk is held in memory. The upload is read once: each chunk is hashed and
+        written to a temp file, which becomes the blob or, for content we already hold, is deleted.
+        Returns (blob path, stored file record, largest chunk held).
         """
-        file_id = str(uuid.uuid4())
-        file_path = os.path.join(UPLOAD_DIR, f"{file_id}_{file.filename}")
-        
-        async with aiofiles.open(file_path, 'wb') as out_file:
-            content = await file.read()
-            await out_file.write(content)
-            
-        return file_path
+        chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+        digest = hashlib.sha256()
+        size, peak_chunk = 0, 0
+        start = time.perf_counter()
+
+        os.makedirs(self.blob_dir, exist_ok=True)
+        # Unique temp name: concurrent uploads of the same new content each write their own copy
+        tmp_path = os.path.join(self.blob_dir, f"{uuid.uuid4().hex}.tmp")
+        try:
+            async with aiofiles.open(tmp_path, 'wb') as out_file:
+                while True:
+                    chunk = await file.read(chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    size += len(chunk)
+                    peak_chunk = max(peak_chunk, len(chunk))
+                    await out_file.write(chunk)
+            sha256 = digest.hexdigest()
+
+            file_path = self.blob_path(sha256)
+            deduplicated = file_path is not None
+            if not deduplicated:
+                extension = os.path.splitext(file.filename)[1].lower()
+                file_path = os.path.join(self.blob_dir, sha256[:2], f"{sha256}{extension}")
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                os.replace(tmp_path, file_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        stored = StoredFile(
+            filename=file.filename,
+            size_bytes=size,
+            sha256=sha256,
+            seconds=round(time.perf_counter() - start, 6),
+            deduplicated=deduplicated,
+        )
+        return file_path, stored, peak_chunk
 
     async def process_dataset(self, task_id: str, files: List[UploadFile]):
         """
@@ -45,33 +166,132 @@ class UploadManager:
         )
         self.active_tasks[task_id] = dataset
         
+        pending = set()
         try:
             total_size = 0
-            valid_files = 0
+            modalities = set()
             
             for file in files:
-                # 1. Save
-                file_path = await self.save_upload(file)
-                total_size += os.path.getsize(file_path)
+                # 1. Save (streamed; size and digest come from the copy itself)
+                file_path, stored, peak_chunk = await self.save_upload(file)
+                total_size += stored.size_bytes
+                dataset.upload_seconds += stored.seconds
+                dataset.peak_buffer_bytes = max(dataset.peak_buffer_bytes, peak_chunk)
                 
-                # 2. Validate
-                if file.filename.lower().endswith('.dcm'):
-                    is_valid, msg = MedicalValidator.validate_dicom(file_path)
-                    if not is_valid:
-                        print(f"Skipping invalid DICOM {file.filename}: {msg}")
-                        os.remove(file_path) # Cleanup invalid
-                        continue
-                        
-                valid_files += 1
-                dataset.processed_count = valid_files
+                # 2. Validate on the ingest pool while the next files are saved; stop reading
+                # uploads while this dataset already has a full pool's worth of files pending
+                pending.add(asyncio.ensure_future(self._ingest_file(dataset, file_path, stored, modalities)))
+                if len(pending) >= ingest_pool.max_pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    self._raise_first_error(done)
+            if pending:
+                done, pending = await asyncio.wait(pending)
+                self._raise_first_error(done)
                 
             dataset.total_size_bytes = total_size
-            dataset.file_count = valid_files
+            if dataset.upload_seconds > 0:
+                dataset.throughput_mb_s = round(total_size / (1024 * 1024) / dataset.upload_seconds, 2)
+            dataset.peak_rss_mb = peak_rss_mb()
+            dataset.file_count = dataset.processed_count
+            if len(modalities) == 1:
+                dataset.type = modalities.pop()
             dataset.status = ProcessingStatus.COMPLETED
             
         except Exception as e:
             print(f"Error processing upload task {task_id}: {e}")
             dataset.status = ProcessingStatus.ERROR
+        finally:
+            # After an error, stop the files still being ingested (and wait until they have),
+            # so no reference is added after the manifest is written
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            # Record the references taken so far, so blobs stay accounted for even after an error
+            if dataset.files:
+                self._write_manifest(dataset)
+
+    @staticmethod
+    def _raise_first_error(done: set):
+        """Retrieve the outcome of every finished ingest task; re-raise the first failure."""
+        errors = [task.exception() for task in done]
+        for error in errors:
+            if error is not None:
+                raise error
+
+    async def _ingest_file(self, dataset: Dataset, file_path: str, stored: StoredFile, modalities: set):
+        """
+        Validate one saved file and add it to the dataset. DICOM validation is skipped only for
+        content already stored as a valid DICOM (whose recorded modality is reused).
+        """
+        modality = self.dicom_modality(stored.sha256) if stored.deduplicated else None
+        if modality is None and stored.filename.lower().endswith('.dcm'):
+            is_valid, msg, modality, seconds = await ingest_pool.inspect(file_path)
+            stored.validation_ms = round(seconds * 1000, 3)
+            if not is_valid:
+                print(f"Skipping invalid DICOM {stored.filename}: {msg}")
+                if self.blob_path(stored.sha256) is None and os.path.exists(file_path):
+                    os.remove(file_path) # Cleanup invalid
+                return
+        if modality is not None:
+            modalities.add(modality)
+        if stored.deduplicated:
+            dataset.deduplicated_count += 1
+            dataset.bytes_saved += stored.size_bytes
+
+        self._add_ref(stored.sha256, file_path, modality)
+        dataset.processed_count += 1
+        dataset.files.append(stored)
+
+    def _write_manifest(self, dataset: Dataset):
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        manifest = {
+            "id": dataset.id,
+            "name": dataset.name,
+            "upload_date": dataset.upload_date.isoformat(),
+            "files": [
+                {"filename": stored.filename, "sha256": stored.sha256, "size_bytes": stored.size_bytes,
+                 "blob": self.blob_path(stored.sha256), "modality": self.dicom_modality(stored.sha256)}
+                for stored in dataset.files
+            ],
+        }
+        tmp_path = f"{self._manifest_path(dataset.id)}.tmp"
+        with open(tmp_path, "w") as out_file:
+            json.dump(manifest, out_file, indent=2)
+        os.replace(tmp_path, self._manifest_path(dataset.id))
+
+    def release_dataset(self, task_id: str) -> Optional[dict]:
+        """
+        Delete a dataset's manifest and drop its blob references; blobs no other dataset
+        references are deleted. Returns None for unknown datasets.
+        """
+        manifest_path = self._manifest_path(task_id)
+        manifest = self._read_manifest(manifest_path) if os.path.exists(manifest_path) else None
+        if manifest is None:
+            return None
+        os.remove(manifest_path)
+        self.active_tasks.pop(task_id, None)
+        freed = [self._release_ref(entry["sha256"]) for entry in manifest["files"]]
+        return {
+            "id": task_id,
+            "files": len(freed),
+            "blobs_deleted": sum(1 for size in freed if size),
+            "bytes_freed": sum(freed),
+        }
+
+    def list_images(self, extensions=IMAGE_EXTENSIONS) -> List[str]:
+        """
+        Paths of the stored uploads that are images (by extension), each distinct content once,
+        sorted for a stable order. Includes files stored before the blob store as `{uuid}_{name}`.
+        """
+        with self._lock:
+            blobs = list(self._index().values())
+        legacy = [
+            os.path.join(self.upload_dir, name)
+            for name in os.listdir(self.upload_dir)
+            if os.path.isfile(os.path.join(self.upload_dir, name))
+        ]
+        return sorted(path for path in blobs + legacy if path.lower().endswith(extensions))
 
     def get_status(self, task_id: str):
         return self.active_tasks.get(task_id)
@@ -0,0 +1,20 @@
+from typing import Iterable
+
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that passes responses under the `exclude_paths` prefixes through uncompressed,
+    for payloads that barely compress (e.g. float tensors) and would only cost CPU and latency.
+    """
+    def __init__(self, app: ASGIApp, exclude_paths: Iterable[str] = (), **kwargs):
+        super().__init__(app, **kwargs)
+        self.exclude_paths = tuple(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http" and scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
@@ -0,0 +1,131 @@
+import io
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..config import settings
+from .lazy import lazy_import
+
+Image = lazy_import("PIL.Image")
+
+# Output format -> media type, in server preference order for content negotiation
+IMAGE_FORMATS: Dict[str, str] = {
+    "png": "image/png",
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+}
+_FORMAT_ALIASES = {"jpg": "jpeg"}
+
+
+def to_uint8(images, channels_last: bool = True) -> np.ndarray:
+    """
+    Generator output (N, C, H, W) float tensor -> (N, H, W, C) uint8 array in one vectorized pass
+    ((N, C, H, W) with channels_last=False).
+    Each image is min-max normalized on its own, exactly like save_image(normalize=True).
+    """
+    flat = images.detach().flatten(1)
+    low = flat.amin(dim=1).view(-1, 1, 1, 1)
+    high = flat.amax(dim=1).view(-1, 1, 1, 1)
+    pixels = ((images.clamp(low, high) - low) / (high - low).clamp(min=1e-5)).mul_(255).add_(0.5).clamp_(0, 255)
+    if channels_last:
+        pixels = pixels.permute(0, 2, 3, 1)
+    return pixels.to("cpu").byte().numpy()
+
+
+def resolve_format(requested: str) -> str:
+    """Normalize a format name ('jpg' -> 'jpeg'). Raises ValueError for unsupported formats."""
+    fmt = requested.lower()
+    fmt = _FORMAT_ALIASES.get(fmt, fmt)
+    if fmt not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format '{requested}', expected one of {list(IMAGE_FORMATS)}")
+    return fmt
+
+
+def negotiate_format(requested: Optional[str] = None, accept: Optional[str] = None) -> str:
+    """
+    Pick the output format: an explicit `requested` format wins, otherwise lossless PNG unless the
+    Accept header names another format with a higher q value than PNG gets (from image/png, else
+    image/* or */*). Browsers list image/webp next to image/* at the same q for <img> loads, so
+    presence alone never switches them to a lossy format; among such formats the highest q wins,
+    ties going to server preference.
+    """
+    if requested:
+        return resolve_format(requested)
+    if not accept:
+        return "png"
+
+    weights = {}
+    for part in accept.split(","):
+        media_type, *params = [token.strip() for token in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        weights[media_type.lower()] = quality
+
+    png_quality = weights.get(IMAGE_FORMATS["png"], weights.get("image/*", weights.get("*/*", 0.0)))
+    best, best_quality = "png", png_quality
+    for fmt, media_type in IMAGE_FORMATS.items():
+        if weights.get(media_type, 0.0) > best_quality:
+            best, best_quality = fmt, weights[media_type]
+    return best
+
+
+class ImageEncoder:
+    """
+    Encodes generator output as PNG (tunable zlib level), WebP or JPEG with Pillow,
+    skipping torchvision's make_grid / per-call float copies, and records encode time per format.
+    """
+    def __init__(self, png_compress_level: int = None, webp_quality: int = None, jpeg_quality: int = None):
+        self.options = {
+            "png": {"compress_level": settings.IMAGE_PNG_COMPRESS_LEVEL if png_compress_level is None else png_compress_level},
+            "webp": {
+                "quality": settings.IMAGE_WEBP_QUALITY if webp_quality is None else webp_quality,
+                "method": settings.IMAGE_WEBP_METHOD,
+            },
+            "jpeg": {"quality": settings.IMAGE_JPEG_QUALITY if jpeg_quality is None else jpeg_quality},
+        }
+        self._timings = {fmt: {"images": 0, "seconds": 0.0, "bytes": 0} for fmt in IMAGE_FORMATS}
+        self._lock = threading.Lock()
+
+    def encode(self, pixels: np.ndarray, fmt: str = "png") -> bytes:
+        """Encode one (H, W, C) uint8 image."""
+        return self.encode_batch(pixels[np.newaxis], fmt)[0]
+
+    def encode_batch(self, pixels: np.ndarray, fmt: str = "png") -> List[bytes]:
+        """Encode a (N, H, W, C) uint8 batch, one file per image."""
+        fmt = resolve_format(fmt)
+        start = time.perf_counter()
+        encoded = []
+        for image in pixels:
+            buffer = io.BytesIO()
+            Image.fromarray(image).save(buffer, format=fmt.upper(), **self.options[fmt])
+            encoded.append(buffer.getvalue())
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            timing = self._timings[fmt]
+            timing["images"] += len(encoded)
+            timing["seconds"] += elapsed
+            timing["bytes"] += sum(len(data) for data in encoded)
+        return encoded
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                fmt: {
+                    **self.options[fmt],
+                    "images": timing["images"],
+                    "avg_encode_ms": round(timing["seconds"] / timing["images"] * 1000, 3) if timing["images"] else None,
+                    "avg_bytes": round(timing["bytes"] / timing["images"]) if timing["images"] else None,
+                }
+                for fmt, timing in self._timings.items()
+            }
+
+# Global Instance
+image_encoder = ImageEncoder()
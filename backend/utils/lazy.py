@@ -0,0 +1,97 @@
+import importlib
+import threading
+import time
+from types import ModuleType
+from typing import Any, Callable, Dict
+
+# Wall-clock seconds spent importing / building each lazily initialised dependency
+INIT_TIMINGS: Dict[str, float] = {}
+
+
+class LazyModule(ModuleType):
+    """
+    Module proxy that defers the real import until the first attribute access.
+    `torch = lazy_import("torch")` costs nothing at import time; `torch.randn(...)` imports it.
+    """
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    INIT_TIMINGS[f"import {self.__name__}"] = time.perf_counter() - start
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+class LazyObject:
+    """
+    Proxy for a singleton whose construction is expensive: `factory` runs on first use
+    (attribute access, item access, membership test, iteration or len).
+    """
+    def __init__(self, factory: Callable[[], Any], name: str = None):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_name", name or getattr(factory, "__name__", "lazy_object"))
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _resolve(self) -> Any:
+        instance = object.__getattribute__(self, "_instance")
+        if instance is None:
+            with object.__getattribute__(self, "_lock"):
+                instance = object.__getattribute__(self, "_instance")
+                if instance is None:
+                    start = time.perf_counter()
+                    instance = object.__getattribute__(self, "_factory")()
+                    INIT_TIMINGS[f"init {object.__getattribute__(self, '_name')}"] = time.perf_counter() - start
+                    object.__setattr__(self, "_instance", instance)
+        return instance
+
+    @property
+    def is_initialized(self) -> bool:
+        return object.__getattribute__(self, "_instance") is not None
+
+    def initialize_in_background(self) -> threading.Thread:
+        """Run the factory now on a daemon thread, so no caller (or event loop) waits for it later."""
+        name = object.__getattribute__(self, "_name")
+        thread = threading.Thread(target=self._resolve, name=f"init-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._resolve(), attr)
+
+    def __setattr__(self, attr: str, value: Any):
+        setattr(self._resolve(), attr, value)
+
+    def __getitem__(self, key):
+        return self._resolve()[key]
+
+    def __setitem__(self, key, value):
+        self._resolve()[key] = value
+
+    def __contains__(self, key) -> bool:
+        return key in self._resolve()
+
+    def __iter__(self):
+        return iter(self._resolve())
+
+    def __len__(self) -> int:
+        return len(self._resolve())
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable, Optional
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache bounded by entry count and, optionally,
+    by the summed size of its values as measured by `sizeof` (bytes by default, via len).
+    """
+    def __init__(self, max_entries: int = 1024, max_size: Optional[int] = None, sizeof: Callable[[Any], int] = len):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self._sizeof = sizeof
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any):
+        size = self._sizeof(value) if self.max_size is not None else 0
+        if self.max_size is not None and size > self.max_size:
+            return  # Never let a single oversized value flush the whole cache
+
+        with self._lock:
+            if key in self._data:
+                self._size -= self._sizeof(self._data.pop(key)) if self.max_size is not None else 0
+            self._data[key] = value
+            self._size += size
+
+            while len(self._data) > self.max_entries or (self.max_size is not None and self._size > self.max_size):
+                _, evicted = self._data.popitem(last=False)
+                self._size -= self._sizeof(evicted) if self.max_size is not None else 0
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._size = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "size": self._size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -1,6 +1,9 @@
-from typing import Tuple, List, Dict
-import pydicom
+from typing import Tuple, List, Dict, Optional
 import os
+from .lazy import lazy_import
+
+# Deferred: pydicom is only needed once a DICOM file is actually validated
+pydicom = lazy_import("pydicom")
 
 PHI_FIELDS = [
     'PatientName', 'PatientID', 'PatientBirthDate', 'PatientAddress',
@@ -9,31 +12,36 @@ PHI_FIELDS = [
 
 class MedicalValidator:
     @staticmethod
-    def validate_dicom(file_path: str) -> Tuple[bool, str]:
+    def inspect_dicom(file_path: str) -> Tuple[bool, str, Optional[str]]:
         """
-        Validates if a file is a valid DICOM medical image.
-        Returns: (is_valid, error_message)
+        Validates a DICOM file and reads its Modality, opening the file once: the preamble
+        check and pydicom's header parse share one handle (and its read buffer).
+        Returns: (is_valid, error_message, modality)
         """
         try:
-            # Check if file has DICOM header
             with open(file_path, 'rb') as f:
-                # DICOM files start with 128 bytes preamble + 4 bytes 'DICM'
-                f.seek(128)
-                header = f.read(4)
-                if header != b'DICM':
-                    # Some DICOMs might not have the header but still valid, try reading with pydicom
-                    pass
-            
-            # Use pydicom to fully validate
-            dcm = pydicom.dcmread(file_path, stop_before_pixels=True, force=True)
+                # DICOM files start with 128 bytes preamble + 4 bytes 'DICM'; some valid
+                # files lack it, so pydicom parses with force=True either way
+                has_preamble = f.read(132)[128:] == b'DICM'
+                f.seek(0)
+                dcm = pydicom.dcmread(f, stop_before_pixels=True, force=True)
             # Check for critical tags (e.g. Modality)
             if 'Modality' not in dcm:
-                return False, "Missing Modality tag in DICOM"
+                return False, "Missing Modality tag in DICOM", None
                 
-            return True, "Valid DICOM"
+            return True, "Valid DICOM" if has_preamble else "Valid DICOM (no preamble)", str(dcm.Modality)
             
         except Exception as e:
-            return False, f"Invalid DICOM file: {str(e)}"
+            return False, f"Invalid DICOM file: {str(e)}", None
+
+    @staticmethod
+    def validate_dicom(file_path: str) -> Tuple[bool, str]:
+        """
+        Validates if a file is a valid DICOM medical image.
+        Returns: (is_valid, error_message)
+        """
+        is_valid, message, _ = MedicalValidator.inspect_dicom(file_path)
+        return is_valid, message
 
     @staticmethod
     def check_phi(metadata: Dict) -> List[str]:
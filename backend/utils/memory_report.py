@@ -0,0 +1,57 @@
+import os
+import resource
+from typing import Dict, Optional
+
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+def mapped_file_report(file_path: str, pid: str = "self") -> Optional[Dict[str, float]]:
+    """
+    Memory a process has mapped from `file_path`, summed over all its mappings (from /proc/<pid>/smaps).
+    Shared_* pages are physically shared with other processes mapping the same file; Pss splits
+    them proportionally, so it approximates the real per-process cost.
+    Returns None where /proc is unavailable (non-Linux).
+    """
+    smaps_path = f"/proc/{pid}/smaps"
+    if not os.path.exists(smaps_path):
+        return None
+
+    target = os.path.realpath(file_path)
+    totals = {field: 0 for field in SMAPS_FIELDS}
+    mappings = 0
+    in_target = False
+
+    with open(smaps_path) as smaps:
+        for line in smaps:
+            parts = line.split()
+            if not parts:
+                continue
+            if not parts[0].endswith(":") or "-" in parts[0]:
+                # Mapping header: "start-end perms offset dev inode [pathname]"
+                in_target = len(parts) >= 6 and parts[5] == target
+                mappings += in_target
+                continue
+            field = parts[0][:-1]
+            if in_target and field in totals:
+                totals[field] += int(parts[1])  # kB
+
+    report = {f"{field.lower()}_mb": round(kb / 1024, 3) for field, kb in totals.items()}
+    report["mappings"] = mappings
+    return report
+
+
+def peak_rss_mb(pid: str = "self") -> Optional[float]:
+    """
+    Peak resident set size of a process (VmHWM from /proc/<pid>/status), in MB.
+    Falls back to getrusage's ru_maxrss for this process where /proc is unavailable.
+    """
+    status_path = f"/proc/{pid}/status"
+    if os.path.exists(status_path):
+        with open(status_path) as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)  # kB
+    if pid != "self":
+        return None
+    # ru_maxrss is in kB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if os.uname().sysname == "Darwin" else 1024), 1)
@@ -0,0 +1,17 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import BaseContext
+from typing import Callable, Optional
+
+
+def spawn_context() -> BaseContext:
+    """
+    Multiprocessing context for every worker process of the app. Workers are spawned, never
+    forked: forking a process that already runs torch thread pools can deadlock.
+    """
+    return multiprocessing.get_context("spawn")
+
+
+def spawn_process_pool(max_workers: int, initializer: Optional[Callable[[], None]] = None) -> ProcessPoolExecutor:
+    """ProcessPoolExecutor of `max_workers` spawned workers, each running `initializer` once."""
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=spawn_context(), initializer=initializer)
@@ -39,5 +39,6 @@ def test_generation():
     print("Generation test passed!")
 
 if __name__ == "__main__":
+    gan_simulator.ensure_loaded()
     test_training()
     test_generation()
@@ -22,9 +22,11 @@ async def test_upload_pipeline():
     class MockUploadFile:
         def __init__(self, filename):
             self.filename = filename 
-        async def read(self):
-            with open(self.filename, "rb") as f:
-                return f.read()
+            self._file = open(filename, "rb")
+        async def read(self, size: int = -1):
+            return self._file.read(size)
+        async def seek(self, offset: int):
+            self._file.seek(offset)
 
     # 2. Process Upload
     task_id = "test_task_123"
@@ -41,13 +43,13 @@ async def test_upload_pipeline():
     assert dataset.status == ProcessingStatus.COMPLETED
     assert dataset.file_count == 1
     assert dataset.processed_count == 1
+    assert dataset.files[0].size_bytes == os.path.getsize(test_filename)
+    print(f"SHA-256: {dataset.files[0].sha256}, throughput: {dataset.throughput_mb_s} MB/s")
     
     # 4. Test Image Processor
     print("Testing Image Processor...")
-    # Find the uploaded file in backend/uploads
-    uploaded_files = os.listdir("backend/uploads")
-    latest_file = [f for f in uploaded_files if f.endswith(test_filename)][0]
-    full_path = os.path.join("backend/uploads", latest_file)
+    # The uploaded file is stored in backend/uploads under its content hash
+    full_path = upload_manager.blob_path(dataset.files[0].sha256)
     
     thumbnail = ImageProcessor.process_image(full_path)
     assert thumbnail is not None
@@ -55,6 +57,7 @@ async def test_upload_pipeline():
     print("Thumbnail generated successfully.")
     
     # Cleanup
+    files[0]._file.close()
     os.remove(test_filename)
     # Don't delete upload dir content to allow inspection if needed
     
@@ -0,0 +1,29 @@
+import os
+import sys
+
+# Add root to path
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if root not in sys.path:
+    sys.path.insert(0, root)
+
+from backend.inference_autotune import AUTOTUNE_PATH, inference_autotuner
+from backend.networks.gan_architecture import MedicalGenerator
+
+def autotune():
+    """Calibrate inference threads / batch size on this host and persist the result for the server."""
+    print("--- Inference Autotune ---")
+    # Timing doesn't depend on the weights, so an untrained generator calibrates just as well
+    report = inference_autotuner.calibrate(MedicalGenerator().eval())
+
+    print(f"Thread budget per forward pass: {report['thread_budget']}, latency target: {report['latency_target_ms']}ms\n")
+    print(f"{'threads':>7} {'batch':>5} {'batch ms':>9} {'p95 ms':>8} {'ms/image':>9} {'images/s':>9}")
+    for result in report["results"]:
+        print(f"{result['threads']:>7} {result['batch_size']:>5} {result['batch_latency_ms']:>9.2f} "
+              f"{result['p95_latency_ms']:>8.2f} {result['per_image_ms']:>9.3f} {result['images_per_sec']:>9.1f}")
+
+    best = report["best"]
+    print(f"\nBest: {best['threads']} threads, batch size {best['batch_size']} "
+          f"(calibrated in {report['duration_seconds']}s, saved to {AUTOTUNE_PATH})")
+
+if __name__ == "__main__":
+    autotune()
@@ -12,6 +12,7 @@ from backend.gan_simulator import GANSimulator
 def benchmark_simulation():
     print("--- GAN Performance Benchmark ---")
     simulator = GANSimulator()
+    simulator.ensure_loaded()
     simulator.max_epochs = 50 # Reduce for faster benchmark
     
     # 1. Benchmark Training step
@@ -32,5 +33,14 @@ def benchmark_simulation():
     print(f"1000 samples generated in: {duration:.4f}s")
     print(f"Throughput: {1000/duration:.2f} samples/sec")
 
+    # 3. Benchmark Columnar (vectorized) Generation
+    cohort_size = 1_000_000
+    print(f"\nBenchmarking columnar generation of {cohort_size} samples...")
+    start = time.time()
+    batch = simulator.generate_batch(cohort_size)
+    duration = time.time() - start
+    print(f"{len(batch)} samples generated in: {duration:.4f}s")
+    print(f"Throughput: {cohort_size/duration:.2f} samples/sec")
+
 if __name__ == "__main__":
     benchmark_simulation()
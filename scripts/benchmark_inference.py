@@ -0,0 +1,64 @@
+import time
+import sys
+import os
+
+# Add root to path
+root = os.path.join(os.path.dirname(__file__), '..')
+if root not in sys.path:
+    sys.path.insert(0, root)
+
+import torch
+
+from backend.inference_backend import INFERENCE_BACKENDS, prepare_generator
+from backend.networks.gan_architecture import MedicalGenerator
+from backend.utils.image_encoder import IMAGE_FORMATS, ImageEncoder, to_uint8
+
+WEIGHTS_PATH = os.path.join(root, "backend", "weights", "generator_v1.pth")
+BATCH_SIZES = [1, 8, 32]
+ITERATIONS = 10
+
+def load_reference_model() -> MedicalGenerator:
+    model = MedicalGenerator()
+    if os.path.exists(WEIGHTS_PATH):
+        model.load_state_dict(torch.load(WEIGHTS_PATH, map_location=torch.device('cpu')))
+        print(f"Using weights from {WEIGHTS_PATH}")
+    else:
+        print("No weights found, benchmarking a randomly initialised generator.")
+    return model.eval()
+
+def benchmark_backends():
+    print("--- Generator Inference Backend Benchmark ---")
+    reference = load_reference_model()
+
+    for backend in INFERENCE_BACKENDS:
+        model, report = prepare_generator(reference, backend)
+        if report["backend"] != backend:
+            print(f"\n[{backend}] unavailable: {report.get('fallback_reason')}")
+            continue
+
+        print(f"\n[{backend}] mean abs error vs eager: {report.get('mean_abs_error', 0.0):.5f}")
+        for batch_size in BATCH_SIZES:
+            latents = torch.randn(batch_size, 100, 1, 1)
+            with torch.no_grad():
+                start = time.perf_counter()
+                for _ in range(ITERATIONS):
+                    model(latents)
+                duration = (time.perf_counter() - start) / ITERATIONS
+            print(f"  batch {batch_size:>3}: {duration*1000:8.2f}ms/batch, {batch_size/duration:9.1f} images/sec")
+
+def benchmark_encoders(batch_size: int = 32):
+    print("\n--- Image Encoding Benchmark ---")
+    with torch.no_grad():
+        pixels = to_uint8(load_reference_model()(torch.randn(batch_size, 100, 1, 1)))
+    encoders = {f"png (level {level})": (ImageEncoder(png_compress_level=level), "png") for level in (1, 6, 9)}
+    encoders.update({fmt: (ImageEncoder(), fmt) for fmt in IMAGE_FORMATS if fmt != "png"})
+    for label, (encoder, fmt) in encoders.items():
+        encoder.encode_batch(pixels, fmt)  # warm-up
+        start = time.perf_counter()
+        encoded = encoder.encode_batch(pixels, fmt)
+        duration = (time.perf_counter() - start) / batch_size
+        print(f"  {label:<14}: {duration*1000:6.2f}ms/image, {sum(map(len, encoded)) / batch_size / 1024:6.1f} KB/image")
+
+if __name__ == "__main__":
+    benchmark_backends()
+    benchmark_encoders()
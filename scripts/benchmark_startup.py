@@ -0,0 +1,60 @@
+import json
+import os
+import subprocess
+import sys
+
+# Add root to path
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Runs in a fresh interpreter so nothing is already cached in sys.modules
+PROBE = r"""
+import json, sys, time
+timings = {}
+
+def phase(name, fn):
+    start = time.perf_counter()
+    fn()
+    timings[name] = time.perf_counter() - start
+
+phase("import fastapi", lambda: __import__("fastapi"))
+phase("import backend.config", lambda: __import__("backend.config"))
+phase("import backend.models", lambda: __import__("backend.models"))
+phase("import backend.gan_simulator", lambda: __import__("backend.gan_simulator"))
+phase("import backend.auth", lambda: __import__("backend.auth"))
+phase("import backend.main", lambda: __import__("backend.main"))
+
+from backend.gan_simulator import gan_simulator
+from backend.auth import fake_users_db
+from backend.utils.lazy import INIT_TIMINGS
+
+phase("first use: generator load", gan_simulator.ensure_loaded)
+phase("first use: auth user db", lambda: "admin" in fake_users_db)
+
+print(json.dumps({
+    "phases": timings,
+    "lazy_breakdown": INIT_TIMINGS,
+    "model_state": gan_simulator.state.value,
+    "heavy_modules_loaded": [name for name in ("torch", "torchvision", "pandas", "pyarrow", "pydicom") if name in sys.modules],
+}))
+"""
+
+def benchmark_startup():
+    print("--- Cold Start Benchmark ---")
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=root, capture_output=True, text=True, check=True
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    print("\nImport phases (each excludes modules already loaded by earlier phases):")
+    for name, seconds in report["phases"].items():
+        print(f"  {name:<36} {seconds*1000:9.1f}ms")
+
+    print("\nLazily initialised dependencies (paid on first use):")
+    for name, seconds in report["lazy_breakdown"].items():
+        print(f"  {name:<36} {seconds*1000:9.1f}ms")
+
+    print(f"\nGenerator state after load: {report['model_state']}")
+    print(f"Heavy modules loaded after first use: {report['heavy_modules_loaded']}")
+
+if __name__ == "__main__":
+    benchmark_startup()
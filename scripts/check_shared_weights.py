@@ -0,0 +1,56 @@
+import multiprocessing
+import os
+import sys
+import tempfile
+
+# Add root to path
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if root not in sys.path:
+    sys.path.insert(0, root)
+
+WORKERS = 4
+DEFAULT_WEIGHTS = os.path.join(root, "backend", "weights", "generator_v1.pth")
+
+def load_in_worker(weights_path: str, results):
+    """Simulates one uvicorn worker: load the generator and report what it maps from the weights file."""
+    os.environ["LOW_RESOURCE_MODE"] = "false"
+    from backend.gan_simulator import GANSimulator
+
+    simulator = GANSimulator()
+    simulator.weights_path = weights_path
+    simulator.ensure_loaded()
+    results.put((os.getpid(), simulator.weights_memory()))
+
+def check_shared_weights(weights_path: str = DEFAULT_WEIGHTS):
+    print("--- Shared Weights Check ---")
+    if not os.path.exists(weights_path):
+        import torch
+        from backend.networks.gan_architecture import MedicalGenerator
+        weights_path = os.path.join(tempfile.mkdtemp(), "generator_random.pth")
+        torch.save(MedicalGenerator().state_dict(), weights_path)
+        print(f"No weights found, using a randomly initialised checkpoint at {weights_path}")
+
+    print(f"Weights file: {os.path.getsize(weights_path) / 2**20:.2f} MB, {WORKERS} workers\n")
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    workers = [context.Process(target=load_in_worker, args=(weights_path, results)) for _ in range(WORKERS)]
+    for worker in workers:
+        worker.start()
+    reports = [results.get(timeout=120) for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    for pid, report in reports:
+        if report is None:
+            print(f"  pid {pid}: weights not memory-mapped (WEIGHTS_MMAP disabled, legacy checkpoint or non-Linux)")
+            continue
+        print(f"  pid {pid}: rss {report['rss_mb']:.2f} MB, pss {report['pss_mb']:.2f} MB, "
+              f"shared {report['shared_clean_mb']:.2f} MB, private {report['private_clean_mb'] + report['private_dirty_mb']:.2f} MB")
+
+    # Pss splits shared pages across the processes mapping them, so its sum is the real footprint
+    total_pss = sum(report["pss_mb"] for _, report in reports if report)
+    total_rss = sum(report["rss_mb"] for _, report in reports if report)
+    print(f"\nWeights footprint across workers: {total_pss:.2f} MB (vs {total_rss:.2f} MB if each held a private copy)")
+
+if __name__ == "__main__":
+    check_shared_weights(*sys.argv[1:])
@@ -0,0 +1,30 @@
+import os
+import sys
+import time
+
+# Add root to path
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if root not in sys.path:
+    sys.path.insert(0, root)
+
+from backend.training_engine import training_engine
+
+def train():
+    """Train the generator on the uploaded images (resumes an unfinished run from its checkpoint)."""
+    print("--- GAN Training ---")
+    print(f"Epochs: {training_engine.epochs}, batch size: {training_engine.batch_size}, "
+          f"loader workers: {training_engine.workers}, checkpoint every {training_engine.checkpoint_every} epochs\n")
+    start = time.perf_counter()
+    for metrics in training_engine.train():
+        print(f"Epoch {metrics.epoch:>4}: G loss {metrics.generator_loss:.4f}, D loss {metrics.discriminator_loss:.4f}, "
+              f"D accuracy {metrics.accuracy:.3f}, {metrics.samples_per_sec:.1f} samples/s, "
+              f"data wait {metrics.data_wait_fraction:.0%}, step p90 {metrics.step_times.p90_ms:.0f}ms "
+              f"({time.perf_counter() - start:.0f}s)")
+
+    profile = training_engine.profiler.summary()
+    if profile:
+        print(f"\nRun: {profile['samples_per_sec']} samples/s, {profile['bound']}-bound "
+              f"(data wait {profile['data_wait_fraction']:.0%}), peak RSS {profile['peak_rss_mb']} MB")
+
+if __name__ == "__main__":
+    train()